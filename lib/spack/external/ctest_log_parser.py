@@ -68,9 +68,12 @@
 from __future__ import print_function
 from __future__ import division
 
+import gzip
+import mmap
 import re
 import math
 import multiprocessing
+import sys
 import time
 from contextlib import contextmanager
 
@@ -98,6 +101,7 @@ class prefilter(object):
     becomes necessary.
     """
     def __init__(self, precondition, *patterns):
+        self.sources = patterns
         self.patterns = [re.compile(p) for p in patterns]
         self.pre = precondition
         self.pattern = "\n                            ".join(
@@ -236,6 +240,25 @@ def match(self, text):
     "_with_warning_C",
 ]
 
+#: Substrings of which every line matching one of ``_error_matches`` or
+#: ``_warning_matches`` contains at least one.  Logs are searched for these
+#: first, and only lines containing them are matched against the regexes,
+#: so keep them up to date with the regexes above.
+_keywords = [
+    # errors
+    "rror", "ERROR", "FAILED", "Fatal", "fatal", "egmentation", "ermission",
+    "undefined reference", "multiply defined", "undefined symbol",
+    "Undefined", "Unsatisfied symbol", "Unresolved:", "\", line ",
+    "collect2", "terminated with signal", "cannot find", "can't find",
+    "Can't find", "*** No", "Invalid", "internal link edit",
+    "Unrecognized option", "0706-006", "could not be found",
+    "string too big", "final link failed", "Stop.", "No such file",
+    "cannot be built", "failed with exit code",
+    # warnings
+    "arning", "arnung", "note:", "WARNING", "has no symbols", "remark",
+    "REMARK",
+]
+
 #: Regexes to match file/line numbers in error/warning messages
 _file_line_matches = [
     "^Warning W[0-9]+ ([a-zA-Z.\\:/0-9_+ ~-]+) ([0-9]+):",
@@ -386,6 +409,121 @@ def _parse_unpack(args):
     return _parse(*args)
 
 
+#: Logs are scanned in blocks of about this many bytes
+_block_size = 8 * 1024 * 1024
+
+
+def _combine(regex_array):
+    """Combine an array of regexes into a single alternation on bytes.
+
+    Searching a line with one combined regex is much faster than
+    searching it with each regex in turn.
+    """
+    sources = []
+    for regex in regex_array:
+        if isinstance(regex, prefilter):
+            sources.extend(regex.sources)
+        else:
+            sources.append(regex)
+    combined = '|'.join('(?:%s)' % p for p in sources)
+    return re.compile(combined.encode('ascii'))
+
+
+if sys.version_info[0] < 3:
+    def _decode(line):
+        return line
+else:
+    def _decode(line):
+        return line.decode('utf-8', 'replace')
+
+
+def _blocks(stream):
+    """Yield the contents of ``stream`` as bytes, in blocks of whole lines.
+
+    ``stream`` is either the name of a log file, which is memory-mapped
+    (or decompressed, if its name ends in ``.gz``), a file object, or any
+    other iterable of lines.
+    """
+    if isinstance(stream, string_types):
+        if stream.endswith('.gz'):
+            f = gzip.open(stream, 'rb')
+            try:
+                for block in _blocks(f):
+                    yield block
+            finally:
+                f.close()
+            return
+
+        with open(stream, 'rb') as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return  # mmap can't map empty files
+            try:
+                start = 0
+                while start < len(data):
+                    end = data.find(b'\n', start + _block_size) + 1
+                    end = end or len(data)
+                    yield data[start:end]
+                    start = end
+            finally:
+                data.close()
+        return
+
+    if not hasattr(stream, 'read'):
+        lines, size = [], 0
+        for line in stream:
+            if not isinstance(line, bytes):
+                line = line.encode('utf-8', 'replace')
+            if not line.endswith(b'\n'):
+                line += b'\n'
+            lines.append(line)
+            size += len(line)
+            if size >= _block_size:
+                yield b''.join(lines)
+                lines, size = [], 0
+        if lines:
+            yield b''.join(lines)
+        return
+
+    rest = b''
+    while True:
+        block = stream.read(_block_size)
+        if not block:
+            break
+        if not isinstance(block, bytes):
+            block = block.encode('utf-8', 'replace')
+        end = block.rfind(b'\n') + 1
+        if end:
+            yield rest + block[:end]
+            rest = block[end:]
+        else:
+            rest += block
+    if rest:
+        yield rest
+
+
+def _lines_before(block, pos, count):
+    """Up to ``count`` lines of ``block`` before the line at ``pos``."""
+    lines = []
+    while pos > 0 and len(lines) < count:
+        start = block.rfind(b'\n', 0, pos - 1) + 1
+        lines.append(_decode(block[start:pos]).rstrip())
+        pos = start
+    lines.reverse()
+    return lines
+
+
+def _lines_after(block, pos, count):
+    """Up to ``count`` lines of ``block`` starting at ``pos``."""
+    lines = []
+    while pos < len(block) and len(lines) < count:
+        end = block.find(b'\n', pos) + 1 or len(block)
+        lines.append(_decode(block[pos:end]).rstrip())
+        pos = end
+    return lines
+
+
 class CTestLogParser(object):
     """Log file parser that extracts errors and warnings."""
     def __init__(self, profile=False):
@@ -393,6 +531,15 @@ def __init__(self, profile=False):
         self.timings = []
         self.profile = profile
 
+        # combined regexes used to scan logs when not profiling
+        self.error_matches      = _combine(_error_matches)
+        self.error_exceptions   = _combine(_error_exceptions)
+        self.warning_matches    = _combine(_warning_matches)
+        self.warning_exceptions = _combine(_warning_exceptions)
+        self.file_line_matches  = [re.compile(regex.encode('ascii'))
+                                   for regex in _file_line_matches]
+        self.keywords = [k.encode('ascii') for k in _keywords]
+
     def print_timings(self):
         """Print out profile of time spent in different regular expressions."""
         def stringify(elt):
@@ -412,17 +559,27 @@ def stringify(elt):
             index += 1
 
 
-    def parse(self, stream, context=6, jobs=None):
+    def parse(self, stream, context=6, jobs=None, max_errors=None):
         """Parse a log file by searching each line for errors and warnings.
 
+        Logs are scanned block by block, searching each block for lines
+        that match any error or warning regex at once.  Only those lines
+        are checked against the exceptions.  When profiling, each line is
+        checked against each regex instead, to time them individually.
+
         Args:
             stream (str or file-like): filename or stream to read from
             context (int): lines of context to extract around each log event
+            jobs (int): number of processes to parse with when profiling
+            max_errors (int): stop parsing after this many errors
 
         Returns:
             (tuple): two lists containing ``BuildError`` and
                 ``BuildWarning`` objects.
         """
+        if not self.profile:
+            return self._scan(stream, context, max_errors)
+
         if isinstance(stream, string_types):
             with open(stream) as f:
                 return self.parse(f, context, jobs)
@@ -470,3 +627,73 @@ def parse(self, stream, context=6, jobs=None):
                 l.rstrip() for l in lines[i + 1:i + context + 1]]
 
         return errors, warnings
+
+    def _scan(self, stream, context, max_errors):
+        errors = []
+        warnings = []
+        pending = []     # events still missing lines of post context
+        previous = []    # the last lines of the previous block
+        line_no = 0      # number of lines in previous blocks
+
+        for block in _blocks(stream):
+            for event, count in pending:
+                event.post_context.extend(_lines_after(block, 0, count))
+            pending = [(e, context - len(e.post_context))
+                       for e, _ in pending if len(e.post_context) < context]
+
+            if max_errors is not None and len(errors) >= max_errors:
+                if not pending:
+                    break
+                continue
+
+            # find the start of each line containing a keyword
+            starts = set()
+            for keyword in self.keywords:
+                found = block.find(keyword)
+                while found >= 0:
+                    starts.add(block.rfind(b'\n', 0, found) + 1)
+                    end = block.find(b'\n', found)
+                    found = block.find(keyword, end) if end >= 0 else -1
+
+            pos = 0
+            for start in sorted(starts):
+                line_no += block.count(b'\n', pos, start)
+                pos = start
+                end = block.find(b'\n', start) + 1 or len(block)
+                line = block[start:end]
+
+                if (self.error_matches.search(line) and
+                        not self.error_exceptions.search(line)):
+                    event = BuildError(_decode(line).strip(), line_no + 1)
+                    errors.append(event)
+                elif (self.warning_matches.search(line) and
+                        not self.warning_exceptions.search(line)):
+                    event = BuildWarning(_decode(line).strip(), line_no + 1)
+                    warnings.append(event)
+                else:
+                    continue
+
+                # get file/line number for each event, if possible
+                for flm in self.file_line_matches:
+                    match = flm.search(line)
+                    if match:
+                        event.source_file, event.source_line_no = [
+                            _decode(g) for g in match.groups()]
+
+                # add log context to the event
+                event.pre_context = _lines_before(block, start, context)
+                missing = context - len(event.pre_context)
+                if missing > 0 and previous:
+                    event.pre_context[:0] = previous[-missing:]
+                event.post_context = _lines_after(block, end, context)
+                if len(event.post_context) < context:
+                    pending.append((event, context - len(event.post_context)))
+
+                if max_errors is not None and len(errors) >= max_errors:
+                    break
+
+            line_no += block.count(b'\n', pos)
+            previous = (previous + _lines_before(block, len(block), context))
+            previous = previous[-context:] if context else []
+
+        return errors, warnings
@@ -263,11 +263,25 @@ def setter(name, value):
     return cls
 
 
+def reduce_ex_with_slots(obj, protocol):
+    """Implementation of ``__reduce_ex__`` for classes with ``__slots__``.
+
+    Python 2 pickles objects with ``__slots__`` only with protocol 2 or
+    higher, so they are always reduced as with protocol 2. Assign this to
+    ``__reduce_ex__`` in the class body to use it.
+    """
+    return object.__reduce_ex__(obj, max(protocol, 2))
+
+
 @key_ordering
 class HashableMap(collections.MutableMapping):
     """This is a hashable, comparable dictionary.  Hash is performed on
        a tuple of the values in the dictionary."""
 
+    __slots__ = ('dict',)
+
+    __reduce_ex__ = reduce_ex_with_slots
+
     def __init__(self):
         self.dict = {}
 
@@ -286,6 +300,17 @@ def __len__(self):
     def __delitem__(self, key):
         del self.dict[key]
 
+    # The generic Mapping methods go through __iter__ and __getitem__ for
+    # each key, so forward the common lookups to the dictionary instead.
+    def __contains__(self, key):
+        return key in self.dict
+
+    def items(self):
+        return self.dict.items()
+
+    def values(self):
+        return self.dict.values()
+
     def _cmp_key(self):
         return tuple(sorted(self.values()))
 
@@ -383,6 +408,26 @@ def dedupe(sequence):
             seen.add(x)
 
 
+#: Instances returned by shared(), keyed by themselves
+_shared = {}
+
+
+def shared(value):
+    """Return a shared instance of an immutable value equal to ``value``.
+
+    Many objects read from files are equal to each other (e.g. the names
+    and variant values in a database of installed specs). Keeping one
+    instance of each instead of a copy per occurrence saves memory.
+
+    Args:
+        value: hashable, immutable value (like a string or a tuple)
+
+    Returns:
+        the first value equal to ``value`` that was passed to this function
+    """
+    return _shared.setdefault(value, value)
+
+
 def pretty_date(time, now=None):
     """Convert a datetime or timestamp to a pretty, relative date.
 
@@ -529,21 +574,39 @@ class ObjectWrapper(object):
     This class is modeled after the stackoverflow answer:
     * http://stackoverflow.com/a/1445289/771663
     """
-    def __init__(self, wrapped_object):
+    def __new__(cls, wrapped_object, *args, **kwargs):
         wrapped_cls = type(wrapped_object)
         wrapped_name = wrapped_cls.__name__
 
+        # The instance is created with its final type, as objects with
+        # __slots__ can't change their __class__ to one with a different
+        # layout.
+        #
         # If the wrapped object is already an ObjectWrapper, or a derived class
-        # of it, adding type(self) in front of type(wrapped_object)
+        # of it, adding cls in front of type(wrapped_object)
         # results in an inconsistent MRO.
         #
         # TODO: the implementation below doesn't account for the case where we
         # TODO: have different base classes of ObjectWrapper, say A and B, and
         # TODO: we want to wrap an instance of A with B.
-        if type(self) not in wrapped_cls.__mro__:
-            self.__class__ = type(wrapped_name, (type(self), wrapped_cls), {})
+        if cls not in wrapped_cls.__mro__:
+            wrapper_cls = type(wrapped_name, (cls, wrapped_cls), {})
         else:
-            self.__class__ = type(wrapped_name, (wrapped_cls,), {})
+            wrapper_cls = type(wrapped_name, (wrapped_cls,), {})
+
+        return object.__new__(wrapper_cls)
+
+    def __init__(self, wrapped_object):
+        # Attributes stored in slots are copied, all the others are shared
+        # with the wrapped object
+        for cls in type(wrapped_object).__mro__:
+            for name in cls.__dict__.get('__slots__', ()):
+                if name in ('__dict__', '__weakref__'):
+                    continue
+                try:
+                    setattr(self, name, getattr(wrapped_object, name))
+                except AttributeError:
+                    pass  # slot that was never set
 
         self.__dict__ = wrapped_object.__dict__
 
@@ -6,6 +6,8 @@
 import os
 import fcntl
 import errno
+import signal
+import threading
 import time
 import socket
 from datetime import datetime
@@ -16,7 +18,8 @@
 
 __all__ = ['Lock', 'LockTransaction', 'WriteTransaction', 'ReadTransaction',
            'LockError', 'LockTimeoutError',
-           'LockPermissionError', 'LockROFileError', 'CantCreateLockError']
+           'LockPermissionError', 'LockROFileError', 'CantCreateLockError',
+           'OpenFileTracker', 'LockStatistics']
 
 #: Mapping of supported locks to description
 lock_type = {fcntl.LOCK_SH: 'read', fcntl.LOCK_EX: 'write'}
@@ -26,6 +29,155 @@
 true_fn = lambda: True
 
 
+class OpenFile(object):
+    """Record for an open lock file, shared by all the locks on it."""
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.refs = 0
+
+
+class OpenFileTracker(object):
+    """Track open lock files, so that a process opens each of them once.
+
+    POSIX locks belong to a process and a file, not to a file descriptor:
+    closing *any* descriptor of a file releases all the locks the process
+    holds on it. Byte-range locks on the same file, like the prefix locks
+    of a Spack database, must therefore share one descriptor, which also
+    keeps the number of open descriptors low. Descriptors are reference
+    counted and closed when the last lock on the file is released.
+    """
+
+    def __init__(self):
+        self._descriptors = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(stat_result):
+        # Descriptors are not shared with forked processes
+        return stat_result.st_dev, stat_result.st_ino, os.getpid()
+
+    def get_fh(self, path, read_only=False):
+        """Return an open file object for ``path``, creating the file if
+        needed.
+
+        Writable files are opened ``r+`` so that locks on them can be
+        upgraded to write locks later. ``read_only`` files are opened ``r``,
+        unless they are already open for writing.
+        """
+        with self._lock:
+            obj = None
+            try:
+                obj = self._descriptors.get(self._key(os.stat(path)))
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
+
+            if obj is None:
+                if read_only:
+                    os_mode, fd_mode = os.O_RDONLY, 'r'
+                else:
+                    os_mode, fd_mode = os.O_RDWR | os.O_CREAT, 'r+'
+                fh = os.fdopen(os.open(path, os_mode), fd_mode)
+                obj = OpenFile(fh)
+                self._descriptors[self._key(os.fstat(fh.fileno()))] = obj
+
+            obj.refs += 1
+            return obj.fh
+
+    def release_fh(self, fh):
+        """Release a file object obtained with ``get_fh``, and close it if
+        there are no more locks on the file."""
+        with self._lock:
+            key = self._key(os.fstat(fh.fileno()))
+            obj = self._descriptors.get(key)
+            if obj is None or obj.fh is not fh:
+                fh.close()
+                return
+
+            obj.refs -= 1
+            if obj.refs == 0:
+                del self._descriptors[key]
+                fh.close()
+
+
+#: Open file descriptors for locks in this process. Used to prevent one
+#: process from opening the same lock file multiple times.
+file_tracker = OpenFileTracker()
+
+
+class LockStatistics(object):
+    """Contention statistics of the locks taken by this process.
+
+    A lock acquisition is contended if it could not be taken right away,
+    because another process held a conflicting lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        #: Number of locks acquired
+        self.acquired = 0
+        #: Number of acquisitions that had to wait for another process
+        self.contended = 0
+        #: Number of acquisitions that timed out
+        self.timeouts = 0
+        #: Total and maximum time spent waiting for contended locks
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        #: Maps lock files to the number of contended acquisitions and the
+        #: time spent waiting for them
+        self.by_path = {}
+
+    def record(self, path, wait_time, contended, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.acquired += 1
+            if not contended:
+                return
+            self.contended += 1
+            self.wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+            count, total = self.by_path.get(path, (0, 0.0))
+            self.by_path[path] = (count + 1, total + wait_time)
+
+    def __str__(self):
+        return ('{0} locks acquired, {1} contended, {2} timed out, '
+                'waited {3:0.2f}s (max {4:0.2f}s)'.format(
+                    self.acquired, self.contended, self.timeouts,
+                    self.wait_time, self.max_wait_time))
+
+
+#: Contention statistics of all the locks in this process
+statistics = LockStatistics()
+
+
+#: Shortest timeout (in seconds) for which contended locks are waited for
+#: with a blocking call interrupted by ``SIGALRM``. Shorter timeouts, like
+#: the near-zero timeouts of the installer, just poll the lock once more.
+min_alarm_timeout = 1e-3
+
+
+class _AlarmTimeout(Exception):
+    """Raised by the SIGALRM handler to interrupt a blocking lock."""
+
+
+def _can_use_alarm():
+    """Return True if SIGALRM can be used to time out blocking calls.
+
+    This is possible only in the main thread, and only if nobody else is
+    using the signal or the real-time interval timer.
+    """
+    return (hasattr(signal, 'setitimer') and
+            isinstance(threading.current_thread(), threading._MainThread) and
+            signal.getsignal(signal.SIGALRM) in (signal.SIG_DFL, None) and
+            signal.getitimer(signal.ITIMER_REAL)[0] == 0)
+
+
 def _attempts_str(wait_time, nattempts):
     # Don't print anything if we succeeded on the first try
     if nattempts <= 1:
@@ -46,7 +198,14 @@ class Lock(object):
     Note that this is for managing contention over resources *between*
     processes and not for managing contention between threads in a process: the
     functions of this object are not thread-safe. A process also must not
-    maintain multiple locks on the same file.
+    maintain multiple locks on the same byte range of a file. Locks on
+    different byte ranges of the same file share one file descriptor (see
+    ``OpenFileTracker``).
+
+    Contended locks are waited for with a blocking ``fcntl`` call when
+    possible, i.e. when there is no timeout or when the timeout can be
+    implemented with ``SIGALRM`` in the main thread. Otherwise, the lock is
+    polled with a backoff.
     """
 
     def __init__(self, path, start=0, length=0, default_timeout=None,
@@ -154,20 +313,24 @@ def _lock(self, op, timeout=None):
             parent = self._ensure_parent_directory()
 
             # Open writable files as 'r+' so we can upgrade to write later
-            os_mode, fd_mode = (os.O_RDWR | os.O_CREAT), 'r+'
+            read_only = False
             if os.path.exists(self.path):
                 if not os.access(self.path, os.W_OK):
                     if op == fcntl.LOCK_SH:
                         # can still lock read-only files if we open 'r'
-                        os_mode, fd_mode = os.O_RDONLY, 'r'
+                        read_only = True
                     else:
                         raise LockROFileError(self.path)
 
             elif not os.access(parent, os.W_OK):
                 raise CantCreateLockError(self.path)
 
-            fd = os.open(self.path, os_mode)
-            self._file = os.fdopen(fd, fd_mode)
+            self._file = file_tracker.get_fh(self.path, read_only=read_only)
+            if op == fcntl.LOCK_EX and self._file.mode == 'r':
+                # Another lock opened the file when it was read-only
+                file_tracker.release_fh(self._file)
+                self._file = None
+                raise LockROFileError(self.path)
 
         elif op == fcntl.LOCK_EX and self._file.mode == 'r':
             # Attempt to upgrade to write lock w/a read-only file.
@@ -178,22 +341,102 @@ def _lock(self, op, timeout=None):
                         .format(lock_type[op], self._start, self._length,
                                 timeout))
 
-        poll_intervals = iter(Lock._poll_interval_generator())
         start_time = time.time()
-        num_attempts = 0
+        if self._poll_lock(op):
+            statistics.record(self.path, 0.0, contended=False)
+            return 0.0, 1
+
+        try:
+            if not timeout:
+                acquired = self._blocking_lock(op)
+            elif timeout >= min_alarm_timeout and _can_use_alarm():
+                acquired = self._blocking_lock(op, timeout)
+            else:
+                acquired = False
+            num_attempts = 2
+            if not acquired:
+                num_attempts = self._polling_lock(op, timeout, start_time)
+        except LockTimeoutError:
+            statistics.record(
+                self.path, time.time() - start_time, contended=True,
+                timed_out=True)
+            raise
+
+        total_wait_time = time.time() - start_time
+        statistics.record(self.path, total_wait_time, contended=True)
+        return total_wait_time, num_attempts
+
+    def _blocking_lock(self, op, timeout=None):
+        """Wait for the lock with a blocking ``fcntl`` call, interrupted
+        with ``SIGALRM`` after ``timeout`` seconds, if given.
+
+        Returns False if the lock must be polled instead, e.g. because the
+        kernel detected a potential deadlock.
+        """
+        old_handler = None
+        try:
+            try:
+                if timeout:
+                    def _handler(signum, frame):
+                        raise _AlarmTimeout()
+                    old_handler = signal.signal(signal.SIGALRM, _handler)
+                    signal.setitimer(signal.ITIMER_REAL, timeout)
+
+                fcntl.lockf(self._file, op, self._length, self._start,
+                            os.SEEK_SET)
+            finally:
+                # The timer goes off at most once, so if the alarm
+                # interrupts this, there is nothing left to disarm.
+                if timeout:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+
+        except _AlarmTimeout:
+            # The alarm may go off just after lockf() returned, in which
+            # case this process holds the lock and polling it succeeds.
+            if not self._poll_lock(op):
+                raise LockTimeoutError("Timed out waiting for a {0} lock."
+                                       .format(lock_type[op]))
+            return True
+
+        except (IOError, OSError) as e:
+            if e.errno == errno.EINTR and timeout:
+                if not self._poll_lock(op):
+                    raise LockTimeoutError(
+                        "Timed out waiting for a {0} lock."
+                        .format(lock_type[op]))
+                return True
+
+            # e.g. a potential deadlock, or a filesystem that does not
+            # support blocking locks
+            if e.errno in (errno.EDEADLK, errno.EINTR, errno.EAGAIN,
+                           errno.EACCES, errno.ENOLCK):
+                return False
+            raise
+
+        finally:
+            if old_handler is not None:
+                signal.signal(signal.SIGALRM, old_handler)
+            elif timeout:
+                signal.signal(signal.SIGALRM, signal.SIG_DFL)
+
+        self._log_lock_owner(op)
+        return True
+
+    def _polling_lock(self, op, timeout, start_time):
+        """Poll the lock until it is acquired or times out, and return the
+        number of attempts."""
+        poll_intervals = iter(Lock._poll_interval_generator())
+        num_attempts = 1
         while (not timeout) or (time.time() - start_time) < timeout:
+            time.sleep(next(poll_intervals))
             num_attempts += 1
             if self._poll_lock(op):
-                total_wait_time = time.time() - start_time
-                return total_wait_time, num_attempts
-
-            time.sleep(next(poll_intervals))
+                return num_attempts
 
         # TBD: Is an extra attempt after timeout needed/appropriate?
         num_attempts += 1
         if self._poll_lock(op):
-            total_wait_time = time.time() - start_time
-            return total_wait_time, num_attempts
+            return num_attempts
 
         raise LockTimeoutError("Timed out waiting for a {0} lock."
                                .format(lock_type[op]))
@@ -209,26 +452,27 @@ def _poll_lock(self, op):
             fcntl.lockf(self._file, op | fcntl.LOCK_NB,
                         self._length, self._start, os.SEEK_SET)
 
-            # help for debugging distributed locking
-            if self.debug:
-                # All locks read the owner PID and host
-                self._read_log_debug_data()
-                self._log_debug('{0} locked {1} [{2}:{3}] (owner={4})'
-                                .format(lock_type[op], self.path,
-                                        self._start, self._length, self.pid))
-
-                # Exclusive locks write their PID/host
-                if op == fcntl.LOCK_EX:
-                    self._write_log_debug_data()
-
-            return True
-
         except IOError as e:
             # EAGAIN and EACCES == locked by another process (so try again)
             if e.errno not in (errno.EAGAIN, errno.EACCES):
                 raise
+            return False
 
-        return False
+        self._log_lock_owner(op)
+        return True
+
+    def _log_lock_owner(self, op):
+        # help for debugging distributed locking
+        if self.debug:
+            # All locks read the owner PID and host
+            self._read_log_debug_data()
+            self._log_debug('{0} locked {1} [{2}:{3}] (owner={4})'
+                            .format(lock_type[op], self.path,
+                                    self._start, self._length, self.pid))
+
+            # Exclusive locks write their PID/host
+            if op == fcntl.LOCK_EX:
+                self._write_log_debug_data()
 
     def _ensure_parent_directory(self):
         parent = os.path.dirname(self.path)
@@ -251,6 +495,7 @@ def _read_log_debug_data(self):
         self.old_pid = self.pid
         self.old_host = self.host
 
+        self._file.seek(0)
         line = self._file.read()
         if line:
             pid, host = line.strip().split(',')
@@ -282,7 +527,7 @@ def _unlock(self):
         """
         fcntl.lockf(self._file, fcntl.LOCK_UN,
                     self._length, self._start, os.SEEK_SET)
-        self._file.close()
+        file_tracker.release_fh(self._file)
         self._file = None
         self._reads = 0
         self._writes = 0
@@ -8,12 +8,16 @@
 from __future__ import unicode_literals
 
 import atexit
+import codecs
 import errno
+import gzip
+import io
 import multiprocessing
 import os
 import re
 import select
 import sys
+import time
 import traceback
 import signal
 from contextlib import contextmanager
@@ -44,6 +48,13 @@
 xon, xoff = '\x11\n', '\x13\n'
 control = re.compile('(\x11\n|\x13\n)')
 
+#: Maximum number of bytes the writer daemon reads from its pipe at once
+_read_size = 64 * 1024
+
+# The writer daemon handles output as native strings (bytes on Python 2,
+# text on Python 3), so anything it combines with output must be native.
+_newline = str('\n')
+
 
 @contextmanager
 def ignore_signal(signum):
@@ -69,6 +80,27 @@ def _strip(line):
     return _escape.sub('', line)
 
 
+def open_log(path, mode='r'):
+    """Open a log written by ``log_output`` for reading or writing.
+
+    Logs whose names end in ``.gz`` are transparently compressed and
+    decompressed.  The returned file reads and writes native strings.
+    Close it explicitly (e.g. with ``contextlib.closing``), as gzip
+    files are not context managers on Python 2.6.
+
+    Args:
+        path (str): path to the log file
+        mode (str): either ``'r'`` or ``'w'``
+    """
+    compressed = path.endswith('.gz')
+    if sys.version_info[0] < 3:
+        return (gzip.open if compressed else open)(path, mode + 'b')
+    if compressed:
+        return gzip.open(
+            path, mode + 't', encoding='utf-8', errors='replace')
+    return io.open(path, mode, encoding='utf-8', errors='replace')
+
+
 class keyboard_input(object):
     """Context manager to disable line editing and echoing.
 
@@ -307,8 +339,13 @@ def __init__(self, file_like):
 
         self.file_like = file_like
 
+        # Compressed logs are only flushed when they are closed, since
+        # flushing a compressed stream after each write is expensive.
+        self.compressed = False
+
         if isinstance(file_like, string_types):
             self.open = True
+            self.compressed = file_like.endswith('.gz')
         elif _file_descriptors_work(file_like):
             self.open = False
         else:
@@ -321,7 +358,7 @@ def __init__(self, file_like):
     def unwrap(self):
         if self.open:
             if self.file_like:
-                self.file = open(self.file_like, 'w')
+                self.file = open_log(self.file_like, 'w')
             else:
                 self.file = StringIO()
             return self.file
@@ -434,16 +471,22 @@ class log_output(object):
     """
 
     def __init__(self, file_like=None, echo=False, debug=0, buffer=False,
-                 env=None):
+                 env=None, echo_rate=None):
         """Create a new output log context manager.
 
         Args:
             file_like (str or stream): open file object or name of file where
-                output should be logged
+                output should be logged; file names ending in ``.gz`` are
+                written compressed
             echo (bool): whether to echo output in addition to logging it
             debug (int): positive to enable tty debug mode during logging
             buffer (bool): pass buffer=True to skip unbuffering output; note
                 this doesn't set up any *new* buffering
+            env (dict): the environment to use for the logger daemon
+            echo_rate (int): maximum number of bytes per second to echo;
+                output beyond that is logged but not echoed (output in
+                ``force_echo`` regions is always echoed). ``None`` or 0
+                means no limit.
 
         log_output can take either a file object or a filename. If a
         filename is passed, the file will be opened and closed entirely
@@ -463,6 +506,7 @@ def __init__(self, file_like=None, echo=False, debug=0, buffer=False,
         self.debug = debug
         self.buffer = buffer
         self.env = env  # the environment to use for _writer_daemon
+        self.echo_rate = echo_rate
 
         self._active = False  # used to prevent re-entry
 
@@ -541,7 +585,7 @@ def __enter__(self):
                     target=_writer_daemon,
                     args=(
                         input_multiprocess_fd, read_multiprocess_fd, write_fd,
-                        self.echo, self.log_file, child_pipe
+                        self.echo, self.log_file, child_pipe, self.echo_rate
                     )
                 )
                 self.process.daemon = True  # must set before start()
@@ -665,7 +709,7 @@ def force_echo(self):
 
 
 def _writer_daemon(stdin_multiprocess_fd, read_multiprocess_fd, write_fd, echo,
-                   log_file_wrapper, control_pipe):
+                   log_file_wrapper, control_pipe, echo_rate=None):
     """Daemon used by ``log_output`` to write to a log file and to ``stdout``.
 
     The daemon receives output from the parent process and writes it both
@@ -690,9 +734,11 @@ def _writer_daemon(stdin_multiprocess_fd, read_multiprocess_fd, write_fd, echo,
                       +-------------------------+
 
     Within the ``log_output`` handler, the parent's output is redirected
-    to a pipe from which the daemon reads.  The daemon writes each line
-    from the pipe to a log file and (optionally) to ``stdout``.  The user
-    can hit ``v`` to toggle output on ``stdout``.
+    to a pipe from which the daemon reads.  The daemon reads the pipe in
+    large chunks and writes the complete lines in them to a log file and
+    (optionally) to ``stdout``.  The user can hit ``v`` to toggle output
+    on ``stdout``.  Echoed output can be limited to ``echo_rate`` bytes
+    per second, so that a slow terminal does not hold up the parent.
 
     In addition to the input and output file descriptors, the daemon
     interacts with the parent via ``control_pipe``.  It reports whether
@@ -710,6 +756,7 @@ def _writer_daemon(stdin_multiprocess_fd, read_multiprocess_fd, write_fd, echo,
         log_file_wrapper (FileWrapper): file to log all output
         control_pipe (Pipe): multiprocessing pipe on which to send control
             information to the parent
+        echo_rate (int): maximum number of bytes per second to echo, if any
 
     """
     # If this process was forked, then it will inherit file descriptors from
@@ -720,9 +767,14 @@ def _writer_daemon(stdin_multiprocess_fd, read_multiprocess_fd, write_fd, echo,
     if sys.version_info < (3, 8) or sys.platform != 'darwin':
         os.close(write_fd)
 
-    # Use line buffering (3rd param = 1) since Python 3 has a bug
-    # that prevents unbuffered text I/O.
-    in_pipe = os.fdopen(read_multiprocess_fd.fd, 'r', 1)
+    # Read the pipe unbuffered: we read whatever is available in large
+    # chunks, and decode them incrementally on Python 3 so that characters
+    # split across reads are not garbled.
+    in_pipe = os.fdopen(read_multiprocess_fd.fd, 'rb', 0)
+    if sys.version_info[0] < 3:
+        decode = str
+    else:
+        decode = codecs.getincrementaldecoder('utf-8')('replace').decode
 
     if stdin_multiprocess_fd:
         stdin = os.fdopen(stdin_multiprocess_fd.fd)
@@ -732,6 +784,8 @@ def _writer_daemon(stdin_multiprocess_fd, read_multiprocess_fd, write_fd, echo,
     # list of streams to select from
     istreams = [in_pipe, stdin] if stdin else [in_pipe]
     force_echo = False      # parent can force echo for certain output
+    pending = None          # incomplete last line of the output read so far
+    limiter = _EchoLimiter(echo_rate)
 
     log_file = log_file_wrapper.unwrap()
 
@@ -763,29 +817,36 @@ def _writer_daemon(stdin_multiprocess_fd, read_multiprocess_fd, write_fd, echo,
                             if e.errno != errno.EIO:
                                 raise
 
-                if in_pipe in rlist:
-                    # Handle output from the calling process.
-                    line = _retry(in_pipe.readline)()
-                    if not line:
-                        break
-
-                    # find control characters and strip them.
-                    controls = control.findall(line)
-                    line = control.sub('', line)
-
-                    # Echo to stdout if requested or forced.
-                    if echo or force_echo:
-                        sys.stdout.write(line)
-                        sys.stdout.flush()
+                if in_pipe not in rlist:
+                    # Nothing new for a while: don't hold back a prompt or
+                    # a progress bar that doesn't end in a newline.
+                    if pending:
+                        force_echo = _write_output(
+                            pending, log_file, echo, force_echo, limiter)
+                        pending = None
+                    continue
 
-                    # Stripped output to log file.
-                    log_file.write(_strip(line))
+                # Handle output from the calling process.
+                chunk = _retry(os.read)(in_pipe.fileno(), _read_size)
+                if not chunk:
+                    break
+
+                text = decode(chunk)
+                if pending:
+                    text = pending + text
+                end = text.rfind(_newline) + 1
+                text, pending = text[:end], text[end:]
+                if text:
+                    force_echo = _write_output(
+                        text, log_file, echo, force_echo, limiter)
+                if not log_file_wrapper.compressed:
                     log_file.flush()
 
-                    if xon in controls:
-                        force_echo = True
-                    if xoff in controls:
-                        force_echo = False
+            if pending:
+                _write_output(pending, log_file, echo, force_echo, limiter)
+            if echo:
+                sys.stdout.write(limiter.notice())
+                sys.stdout.flush()
 
     except BaseException:
         tty.error("Exception occurred in writer daemon!")
@@ -804,6 +865,86 @@ def _writer_daemon(stdin_multiprocess_fd, read_multiprocess_fd, write_fd, echo,
         control_pipe.send(echo)
 
 
+def _write_output(text, log_file, echo, force_echo, limiter):
+    """Write output read by the writer daemon to the log and to ``stdout``.
+
+    Returns whether echo is forced after ``text``, which may switch it on
+    or off with ``xon`` and ``xoff``.
+    """
+    if control.search(text):
+        # Echo is switched on or off in the middle of this output: handle
+        # it line by line.
+        lines = text.split(_newline)
+        for i, line in enumerate(lines):
+            if i < len(lines) - 1:
+                line += _newline
+            controls = control.findall(line)
+            line = control.sub('', line)
+            if line:
+                _write_output(line, log_file, echo, force_echo, limiter)
+            if xon in controls:
+                force_echo = True
+            if xoff in controls:
+                force_echo = False
+        return force_echo
+
+    # Echo to stdout if requested or forced.
+    if force_echo:
+        sys.stdout.write(text)
+        sys.stdout.flush()
+    elif echo:
+        sys.stdout.write(limiter.limit(text))
+        sys.stdout.flush()
+
+    # Stripped output to log file.
+    log_file.write(_strip(text))
+    return force_echo
+
+
+class _EchoLimiter(object):
+    """Token bucket limiting the rate at which the writer daemon echoes.
+
+    Output that would exceed the rate is not echoed. A marker is echoed
+    as soon as output starts being dropped, and a note saying how many
+    lines were skipped is echoed with the next output that fits.
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.last = time.time()
+        self.skipped = 0
+
+    def limit(self, text):
+        """Return the part of ``text`` that should be echoed."""
+        if not self.rate:
+            return text
+
+        now = time.time()
+        self.tokens = min(
+            self.rate, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+        if self.tokens <= 0:
+            marker = str('') if self.skipped else str(
+                '[too much output to echo, skipping lines]\n')
+            self.skipped += max(text.count(_newline), 1)
+            return marker
+
+        # Output larger than the bucket is let through, and paid for later
+        self.tokens -= len(text)
+        return self.notice() + text
+
+    def notice(self):
+        """Return a note about skipped output not reported yet, if any."""
+        if not self.skipped:
+            return str('')
+        notice = str('[{0} lines not shown, see the log for all output]\n')
+        notice = notice.format(self.skipped)
+        self.skipped = 0
+        return notice
+
+
 def _retry(function):
     """Retry a call if errors indicating an interrupted system call occur.
 
@@ -828,7 +969,7 @@ def wrapped(*args, **kwargs):
         while True:
             try:
                 return function(*args, **kwargs)
-            except IOError as e:
+            except (IOError, OSError) as e:
                 if e.errno == errno.EINTR:
                     continue
                 raise
@@ -65,6 +65,7 @@
 
 import llnl.util.tty as tty
 from llnl.util.lang import memoized, list_modules, key_ordering
+from llnl.util.lang import reduce_ex_with_slots
 
 import spack.compiler
 import spack.paths
@@ -99,6 +100,10 @@ def _impl(self, other):
 
 
 class Target(object):
+    __slots__ = ('microarchitecture', 'module_name')
+
+    __reduce_ex__ = reduce_ex_with_slots
+
     def __init__(self, name, module_name=None):
         """Target models microarchitectures and their compatibility.
 
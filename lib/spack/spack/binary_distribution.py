@@ -12,6 +12,9 @@
 import tempfile
 import hashlib
 import glob
+import multiprocessing.pool
+import threading
+import time
 from ordereddict_backport import OrderedDict
 
 from contextlib import closing
@@ -46,6 +49,10 @@
 
 _build_cache_relative_path = 'build_cache'
 _build_cache_keys_relative_path = '_pgp'
+_build_cache_deltas_relative_path = '_deltas'
+#: File in the deltas directory whose presence means that the index of the
+#: build cache is updated incrementally, so pushes record delta manifests
+_build_cache_incremental_marker = 'incremental'
 
 
 class BinaryCacheIndex(object):
@@ -94,6 +101,21 @@ def __init__(self, cache_root=None):
         #           use the updated source if available)
         self._mirrors_for_spec = {}
 
+        # map of mirror URL to the cached index already ingested into the
+        # lookup table (_built_spec_lookup) for that mirror
+        self._lookups_already_loaded = {}
+
+        # _built_spec_lookup is a compact version of _mirrors_for_spec,
+        # mapping DAG hashes to lists of (mirror_url, full_hash, index_path)
+        # tuples. It is built from lookup tables stored next to the cached
+        # indices, so that finding a spec doesn't require reading every
+        # index into Spec objects.
+        self._built_spec_lookup = {}
+
+        # parsed 'installs' section of cached indices, keyed by index path,
+        # used to materialize only the specs that are actually requested
+        self._index_installs = {}
+
     def _init_local_index_cache(self):
         if not self._index_file_cache:
             self._index_file_cache = file_cache.FileCache(
@@ -119,6 +141,9 @@ def clear(self):
         self._local_index_cache = None
         self._specs_already_associated = set()
         self._mirrors_for_spec = {}
+        self._lookups_already_loaded = {}
+        self._built_spec_lookup = {}
+        self._index_installs = {}
 
     def _write_local_index_cache(self):
         self._init_local_index_cache()
@@ -146,6 +171,139 @@ def regenerate_spec_cache(self, clear_existing=False):
                                                         mirror_url)
                 self._specs_already_associated.add(cached_index_hash)
 
+    def regenerate_lookup_cache(self, clear_existing=False):
+        """ Populate the lookup table of concrete specs
+        (``_built_spec_lookup``) from the lookup tables stored along with the
+        locally cached buildcache index files.  Lookup tables missing on disk
+        are computed once per index hash and saved.  Entries of mirrors
+        whose cached index changed or was removed are dropped.  This is
+        essentially a no-op if it has already been done. """
+        self._init_local_index_cache()
+
+        if clear_existing:
+            self._lookups_already_loaded = {}
+            self._built_spec_lookup = {}
+            self._index_installs = {}
+
+        for mirror_url, loaded_index_path in list(
+                self._lookups_already_loaded.items()):
+            cache_entry = self._local_index_cache.get(mirror_url)
+            if not cache_entry or \
+                    cache_entry['index_path'] != loaded_index_path:
+                self._drop_lookup_entries(mirror_url)
+
+        for mirror_url in self._local_index_cache:
+            cache_entry = self._local_index_cache[mirror_url]
+            cached_index_path = cache_entry['index_path']
+            if mirror_url not in self._lookups_already_loaded:
+                lookup = self._read_lookup_table(cached_index_path)
+                for dag_hash, full_hash in lookup.items():
+                    entries = self._built_spec_lookup.setdefault(dag_hash, [])
+                    entries.append((mirror_url, full_hash, cached_index_path))
+                self._lookups_already_loaded[mirror_url] = cached_index_path
+
+    def _drop_lookup_entries(self, mirror_url):
+        """Remove the entries of a mirror from the lookup table."""
+        index_path = self._lookups_already_loaded.pop(mirror_url)
+        self._index_installs.pop(index_path, None)
+
+        for dag_hash in list(self._built_spec_lookup):
+            entries = [entry for entry in self._built_spec_lookup[dag_hash]
+                       if entry[0] != mirror_url]
+            if entries:
+                self._built_spec_lookup[dag_hash] = entries
+            else:
+                del self._built_spec_lookup[dag_hash]
+
+    def _read_index_installs(self, cache_key):
+        """Return the ``installs`` section of a cached index, parsed as
+        plain JSON (no Spec objects are constructed).  The section is empty
+        if the index was removed from the cache in the meantime."""
+        if cache_key not in self._index_installs:
+            self._index_file_cache.init_entry(cache_key)
+            try:
+                with self._index_file_cache.read_transaction(
+                        cache_key) as cache_file:
+                    index = json.load(cache_file)
+            except (IOError, OSError) as e:
+                tty.debug('Cached index {0} is not available'.format(
+                    cache_key), e)
+                return {}
+            installs = {}
+            if index and 'database' in index:
+                installs = index['database'].get('installs', {})
+            self._index_installs[cache_key] = installs
+        return self._index_installs[cache_key]
+
+    def _read_lookup_table(self, cache_key):
+        """Return the lookup table, mapping DAG hashes to full hashes, for
+        the cached index stored under ``cache_key``.  The table is computed
+        and written next to the index if it doesn't exist yet."""
+        lookup_key = _lookup_table_key(cache_key)
+        self._index_file_cache.init_entry(lookup_key)
+        if os.path.isfile(self._index_file_cache.cache_path(lookup_key)):
+            with self._index_file_cache.read_transaction(
+                    lookup_key) as lookup_file:
+                return json.load(lookup_file)
+
+        # Don't write a lookup table for an index that was removed
+        if not self._index_file_cache.init_entry(cache_key):
+            return {}
+
+        lookup = {}
+        for dag_hash, record in self._read_index_installs(cache_key).items():
+            for node in record['spec'].values():
+                lookup[dag_hash] = node.get('full_hash', None)
+
+        with self._index_file_cache.write_transaction(
+                lookup_key) as (old, new):
+            json.dump(lookup, new)
+        return lookup
+
+    def _remove_cached_index(self, cache_key):
+        """Remove a cached index and its lookup table."""
+        for key in (cache_key, _lookup_table_key(cache_key)):
+            if self._index_file_cache.init_entry(key):
+                self._index_file_cache.remove(key)
+        self._index_installs.pop(cache_key, None)
+
+    def _read_spec_from_index(self, dag_hash, installs, specs):
+        """Recursively construct the spec with the given DAG hash, and its
+        dependencies, from the ``installs`` of a cached index."""
+        if dag_hash in specs:
+            return specs[dag_hash]
+
+        node_dict = dict(
+            (name, dict(node, hash=dag_hash))
+            for name, node in installs[dag_hash]['spec'].items()
+        )
+        spec = Spec.from_node_dict(node_dict)
+        specs[dag_hash] = spec
+
+        yaml_deps = node_dict[spec.name].get('dependencies', {})
+        for _, dhash, dtypes in Spec.read_yaml_dep_specs(yaml_deps):
+            if dhash in installs:
+                child = self._read_spec_from_index(dhash, installs, specs)
+                spec._add_dependency(child, dtypes)
+
+        return spec
+
+    def _materialize_built_spec(self, dag_hash, skip_mirrors=()):
+        """Construct the entries of ``_mirrors_for_spec`` for a single DAG
+        hash, using the lookup table to read only the relevant indices.
+        Mirrors in ``skip_mirrors`` are left out."""
+        found_list = []
+        for mirror_url, _, index_path in self._built_spec_lookup[dag_hash]:
+            if mirror_url in skip_mirrors:
+                continue
+            installs = self._read_index_installs(index_path)
+            if dag_hash not in installs:
+                continue
+            spec = self._read_spec_from_index(dag_hash, installs, {})
+            spec._mark_concrete()
+            found_list.append({'mirror_url': mirror_url, 'spec': spec})
+        return found_list
+
     def _associate_built_specs_with_mirror(self, cache_key, mirror_url):
         tmpdir = tempfile.mkdtemp()
 
@@ -186,6 +344,8 @@ def _associate_built_specs_with_mirror(self, cache_key, mirror_url):
             shutil.rmtree(tmpdir)
 
     def get_all_built_specs(self):
+        self.regenerate_spec_cache()
+
         spec_list = []
         for dag_hash in self._mirrors_for_spec:
             # in the absence of further information, all concrete specs
@@ -225,13 +385,24 @@ def find_built_spec(self, spec):
                         }
                     ]
         """
-        self.regenerate_spec_cache()
+        self.regenerate_lookup_cache()
 
         find_hash = spec.dag_hash()
-        if find_hash not in self._mirrors_for_spec:
+        found_list = self._mirrors_for_spec.get(find_hash, [])
+
+        if find_hash in self._built_spec_lookup:
+            # Only materialize the spec that was asked for, and remember it.
+            # Mirrors loaded since it was remembered, or missing from an
+            # entry added by update_spec(), are merged in.
+            known_mirrors = set(e['mirror_url'] for e in found_list)
+            found_list = found_list + self._materialize_built_spec(
+                find_hash, known_mirrors)
+
+        if not found_list:
             return None
 
-        return self._mirrors_for_spec[find_hash]
+        self._mirrors_for_spec[find_hash] = found_list
+        return found_list
 
     def update_spec(self, spec, found_list):
         """
@@ -250,36 +421,53 @@ def update_spec(self, spec, found_list):
                         cur_entry['spec'] = new_entry['spec']
                         break
                 else:
-                    current_list.append = {
+                    current_list.append({
                         'mirror_url': new_entry['mirror_url'],
                         'spec': new_entry['spec'],
-                    }
+                    })
 
-    def update(self):
+    def update(self, ttl=None, concurrency=8, remove_stale=True):
         """ Make sure local cache of buildcache index files is up to date.
         If the same mirrors are configured as the last time this was called
         and none of the remote buildcache indices have changed, calling this
-        method will only result in fetching the index hash from each mirror
-        to confirm it is the same as what is stored locally.  Otherwise, the
-        buildcache ``index.json`` and ``index.json.hash`` files are retrieved
-        from each configured mirror and stored locally (both in memory and
-        on disk under ``_index_cache_root``). """
+        method will only result in checking with each mirror that the index
+        is the same as what is stored locally.  Otherwise, the buildcache
+        ``index.json`` and ``index.json.hash`` files are retrieved from each
+        configured mirror and stored locally (both in memory and on disk
+        under ``_index_cache_root``).  Mirrors are checked concurrently.
+
+        Args:
+            ttl (int): indices that were checked less than ``ttl`` seconds
+                ago are considered up to date, and are not checked again.
+                Defaults to the value of ``config:binary_index_ttl``.
+            concurrency (int): maximum number of mirrors to check at once
+            remove_stale (bool): remove the cached indices of mirrors that
+                are no longer configured, and indices replaced by newer
+                ones.  Pass False if another instance may still read them;
+                they are then removed by the next update that removes
+                stale indices.
+        """
         self._init_local_index_cache()
 
+        if ttl is None:
+            ttl = spack.config.get('config:binary_index_ttl', 0)
+        now = time.time()
+
         mirrors = spack.mirror.MirrorCollection()
         configured_mirror_urls = [m.fetch_url for m in mirrors.values()]
         items_to_remove = []
+        indices_to_fetch = []
         spec_cache_clear_needed = False
-        spec_cache_regenerate_needed = not self._mirrors_for_spec
+        spec_cache_regenerate_needed = not self._built_spec_lookup
 
         # First compare the mirror urls currently present in the cache to the
         # configured mirrors.  If we have a cached index for a mirror which is
         # no longer configured, we should remove it from the cache.  For any
         # cached indices corresponding to currently configured mirrors, we need
-        # to check if the cache is still good, or needs to be updated.
-        # Finally, if there are configured mirrors for which we don't have a
-        # cache entry, we need to fetch and cache the indices from those
-        # mirrors.
+        # to check if the cache is still good, or needs to be updated (unless
+        # it was checked recently enough).  Finally, if there are configured
+        # mirrors for which we don't have a cache entry, we need to fetch and
+        # cache the indices from those mirrors.
 
         # If, during this process, we find that any mirrors for which we
         # already have entries have either been removed, or their index
@@ -300,18 +488,18 @@ def update(self):
             cached_index_hash = cache_entry['index_hash']
             cached_index_path = cache_entry['index_path']
             if cached_mirror_url in configured_mirror_urls:
+                if now - cache_entry.get('last_checked', 0) < ttl:
+                    tty.debug('Cached index for {0} checked less than {1}s '
+                              'ago'.format(cached_mirror_url, ttl))
+                    continue
                 # May need to fetch the index and update the local caches
-                needs_regen = self._fetch_and_cache_index(
-                    cached_mirror_url, expect_hash=cached_index_hash)
-                # The need to regenerate implies a need to clear as well.
-                spec_cache_clear_needed |= needs_regen
-                spec_cache_regenerate_needed |= needs_regen
-            else:
+                indices_to_fetch.append((cached_mirror_url, cached_index_hash))
+            elif remove_stale:
                 # No longer have this mirror, cached index should be removed
                 items_to_remove.append({
                     'url': cached_mirror_url,
-                    'cache_key': os.path.join(self._index_cache_root,
-                                              cached_index_path)
+                    'cache_keys': [cached_index_path] + cache_entry.get(
+                        'stale_index_paths', [])
                 })
                 spec_cache_clear_needed = True
                 spec_cache_regenerate_needed = True
@@ -319,8 +507,8 @@ def update(self):
         # Clean up items to be removed, identified above
         for item in items_to_remove:
             url = item['url']
-            cache_key = item['cache_key']
-            self._index_file_cache.remove(cache_key)
+            for cache_key in item['cache_keys']:
+                self._remove_cached_index(cache_key)
             del self._local_index_cache[url]
 
         # Iterate the configured mirrors now.  Any mirror urls we do not
@@ -328,23 +516,66 @@ def update(self):
         # locally.
         for mirror_url in configured_mirror_urls:
             if mirror_url not in self._local_index_cache:
-                # Need to fetch the index and update the local caches
-                needs_regen = self._fetch_and_cache_index(mirror_url)
-                # Generally speaking, a new mirror wouldn't imply the need to
-                # clear the spec cache, so leave it as is.
-                if needs_regen:
-                    spec_cache_regenerate_needed = True
+                indices_to_fetch.append((mirror_url, None))
+
+        results = []
+        if indices_to_fetch:
+            processes = min(len(indices_to_fetch), concurrency)
+            tp = multiprocessing.pool.ThreadPool(processes=processes)
+            try:
+                results = tp.map(
+                    llnl.util.lang.star(self._fetch_and_cache_index),
+                    indices_to_fetch)
+            finally:
+                tp.terminate()
+                tp.join()
+
+        for (_, expect_hash), needs_regen in zip(indices_to_fetch, results):
+            # For mirrors we already knew about, the need to regenerate
+            # implies a need to clear as well.  Generally speaking, a new
+            # mirror wouldn't imply the need to clear the spec cache.
+            if expect_hash:
+                spec_cache_clear_needed |= needs_regen
+            spec_cache_regenerate_needed |= needs_regen
+
+        if remove_stale:
+            self._remove_stale_indices()
 
         self._write_local_index_cache()
 
+        # Concrete specs are materialized lazily from the lookup tables, so
+        # here we only need to forget about stale ones.
+        if spec_cache_clear_needed:
+            self._specs_already_associated = set()
+            self._mirrors_for_spec = {}
+
         if spec_cache_regenerate_needed:
-            self.regenerate_spec_cache(clear_existing=spec_cache_clear_needed)
+            self.regenerate_lookup_cache(clear_existing=spec_cache_clear_needed)
+
+    def _remove_stale_indices(self):
+        """Remove the cached indices that were replaced by newer ones."""
+        in_use = set(cache_entry['index_path']
+                     for cache_entry in self._local_index_cache.values())
+        for cache_entry in self._local_index_cache.values():
+            for cache_key in cache_entry.pop('stale_index_paths', []):
+                if cache_key not in in_use:
+                    self._remove_cached_index(cache_key)
+
+    def _mark_index_checked(self, mirror_url):
+        """Record that the cached index of a mirror was just found to be up
+        to date."""
+        if mirror_url in self._local_index_cache:
+            self._local_index_cache[mirror_url]['last_checked'] = time.time()
 
     def _fetch_and_cache_index(self, mirror_url, expect_hash=None):
         """ Fetch a buildcache index file from a remote mirror and cache it.
 
         If we already have a cached index from this mirror, then we first
-        check if the hash has changed, and we avoid fetching it if not.
+        check if it has changed, and we avoid fetching it if not.  If the
+        mirror sent an ``ETag`` or ``Last-Modified`` header along with the
+        cached index, this check is a single conditional request for the
+        index.  Otherwise the index hash is fetched and compared to the
+        expected one.
 
         Args:
             mirror_url (str): Base url of mirror
@@ -362,41 +593,46 @@ def _fetch_and_cache_index(self, mirror_url, expect_hash=None):
         hash_fetch_url = url_util.join(
             mirror_url, _build_cache_relative_path, 'index.json.hash')
 
-        old_cache_key = None
+        existing_entry = self._local_index_cache.get(mirror_url, {})
+        old_cache_key = existing_entry.get('index_path')
         fetched_hash = None
 
-        # Fetch the hash first so we can check if we actually need to fetch
-        # the index itself.
-        try:
-            _, _, fs = web_util.read_from_url(hash_fetch_url)
-            fetched_hash = codecs.getreader('utf-8')(fs).read()
-        except (URLError, web_util.SpackWebError) as url_err:
-            tty.debug('Unable to read index hash {0}'.format(
-                hash_fetch_url), url_err, 1)
+        etag, last_modified = None, None
+        if expect_hash:
+            etag = existing_entry.get('etag')
+            last_modified = existing_entry.get('last_modified')
+
+        # Without a validator for a conditional request, fetch the hash first
+        # so we can check if we actually need to fetch the index itself.
+        if not (etag or last_modified):
+            try:
+                _, _, fs = web_util.read_from_url(hash_fetch_url)
+                fetched_hash = codecs.getreader('utf-8')(fs).read()
+            except (URLError, web_util.SpackWebError) as url_err:
+                tty.debug('Unable to read index hash {0}'.format(
+                    hash_fetch_url), url_err, 1)
 
         # The only case where we'll skip attempting to fetch the buildcache
         # index from the mirror is when we already have a hash for this
         # mirror, we were able to retrieve one from the mirror, and
         # the two hashes are the same.
-        if expect_hash and fetched_hash:
-            if fetched_hash == expect_hash:
-                tty.debug('Cached index for {0} already up to date'.format(
-                    mirror_url))
-                return False
-            else:
-                # We expected a hash, we fetched a hash, and they were not the
-                # same.  If we end up fetching an index successfully and
-                # replacing our entry for this mirror, we should clean up the
-                # existing cache file
-                if mirror_url in self._local_index_cache:
-                    existing_entry = self._local_index_cache[mirror_url]
-                    old_cache_key = existing_entry['index_path']
+        if expect_hash and fetched_hash == expect_hash:
+            tty.debug('Cached index for {0} already up to date'.format(
+                mirror_url))
+            self._mark_index_checked(mirror_url)
+            return False
 
         tty.debug('Fetching index from {0}'.format(index_fetch_url))
 
         # Fetch index itself
         try:
-            _, _, fs = web_util.read_from_url(index_fetch_url)
+            _, headers, fs = web_util.read_from_url(
+                index_fetch_url, etag=etag, last_modified=last_modified)
+            if fs is None:
+                tty.debug('Cached index for {0} not modified'.format(
+                    mirror_url))
+                self._mark_index_checked(mirror_url)
+                return False
             index_object_str = codecs.getreader('utf-8')(fs).read()
         except (URLError, web_util.SpackWebError) as url_err:
             tty.debug('Unable to read index {0}'.format(index_fetch_url),
@@ -426,18 +662,47 @@ def _fetch_and_cache_index(self, mirror_url, expect_hash=None):
         with self._index_file_cache.write_transaction(cache_key) as (old, new):
             new.write(index_object_str)
 
-        self._local_index_cache[mirror_url] = {
+        cache_entry = {
             'index_hash': locally_computed_hash,
             'index_path': cache_key,
+            'last_checked': time.time(),
         }
 
-        # clean up the old cache_key if necessary
-        if old_cache_key:
-            self._index_file_cache.remove(old_cache_key)
+        # The old index may still be read by another instance, so it is only
+        # marked for removal by a later update
+        stale_index_paths = existing_entry.get('stale_index_paths', [])
+        if old_cache_key and old_cache_key != cache_key:
+            stale_index_paths = stale_index_paths + [old_cache_key]
+        stale_index_paths = [k for k in stale_index_paths if k != cache_key]
+        if stale_index_paths:
+            cache_entry['stale_index_paths'] = stale_index_paths
+
+        # Validators for conditional requests only make sense over HTTP
+        if url_util.parse(index_fetch_url).scheme in ('http', 'https'):
+            cache_entry['etag'] = _get_header_or_none(headers, 'ETag')
+            cache_entry['last_modified'] = _get_header_or_none(
+                headers, 'Last-Modified')
+        self._local_index_cache[mirror_url] = cache_entry
+
+        # Compute the lookup table once per index hash
+        self._read_lookup_table(cache_key)
 
         # We fetched an index and updated the local index cache, we should
         # regenerate the spec cache as a result.
-        return True
+        return expect_hash != locally_computed_hash
+
+
+def _get_header_or_none(headers, header_name):
+    try:
+        return web_util.get_header(headers, header_name)
+    except (KeyError, AttributeError):
+        return None
+
+
+def _lookup_table_key(index_cache_key):
+    """Return the file cache key of the lookup table associated with the
+    cached index stored under ``index_cache_key``."""
+    return '{0}_lookup.json'.format(os.path.splitext(index_cache_key)[0])
 
 
 def _binary_index():
@@ -453,6 +718,34 @@ def _binary_index():
 binary_index = llnl.util.lang.Singleton(_binary_index)
 
 
+def update_index_in_background():
+    """Refresh the local copies of the remote build cache indices in a
+    daemon thread.
+
+    The refresh works on its own ``BinaryCacheIndex`` instance, so lookups
+    in this process keep using the indices that are already cached locally
+    without waiting for the network.  Refreshed indices are picked up by
+    later invocations of Spack.  Indices replaced by the refresh are not
+    removed, since lookups in this process may still read them; the next
+    foreground ``update()`` removes them.
+
+    Returns:
+        The thread performing the refresh
+    """
+    index = BinaryCacheIndex(binary_index._cache_root)
+
+    def _update():
+        try:
+            index.update(remove_stale=False)
+        except Exception as e:
+            tty.debug('Background refresh of build cache indices failed', e)
+
+    thread = threading.Thread(target=_update)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
 class NoOverwriteException(spack.error.SpackError):
     """
     Raised when a file exists and must be overwritten.
@@ -686,54 +979,162 @@ def sign_tarball(key, force, specfile_path):
     spack.util.gpg.sign(key, specfile_path, '%s.asc' % specfile_path)
 
 
-def generate_package_index(cache_prefix):
+def _map_concurrently(func, args, concurrency=32):
+    """Apply ``func`` to each item in ``args`` using a pool of threads, and
+    return the list of results."""
+    if not args:
+        return []
+
+    tp = multiprocessing.pool.ThreadPool(
+        processes=min(concurrency, len(args)))
+    try:
+        return tp.map(func, args)
+    finally:
+        tp.terminate()
+        tp.join()
+
+
+def _read_spec_yaml_from_url(yaml_url):
+    """Read the spec.yaml file at the URL passed as argument, and return the
+    corresponding spec, or None if it can't be read."""
+    try:
+        tty.debug('fetching {0}'.format(yaml_url))
+        _, _, yaml_file = web_util.read_from_url(yaml_url)
+        yaml_contents = codecs.getreader('utf-8')(yaml_file).read()
+        return Spec.from_yaml(yaml_contents)
+    except (URLError, web_util.SpackWebError) as url_err:
+        tty.error('Error reading spec.yaml: {0}'.format(yaml_url))
+        tty.error(url_err)
+    return None
+
+
+def _read_previous_index(cache_prefix, db, tmpdir):
+    """Read the index currently in the build cache into ``db``.
+
+    Returns:
+        The set of names of the spec.yaml files covered by the index, or
+        None if there is no index that can be updated incrementally.
+    """
+    index_url = url_util.join(cache_prefix, 'index.json')
+    try:
+        _, _, index_file = web_util.read_from_url(index_url)
+        index_string = codecs.getreader('utf-8')(index_file).read()
+    except (URLError, web_util.SpackWebError) as url_err:
+        tty.debug('Unable to read index {0}'.format(index_url), url_err, 1)
+        return None
+
+    # Indices written by other versions of Spack are rebuilt from scratch
+    try:
+        version = sjson.load(index_string)['database']['version']
+    except Exception as e:
+        tty.debug('Unable to parse index {0}'.format(index_url), e, 1)
+        return None
+    if version != str(spack_db._db_version):
+        return None
+
+    index_path = os.path.join(tmpdir, 'previous_index.json')
+    with open(index_path, 'w') as f:
+        f.write(index_string)
+    db._read_from_file(index_path)
+
+    return set(tarball_name(record.spec, '.spec.yaml')
+               for record in db._data.values())
+
+
+def generate_package_index(cache_prefix, incremental=False, concurrency=32):
     """Create the build cache index page.
 
     Creates (or replaces) the "index.json" page at the location given in
     cache_prefix.  This page contains a link for each binary package (.yaml)
     under cache_prefix.
+
+    By default the index is rebuilt from scratch, downloading all the
+    spec.yaml files concurrently.  If ``incremental`` is True, the specs
+    that are not in the current index yet are merged into it instead.  New
+    specs are taken from the delta manifests written when pushing specs
+    to the build cache or, if there are none, from the difference between
+    the listing of the build cache and the current index.  Specs removed
+    from the build cache are only dropped from the index by a full rebuild.
+
+    Pushes only write delta manifests to build caches whose index has been
+    updated incrementally at least once, and every index update removes
+    the manifests it has read, so they don't accumulate in build caches
+    whose index is always rebuilt.
+
+    Args:
+        cache_prefix (str): URL of the build cache
+        incremental (bool): merge new specs into the existing index
+        concurrency (int): maximum number of spec.yaml files downloaded at
+            the same time
     """
     tmpdir = tempfile.mkdtemp()
     db_root_dir = os.path.join(tmpdir, 'db_root')
     db = spack_db.Database(None, db_dir=db_root_dir,
                            enable_transaction_locking=False,
                            record_fields=['spec', 'ref_count'])
+    deltas_url = url_util.join(cache_prefix, _build_cache_deltas_relative_path)
 
     try:
-        file_list = (
-            entry
-            for entry in web_util.list_url(cache_prefix)
-            if entry.endswith('.yaml'))
-    except KeyError as inst:
-        msg = 'No packages at {0}: {1}'.format(cache_prefix, inst)
-        tty.warn(msg)
-        return
-    except Exception as err:
-        # If we got some kind of S3 (access denied or other connection
-        # error), the first non boto-specific class in the exception
-        # hierarchy is Exception.  Just print a warning and return
-        msg = 'Encountered problem listing packages at {0}: {1}'.format(
-            cache_prefix, err)
-        tty.warn(msg)
-        return
-
-    tty.debug('Retrieving spec.yaml files from {0} to build index'.format(
-        cache_prefix))
-    for file_path in file_list:
+        # List the delta manifests first: only those we know about before
+        # reading the build cache are covered by the new index, and removed
         try:
-            yaml_url = url_util.join(cache_prefix, file_path)
-            tty.debug('fetching {0}'.format(yaml_url))
-            _, _, yaml_file = web_util.read_from_url(yaml_url)
-            yaml_contents = codecs.getreader('utf-8')(yaml_file).read()
-            # yaml_obj = syaml.load(yaml_contents)
-            # s = Spec.from_yaml(yaml_obj)
-            s = Spec.from_yaml(yaml_contents)
+            deltas = [d for d in web_util.list_url(deltas_url)
+                      if d.endswith('.spec.yaml')]
+        except Exception as err:
+            tty.debug('No delta manifests at {0}'.format(deltas_url), err)
+            deltas = []
+
+        known_files = None
+        if incremental:
+            known_files = _read_previous_index(cache_prefix, db, tmpdir)
+            if known_files is None:
+                tty.debug('No index to update at {0}, rebuilding it'.format(
+                    cache_prefix))
+
+        listed = False
+        if known_files is not None and deltas:
+            # Specs pushed again are already in the index, but their full
+            # hash may have changed: read all of them
+            file_list = deltas
+        else:
+            listed = True
+            try:
+                file_list = [
+                    entry
+                    for entry in web_util.list_url(cache_prefix)
+                    if entry.endswith('.yaml')]
+            except KeyError as inst:
+                msg = 'No packages at {0}: {1}'.format(cache_prefix, inst)
+                tty.warn(msg)
+                return
+            except Exception as err:
+                # If we got some kind of S3 (access denied or other connection
+                # error), the first non boto-specific class in the exception
+                # hierarchy is Exception.  Just print a warning and return
+                msg = 'Encountered problem listing packages at {0}: {1}'.format(
+                    cache_prefix, err)
+                tty.warn(msg)
+                return
+
+        # Delta manifests of specs that are not in the build cache any more
+        # have nothing left to index
+        done = set(deltas) - set(file_list) if listed else set()
+        if listed and known_files is not None:
+            file_list = [f for f in file_list if f not in known_files]
+
+        tty.debug('Retrieving {0} spec.yaml files from {1} to build '
+                  'index'.format(len(file_list), cache_prefix))
+        yaml_urls = [url_util.join(cache_prefix, f) for f in file_list]
+        specs = _map_concurrently(
+            _read_spec_yaml_from_url, yaml_urls, concurrency)
+        for file_name, s in zip(file_list, specs):
+            if s is None:
+                continue
+            done.add(file_name)
             db.add(s, None)
-        except (URLError, web_util.SpackWebError) as url_err:
-            tty.error('Error reading spec.yaml: {0}'.format(file_path))
-            tty.error(url_err)
+            # A spec pushed again may have a different full hash
+            db._data[s.dag_hash()].spec._full_hash = s._full_hash
 
-    try:
         index_json_path = os.path.join(db_root_dir, 'index.json')
         with open(index_json_path, 'w') as f:
             db._write_to_file(f)
@@ -761,6 +1162,22 @@ def generate_package_index(cache_prefix):
             url_util.join(cache_prefix, 'index.json.hash'),
             keep_original=False,
             extra_args={'ContentType': 'text/plain'})
+
+        # The specs in these delta manifests are in the index now
+        for delta in deltas:
+            if delta in done:
+                web_util.remove_url(url_util.join(deltas_url, delta))
+
+        # From now on, pushes record delta manifests for the next update
+        if incremental:
+            marker_url = url_util.join(
+                deltas_url, _build_cache_incremental_marker)
+            if not web_util.url_exists(marker_url):
+                marker_path = os.path.join(tmpdir, 'incremental')
+                with open(marker_path, 'w') as f:
+                    f.write('')
+                web_util.push_to_url(
+                    marker_path, marker_url, keep_original=False)
     finally:
         shutil.rmtree(tmpdir)
 
@@ -960,6 +1377,19 @@ def build_tarball(spec, outdir, force=False, rel=False, unsigned=False,
     web_util.push_to_url(
         specfile_path, remote_specfile_path, keep_original=False)
 
+    # record the push in a delta manifest, if the index of the build cache
+    # is updated incrementally
+    deltas_url = url_util.join(outdir, os.path.relpath(cache_prefix, tmpdir),
+                               _build_cache_deltas_relative_path)
+    if web_util.url_exists(
+            url_util.join(deltas_url, _build_cache_incremental_marker)):
+        delta_path = os.path.join(tmpdir, specfile_name)
+        with open(delta_path, 'w') as f:
+            f.write(specfile_name)
+        web_util.push_to_url(
+            delta_path, url_util.join(deltas_url, specfile_name),
+            keep_original=False)
+
     tty.debug('Buildcache for "{0}" written to \n {1}'
               .format(spec, remote_spackfile_path))
 
@@ -4,15 +4,19 @@
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
 """Caches used by Spack to store data"""
+import json
 import os
+import threading
 
 import llnl.util.lang
+import llnl.util.tty as tty
 from llnl.util.filesystem import mkdirp
 
 import spack.error
 import spack.paths
 import spack.config
 import spack.fetch_strategy
+import spack.util.crypto
 import spack.util.file_cache
 import spack.util.path
 
@@ -50,12 +54,112 @@ def _fetch_cache():
 
 
 class MirrorCache(object):
+    #: Journal of the entries added to the mirror, next to the global
+    #: storage paths. It lets an interrupted ``spack mirror create`` resume
+    #: without checking the entries that were already added again.
+    journal_name = os.path.join('_source-cache', '.spack-mirror-journal')
+
     def __init__(self, root, skip_unstable_versions):
         self.root = os.path.abspath(root)
         self.skip_unstable_versions = skip_unstable_versions
+        self._lock = threading.Lock()
+        #: Maps the entries being added to an event set once they are done
+        self._claimed = {}
+        self._journal = None
+
+    @property
+    def journal_path(self):
+        return os.path.join(self.root, self.journal_name)
+
+    def _load_journal(self):
+        if self._journal is not None:
+            return self._journal
+
+        self._journal = {}
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self._journal[entry['path']] = entry
+                    except (ValueError, KeyError, TypeError):
+                        # e.g. the last line of an interrupted run
+                        continue
+        return self._journal
+
+    def _record(self, relative_dest, size, digest):
+        # Entries without a checksum cannot be verified, so there is no
+        # point in recording them
+        if not digest:
+            return
+
+        entry = {'path': relative_dest, 'size': size, 'digest': digest}
+        with self._lock:
+            self._load_journal()[relative_dest] = entry
+            mkdirp(os.path.dirname(self.journal_path))
+            with open(self.journal_path, 'a') as f:
+                f.write(json.dumps(entry, sort_keys=True) + '\n')
+
+    def is_cached(self, relative_dest, digest=None):
+        """Return True if the mirror has a valid entry at relative_dest.
+
+        Entries recorded in the journal with the same digest are checked by
+        size only. Other entries are verified against digest, if there is
+        one, and recorded in the journal when they are valid.
+        """
+        dst = os.path.join(self.root, relative_dest)
+        if not os.path.exists(dst):
+            return False
+        if not digest:
+            return True
+
+        try:
+            checker = spack.util.crypto.Checker(digest)
+        except ValueError:
+            return True
+
+        size = os.path.getsize(dst)
+        with self._lock:
+            entry = self._load_journal().get(relative_dest)
+        if entry and entry['size'] == size and entry['digest'] == digest:
+            return True
+
+        if not checker.check(dst):
+            tty.warn('Replacing corrupted mirror entry {0}'.format(dst))
+            return False
+
+        self._record(relative_dest, size, digest)
+        return True
+
+    def claim(self, relative_dest):
+        """Claim an entry for the caller, so that concurrent tasks don't
+        add it twice. Return False if it was already claimed."""
+        with self._lock:
+            if relative_dest in self._claimed:
+                return False
+            self._claimed[relative_dest] = threading.Event()
+            return True
+
+    def release(self, relative_dest):
+        """Release the claim on an entry, whether it was added or not, and
+        wake up the tasks waiting for it."""
+        with self._lock:
+            done = self._claimed.pop(relative_dest, None)
+        if done:
+            done.set()
+
+    def wait(self, relative_dest):
+        """Wait until the claim on an entry, if any, is released."""
+        with self._lock:
+            done = self._claimed.get(relative_dest)
+        if done:
+            done.wait()
 
     def store(self, fetcher, relative_dest):
-        """Fetch and relocate the fetcher's target into our mirror cache."""
+        """Fetch and relocate the fetcher's target into our mirror cache.
+
+        Returns the size of the new entry in bytes.
+        """
 
         # Note this will archive package sources even if they would not
         # normally be cached (e.g. the current tip of an hg/git branch)
@@ -63,6 +167,10 @@ def store(self, fetcher, relative_dest):
         mkdirp(os.path.dirname(dst))
         fetcher.archive(dst)
 
+        size = os.path.getsize(dst)
+        self._record(relative_dest, size, getattr(fetcher, 'digest', None))
+        return size
+
     def symlink(self, mirror_ref):
         """Symlink a human readible path in our mirror to the actual
         storage location."""
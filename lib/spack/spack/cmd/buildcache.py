@@ -234,6 +234,11 @@ def setup_parser(subparser):
     update_index.add_argument(
         '-k', '--keys', default=False, action='store_true',
         help='If provided, key index will be updated as well as package index')
+    update_index.add_argument(
+        '-i', '--incremental', default=False, action='store_true',
+        help='Merge specs pushed since the last update into the existing '
+             'index, instead of rebuilding it from scratch. From then on, '
+             'pushing to the mirror records the specs to merge')
     update_index.set_defaults(func=buildcache_update_index)
 
 
@@ -779,7 +784,8 @@ def buildcache_update_index(args):
     outdir = url_util.format(mirror.push_url)
 
     bindist.generate_package_index(
-        url_util.join(outdir, bindist.build_cache_relative_path()))
+        url_util.join(outdir, bindist.build_cache_relative_path()),
+        incremental=args.incremental)
 
     if args.keys:
         keys_url = url_util.join(outdir,
@@ -25,7 +25,14 @@
 def setup_parser(subparser):
     subparser.add_argument(
         '--keep-stage', action='store_true',
-        help="don't clean up staging area when command completes")
+        help="download archives to a staging area, and don't clean it up "
+             "when command completes")
+    subparser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help="maximum number of concurrent downloads "
+             "(default: config:fetch_jobs). Archives are only downloaded "
+             "concurrently, without being staged, when "
+             "config:url_fetch_method is urllib")
     subparser.add_argument(
         '-b', '--batch', action='store_true',
         help="don't ask which versions to checksum")
@@ -66,7 +73,7 @@ def checksum(parser, args):
     version_lines = spack.stage.get_checksums_for_versions(
         url_dict, pkg.name, keep_stage=args.keep_stage,
         batch=(args.batch or len(args.versions) > 0 or len(url_dict) == 1),
-        fetch_options=pkg.fetch_options)
+        fetch_options=pkg.fetch_options, jobs=args.jobs)
 
     print()
     print(version_lines)
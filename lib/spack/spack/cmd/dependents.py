@@ -27,53 +27,7 @@ def setup_parser(subparser):
     subparser.add_argument(
         '-t', '--transitive', action='store_true', default=False,
         help="Show all transitive dependents.")
-    arguments.add_common_arguments(subparser, ['spec'])
-
-
-def inverted_dependencies():
-    """Iterate through all packages and return a dictionary mapping package
-       names to possible dependencies.
-
-       Virtual packages are included as sources, so that you can query
-       dependents of, e.g., `mpi`, but virtuals are not included as
-       actual dependents.
-    """
-    dag = {}
-    for pkg in spack.repo.path.all_packages():
-        dag.setdefault(pkg.name, set())
-        for dep in pkg.dependencies:
-            deps = [dep]
-
-            # expand virtuals if necessary
-            if spack.repo.path.is_virtual(dep):
-                deps += [s.name for s in spack.repo.path.providers_for(dep)]
-
-            for d in deps:
-                dag.setdefault(d, set()).add(pkg.name)
-    return dag
-
-
-def get_dependents(pkg_name, ideps, transitive=False, dependents=None):
-    """Get all dependents for a package.
-
-    Args:
-        pkg_name (str): name of the package whose dependents should be returned
-        ideps (dict): dictionary of dependents, from inverted_dependencies()
-        transitive (bool, optional): return transitive dependents when True
-    """
-    if dependents is None:
-        dependents = set()
-
-    if pkg_name in dependents:
-        return set()
-    dependents.add(pkg_name)
-
-    direct = ideps[pkg_name]
-    if transitive:
-        for dep_name in direct:
-            get_dependents(dep_name, ideps, transitive, dependents)
-    dependents.update(direct)
-    return dependents
+    arguments.add_common_arguments(subparser, ['deptype', 'spec'])
 
 
 def dependents(parser, args):
@@ -89,7 +43,7 @@ def dependents(parser, args):
         if sys.stdout.isatty():
             tty.msg("Dependents of %s" % spec.cformat(format_string))
         deps = spack.store.db.installed_relatives(
-            spec, 'parents', args.transitive)
+            spec, 'parents', args.transitive, deptype=args.deptype)
         if deps:
             spack.cmd.display_specs(deps, long=True)
         else:
@@ -97,10 +51,8 @@ def dependents(parser, args):
 
     else:
         spec = specs[0]
-        ideps = inverted_dependencies()
-
-        dependents = get_dependents(spec.name, ideps, args.transitive)
-        dependents.remove(spec.name)
+        dependents = spack.repo.path.dependents_index.dependents_for(
+            spec.name, args.transitive, args.deptype)
         if dependents:
             colify(sorted(dependents))
         else:
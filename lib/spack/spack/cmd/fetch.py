@@ -3,11 +3,14 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
+import functools
+
 import llnl.util.tty as tty
 
 import spack.cmd
 import spack.cmd.common.arguments as arguments
 import spack.config
+import spack.fetch_strategy
 import spack.repo
 
 description = "fetch archives for packages"
@@ -23,6 +26,10 @@ def setup_parser(subparser):
     subparser.add_argument(
         '-D', '--dependencies', action='store_true',
         help="also fetch all dependencies")
+    subparser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help="maximum number of concurrent downloads "
+             "(default: config:fetch_jobs)")
     arguments.add_common_arguments(subparser, ['specs'])
 
 
@@ -34,11 +41,19 @@ def fetch(parser, args):
         spack.config.set('config:checksum', False, scope='command_line')
 
     specs = spack.cmd.parse_specs(args.specs, concretize=True)
+    packages, seen = [], set()
     for spec in specs:
+        to_fetch = [spec]
         if args.missing or args.dependencies:
-            for s in spec.traverse():
-                package = spack.repo.get(s)
+            to_fetch = list(spec.traverse(order='post'))
+
+        for s in to_fetch:
+            if s.dag_hash() in seen:
+                continue
+            seen.add(s.dag_hash())
 
+            package = spack.repo.get(s)
+            if s is not spec:
                 # Skip already-installed packages with --missing
                 if args.missing and package.installed:
                     continue
@@ -47,7 +62,28 @@ def fetch(parser, args):
                 if package.spec.external:
                     continue
 
-                package.do_fetch()
+            packages.append(package)
 
-        package = spack.repo.get(spec)
+    # Packages without a checksum may ask the user for confirmation, so
+    # they are fetched one at a time before the others
+    checksum = spack.config.get('config:checksum')
+    unchecked = [p for p in packages
+                 if checksum and p.version not in p.versions]
+    for package in unchecked:
         package.do_fetch()
+
+    # Packages with the same name and version have the same sources, so
+    # they are fetched in the same task to avoid racing on the caches
+    groups = {}
+    for package in packages:
+        if package not in unchecked:
+            key = (package.name, str(package.version))
+            groups.setdefault(key, []).append(package)
+
+    def _fetch_all(group):
+        for package in group:
+            package.do_fetch()
+
+    spack.fetch_strategy.fetch_concurrently(
+        [functools.partial(_fetch_all, group) for group in groups.values()],
+        jobs=args.jobs)
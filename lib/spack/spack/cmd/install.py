@@ -8,9 +8,11 @@
 import shutil
 import sys
 import textwrap
+from contextlib import closing
 
 import llnl.util.filesystem as fs
 import llnl.util.tty as tty
+from llnl.util.tty.log import open_log
 
 import spack.build_environment
 import spack.cmd
@@ -218,7 +220,7 @@ def install_specs(cli_args, kwargs, specs):
                 tty.error("'spack install' created no log.")
             else:
                 sys.stderr.write('Full build log:\n')
-                with open(e.pkg.build_log_path) as log:
+                with closing(open_log(e.pkg.build_log_path)) as log:
                     shutil.copyfileobj(log, sys.stderr)
         raise
 
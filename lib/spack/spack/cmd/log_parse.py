@@ -30,8 +30,11 @@ def setup_parser(subparser):
         help="wrap width: auto-size to terminal by default; 0 for no wrap")
     subparser.add_argument(
         '-j', '--jobs', action='store', type=int, default=None,
-        help="number of jobs to parse log file (default: 1 for short logs, "
-        "ncpus for long logs)")
+        help="number of jobs to parse log file with when profiling "
+        "(default: 1 for short logs, ncpus for long logs)")
+    subparser.add_argument(
+        '-m', '--max-errors', action='store', type=int, default=None,
+        help="stop after finding this many errors")
 
     subparser.add_argument(
         'file', help="a log file containing build output, or - for stdin")
@@ -43,7 +46,7 @@ def log_parse(parser, args):
         input = sys.stdin
 
     errors, warnings = parse_log_events(
-        input, args.context, args.jobs, args.profile)
+        input, args.context, args.jobs, args.profile, args.max_errors)
     if args.profile:
         return
 
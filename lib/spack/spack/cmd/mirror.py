@@ -65,6 +65,10 @@ def setup_parser(subparser):
         '-n', '--versions-per-spec',
         help="the number of versions to fetch for each spec, choose 'all' to"
              " retrieve all versions of each package")
+    create_parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help="maximum number of specs mirrored concurrently "
+             "(default: config:fetch_jobs)")
     arguments.add_common_arguments(create_parser, ['specs'])
 
     # used to construct scope arguments below
@@ -330,6 +334,14 @@ def _determine_specs_to_mirror(args):
     return mirror_specs
 
 
+def _human_size(nbytes):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if nbytes < 1024:
+            return '%.1f %s' % (nbytes, unit)
+        nbytes /= 1024.0
+    return '%.1f TB' % nbytes
+
+
 def mirror_create(args):
     """Create a directory to be used as a spack mirror, and fill it with
        package archives."""
@@ -343,8 +355,10 @@ def mirror_create(args):
     existed = web_util.url_exists(directory)
 
     # Actually do the work to create the mirror
+    stats = spack.mirror.MirrorStats()
     present, mirrored, error = spack.mirror.create(
-        directory, mirror_specs, args.skip_unstable_versions)
+        directory, mirror_specs, args.skip_unstable_versions,
+        jobs=args.jobs, stats=stats)
     p, m, e = len(present), len(mirrored), len(error)
 
     verb = "updated" if existed else "created"
@@ -354,6 +368,12 @@ def mirror_create(args):
         "  %-4d already present"  % p,
         "  %-4d added"            % m,
         "  %-4d failed to fetch." % e)
+    if stats.bytes_added:
+        tty.msg("Added %s at %s/s" % (
+            _human_size(stats.bytes_added), _human_size(stats.throughput)))
+        for host, (count, nbytes, seconds) in sorted(stats.hosts.items()):
+            tty.msg("  %-30s %4d archives  %10s  %8.1fs" % (
+                host, count, _human_size(nbytes), seconds))
     if error:
         tty.error("Failed downloads:")
         colify(s.cformat("{name}{@version}") for s in error)
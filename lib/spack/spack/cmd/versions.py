@@ -12,6 +12,7 @@
 
 import spack.cmd.common.arguments as arguments
 import spack.repo
+import spack.util.web
 from spack.version import VersionList, ver
 
 description = "list available versions of a package"
@@ -35,18 +36,32 @@ def setup_parser(subparser):
         '-c', '--concurrency', default=32, type=int,
         help='number of concurrent requests'
     )
-    arguments.add_common_arguments(subparser, ['package'])
+    subparser.add_argument(
+        '-b', '--batch', action='store_true',
+        help='list the versions of several packages, reading the web pages '
+        'they share only once')
+    arguments.add_common_arguments(subparser, ['packages'])
 
 
 def versions(parser, args):
-    pkg = spack.repo.get(args.package)
-
-    safe_versions = pkg.versions
+    if len(args.packages) > 1 and not args.batch:
+        tty.die('Use --batch to list the versions of several packages')
 
     if args.safe_only:
         tty.warn('"--safe-only" is deprecated. Use "--safe" instead.')
         args.safe = args.safe_only
 
+    web_spider = spack.util.web.Spider(concurrency=args.concurrency)
+    for name in args.packages:
+        pkg = spack.repo.get(name)
+        if args.batch:
+            tty.msg('{0}:'.format(pkg.name))
+        _versions(pkg, args, web_spider)
+
+
+def _versions(pkg, args, web_spider):
+    safe_versions = pkg.versions
+
     if not (args.remote or args.new):
         if sys.stdout.isatty():
             tty.msg('Safe versions (already checksummed):')
@@ -61,7 +76,8 @@ def versions(parser, args):
         if args.safe:
             return
 
-    fetched_versions = pkg.fetch_remote_versions(args.concurrency)
+    fetched_versions = pkg.fetch_remote_versions(
+        args.concurrency, web_spider=web_spider)
 
     if args.new:
         if sys.stdout.isatty():
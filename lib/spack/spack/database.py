@@ -353,6 +353,9 @@ def __init__(self, root, db_dir=None, upstream_dbs=None,
 
         self.is_upstream = is_upstream
         self.last_seen_verifier = ''
+        # Identity of the index file that was last read or written by this
+        # object (see _index_file_state)
+        self._last_seen_index = None
 
         # initialize rest of state.
         self.db_lock_timeout = (
@@ -969,6 +972,9 @@ def _write(self, type, value, traceback):
         """
         # Do not write if exceptions were raised
         if type is not None:
+            # The in-memory data may have been modified: read the file
+            # again at the start of the next transaction
+            self._last_seen_index = None
             return
 
         temp_file = self._index_path + (
@@ -984,6 +990,7 @@ def _write(self, type, value, traceback):
                     new_verifier = str(uuid.uuid4())
                     f.write(new_verifier)
                     self.last_seen_verifier = new_verifier
+            self._last_seen_index = self._index_file_state()
         except BaseException as e:
             tty.debug(e)
             # Clean up temp file if something goes wrong.
@@ -991,14 +998,34 @@ def _write(self, type, value, traceback):
                 os.remove(temp_file)
             raise
 
+    def _index_file_state(self):
+        """Return a tuple that changes whenever the index file is written,
+        or None if there is no index file.
+
+        Writers replace the index with a new file, so its inode changes on
+        each write. The size and the modification time cover writers that
+        modify the file in place.
+        """
+        try:
+            st = os.stat(self._index_path)
+        except OSError:
+            return None
+        mtime = getattr(st, 'st_mtime_ns', None) or st.st_mtime
+        return st.st_dev, st.st_ino, st.st_size, mtime
+
     def _read(self):
         """Re-read Database from the data in the set location.
 
+        The index file is read only if it changed since it was last read
+        or written by this object, so that the in-memory data is reused as
+        long as no other process committed a write transaction.
+
         This does no locking, with one exception: it will automatically
         try to regenerate a missing DB if local. This requires taking a
         write lock.
         """
-        if os.path.isfile(self._index_path):
+        index_state = self._index_file_state()
+        if index_state is not None:
             current_verifier = ''
             if _use_uuid:
                 try:
@@ -1006,11 +1033,16 @@ def _read(self):
                         current_verifier = f.read()
                 except BaseException:
                     pass
-            if ((current_verifier != self.last_seen_verifier) or
-                    (current_verifier == '')):
+            if (current_verifier != self.last_seen_verifier or
+                    index_state != self._last_seen_index):
                 self.last_seen_verifier = current_verifier
+                self._last_seen_index = index_state
                 # Read from file if a database exists
-                self._read_from_file(self._index_path)
+                try:
+                    self._read_from_file(self._index_path)
+                except BaseException:
+                    self._last_seen_index = None
+                    raise
             return
         elif self.is_upstream:
             raise UpstreamDatabaseLockingError(
@@ -64,6 +64,22 @@ def canonical_deptype(deptype):
     raise ValueError('Invalid dependency type: %s' % repr(deptype))
 
 
+def possible_deptypes(dependencies):
+    """Map each dependency of a package to all the types it can have.
+
+    Args:
+        dependencies (dict): the ``dependencies`` dictionary of a package
+            class, mapping names to conditions and ``Dependency`` objects
+
+    Returns:
+        (dict): names of the dependencies mapped to sorted lists of the
+            types they have under any condition
+    """
+    return dict(
+        (name, sorted(set.union(*[dep.type for dep in conditions.values()])))
+        for name, conditions in dependencies.items())
+
+
 class Dependency(object):
     """Class representing metadata for a dependency on a package.
 
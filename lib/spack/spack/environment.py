@@ -1382,11 +1382,14 @@ def _install_log_links(self, spec):
 
             with fs.working_dir(self.path):
                 # Link the resulting log file into logs dir
+                build_log = spec.package.build_log_path
                 build_log_link = os.path.join(
                     log_path, '%s-%s.log' % (spec.name, spec.dag_hash(7)))
+                if build_log.endswith('.gz'):
+                    build_log_link += '.gz'
                 if os.path.lexists(build_log_link):
                     os.remove(build_log_link)
-                os.symlink(spec.package.build_log_path, build_log_link)
+                os.symlink(build_log, build_log_link)
 
     def install_all(self, args=None, **install_args):
         """Install all concretized specs in an environment.
@@ -1534,14 +1537,8 @@ def _get_environment_specs(self, recurse_dependencies=True):
 
     def _to_lockfile_dict(self):
         """Create a dictionary to store a lockfile for this environment."""
-        concrete_specs = {}
-        for spec in self.specs_by_hash.values():
-            for s in spec.traverse():
-                dag_hash_all = s.build_hash()
-                if dag_hash_all not in concrete_specs:
-                    spec_dict = s.to_node_dict(hash=ht.build_hash)
-                    spec_dict[s.name]['hash'] = s.dag_hash()
-                    concrete_specs[dag_hash_all] = spec_dict
+        concrete_specs = spack.spec.specs_to_node_dicts(
+            self.specs_by_hash.values(), hash=ht.build_hash)
 
         hash_spec_list = zip(
             self.concretized_order, self.concretized_user_specs)
@@ -1581,15 +1578,13 @@ def _read_lockfile_dict(self, d):
         json_specs_by_hash = d['concrete_specs']
         root_hashes = set(self.concretized_order)
 
-        specs_by_hash = {}
-        for dag_hash, node_dict in json_specs_by_hash.items():
-            specs_by_hash[dag_hash] = Spec.from_node_dict(node_dict)
-
-        for dag_hash, node_dict in json_specs_by_hash.items():
-            for dep_name, dep_hash, deptypes in (
-                    Spec.dependencies_from_node_dict(node_dict)):
-                specs_by_hash[dag_hash]._add_dependency(
-                    specs_by_hash[dep_hash], deptypes)
+        # Since version 2, specs are keyed by their build hash, so there
+        # is no need to compute it again
+        key_hash = None
+        if d['_meta']['lockfile-version'] >= 2:
+            key_hash = ht.build_hash
+        specs_by_hash = spack.spec.specs_from_node_dicts(
+            json_specs_by_hash, hash=key_hash)
 
         # If we are reading an older lockfile format (which uses dag hashes
         # that exclude build deps), we use this to convert the old
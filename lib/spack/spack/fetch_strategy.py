@@ -24,11 +24,14 @@
 """
 import copy
 import functools
+import hashlib
+import multiprocessing.pool
 import os
 import os.path
 import re
 import shutil
 import sys
+import tempfile
 from typing import Optional, List  # novm
 
 import llnl.util.tty as tty
@@ -62,6 +65,152 @@ def warn_content_type_mismatch(subject, content_type='HTML'):
         subject=subject, content_type=content_type))
 
 
+def _url_fetch_method():
+    return spack.config.get('config:url_fetch_method') or 'curl'
+
+
+def _request_options(fetch_options):
+    """Return the headers and the timeout of the requests made with
+    ``fetch_options``, e.g. the ``fetch_options`` of a package."""
+    headers = {}
+    timeout = spack.config.get('config:connect_timeout', 10)
+    if fetch_options:
+        cookie = fetch_options.get('cookie')
+        if cookie:
+            headers['Cookie'] = cookie
+
+        extra_timeout = fetch_options.get('timeout')
+        if extra_timeout:
+            timeout = max(timeout, int(extra_timeout))
+    return headers, timeout or None
+
+
+def checksum_url(url, algorithm='sha256', fetch_options=None):
+    """Download a URL and return the checksum of its content, computed
+    while it is downloaded. Nothing is written to disk.
+
+    Args:
+        url (str): URL to be checksummed
+        algorithm (str): name of the ``hashlib`` algorithm to be used
+        fetch_options (dict): options like the ``fetch_options`` of a
+            package (cookie, timeout)
+
+    Raises:
+        FailedDownloadError: if the download failed, or returned an HTML
+            page rather than an archive
+    """
+    hasher = crypto.hash_fun_for_algo(algorithm)()
+    headers, timeout = _request_options(fetch_options)
+    try:
+        _, response_headers = web_util.fetch_url_to_file(
+            url, None, hasher=hasher, headers=headers, timeout=timeout)
+    except web_util.SpackWebError as e:
+        raise FailedDownloadError(url, str(e))
+
+    # The checksum of an error or redirect page is of no use
+    try:
+        content_type = web_util.get_header(response_headers, 'Content-type')
+    except KeyError:
+        content_type = None
+    if content_type and 'text/html' in content_type:
+        warn_content_type_mismatch(url)
+        raise FailedDownloadError(
+            url, 'Expected an archive but got an HTML page')
+
+    return hasher.hexdigest()
+
+
+def fetch_concurrently(tasks, jobs=None):
+    """Run fetch tasks in a bounded pool of threads.
+
+    Args:
+        tasks (list): callables without arguments, each downloading some
+            sources
+        jobs (int): maximum number of tasks that run at the same time.
+            Defaults to ``config:fetch_jobs``.
+
+    Raises:
+        The first exception raised by a task, after all the tasks are done.
+        With a single job, tasks run in order and the first error stops them.
+    """
+    tasks = list(tasks)
+    if jobs is None:
+        jobs = spack.config.get('config:fetch_jobs', 4)
+    jobs = max(1, min(jobs, len(tasks)))
+
+    if jobs == 1:
+        for task in tasks:
+            task()
+        return
+
+    def _run(task):
+        try:
+            task()
+        # Errors like SystemExit must not kill the worker threads
+        except BaseException as e:
+            return e
+
+    pool = multiprocessing.pool.ThreadPool(jobs)
+    try:
+        errors = [e for e in pool.map(_run, tasks) if e is not None]
+    finally:
+        pool.terminate()
+        pool.join()
+
+    if errors:
+        for e in errors[1:]:
+            tty.debug(str(e))
+        raise errors[0]
+
+
+#: ioctl request that clones a file on Linux filesystems with reflinks
+_FICLONE = 0x40049409
+
+
+def _reflink(src, dst):
+    """Clone src into dst sharing its data blocks, if the filesystem can do
+    it. Return True on success."""
+    if not sys.platform.startswith('linux'):
+        return False
+
+    import fcntl
+    try:
+        with open(src, 'rb') as fsrc:
+            with open(dst, 'wb') as fdst:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+    except (IOError, OSError):
+        if os.path.lexists(dst):
+            os.remove(dst)
+        return False
+
+    shutil.copystat(src, dst)
+    return True
+
+
+def replicate_tree(src, dst):
+    """Replicate the content of directory src into the existing directory
+    dst.
+
+    Symbolic links are recreated as they are. Regular files are copied,
+    as reflinks where the filesystem supports them, so their data is shared
+    until either file is modified.
+    """
+    try_reflink = True
+    for root, dirs, files in os.walk(src):
+        dst_root = os.path.join(dst, os.path.relpath(root, src))
+        for name in dirs + files:
+            src_path = os.path.join(root, name)
+            dst_path = os.path.join(dst_root, name)
+            if os.path.islink(src_path):
+                os.symlink(os.readlink(src_path), dst_path)
+            elif os.path.isdir(src_path):
+                os.mkdir(dst_path)
+            elif not (try_reflink and _reflink(src_path, dst_path)):
+                # Don't try reflinks again if the filesystem can't do them
+                try_reflink = False
+                shutil.copy2(src_path, dst_path)
+
+
 def _needs_stage(fun):
     """Many methods on fetch strategies require a stage to be set
        using set_stage().  This decorator adds a check for self.stage."""
@@ -263,6 +412,11 @@ def __init__(self, url=None, checksum=None, **kwargs):
         self.expand_archive = kwargs.get('expand', True)
         self.extra_options = kwargs.get('fetch_options', {})
         self._curl = None
+        # Path and checksum of the last archive that was checksummed while
+        # it was being downloaded
+        self._streamed_checksum = None
+        # Path of the last archive that passed check()
+        self._checked_archive = None
 
         self.extension = kwargs.get('extension', None)
 
@@ -321,6 +475,11 @@ def fetch(self):
             raise FailedDownloadError(url)
 
     def _existing_url(self, url):
+        if _url_fetch_method() != 'curl':
+            # A missing URL makes the download itself fail, there's no need
+            # for another round trip to the server
+            return True
+
         tty.debug('Checking existence of {0}'.format(url))
         curl = self.curl
         # Telling curl to fetch the first byte (-r 0-0) is supposed to be
@@ -330,6 +489,55 @@ def _existing_url(self, url):
         return curl.returncode == 0
 
     def _fetch_from_url(self, url):
+        if _url_fetch_method() == 'curl':
+            return self._fetch_curl(url)
+        return self._fetch_urllib(url)
+
+    def _fetch_urllib(self, url):
+        save_file = self.stage.save_filename
+        if not save_file:
+            # Like curl -O, save the file under its remote name in the stage
+            remote_name = os.path.basename(urllib_parse.urlparse(url).path)
+            if not remote_name:
+                raise FailedDownloadError(
+                    url, 'Cannot tell which file to save {0} to'.format(url))
+            save_file = os.path.join(self.stage.path, remote_name)
+        partial_file = save_file + '.part'
+        tty.msg('Fetching {0}'.format(url))
+
+        # Compute the checksum while downloading, so that check() does not
+        # need to read the archive again
+        hasher = None
+        if self.digest and spack.config.get('config:checksum'):
+            try:
+                hasher = crypto.hash_fun_for_digest(self.digest)()
+            except ValueError:
+                # Unknown digests are reported by check()
+                pass
+
+        headers, timeout = _request_options(self.extra_options)
+        try:
+            _, response_headers = web_util.fetch_url_to_file(
+                url, partial_file, hasher=hasher, headers=headers,
+                timeout=timeout)
+        except web_util.SpackWebError as e:
+            raise FailedDownloadError(url, str(e))
+
+        # Check if we somehow got an HTML file rather than the archive we
+        # asked for.
+        try:
+            content_type = web_util.get_header(
+                response_headers, 'Content-type')
+        except KeyError:
+            content_type = None
+        if content_type and 'text/html' in content_type:
+            warn_content_type_mismatch(self.archive_file or "the archive")
+
+        if hasher is not None:
+            self._streamed_checksum = (save_file, hasher.hexdigest())
+        return partial_file, save_file
+
+    def _fetch_curl(self, url):
         save_file = None
         partial_file = None
         if self.stage.save_filename:
@@ -379,8 +587,13 @@ def _fetch_from_url(self, url):
 
         # Run curl but grab the mime type from the http headers
         curl = self.curl
-        with working_dir(self.stage.path):
+        if partial_file:
+            # The output path is absolute: don't change the working directory
+            # of the process, fetches may run in concurrent threads
             headers = curl(*curl_args, output=str, fail_on_error=False)
+        else:
+            with working_dir(self.stage.path):
+                headers = curl(*curl_args, output=str, fail_on_error=False)
 
         if curl.returncode != 0:
             # clean up archive on failure.
@@ -466,8 +679,10 @@ def expand(self):
                                          "spack-expanded-archive")
 
         mkdirp(tarball_container)
-        with working_dir(tarball_container):
-            decompress(self.archive_file)
+        if not self._restore_expanded_tree(tarball_container):
+            with working_dir(tarball_container):
+                decompress(self.archive_file)
+            self._store_expanded_tree(tarball_container)
 
         # Check for an exploding tarball, i.e. one that doesn't expand to
         # a single directory.  If the tarball *didn't* explode, move its
@@ -502,6 +717,39 @@ def expand(self):
         else:
             shutil.move(tarball_container, self.stage.source_path)
 
+    def _caches_source_tree(self):
+        """Return whether expanded archives of this fetcher are kept in
+        the cache of source trees."""
+        method = spack.config.get('config:source_tree_cache') or 'none'
+        if method == 'none' or not self.digest:
+            return False
+        return bool(spack.config.get('config:checksum'))
+
+    def _restore_expanded_tree(self, dest):
+        """Populate dest from the cache of expanded archives. Return True
+        on success, False if the archive needs to be expanded."""
+        if not self._caches_source_tree():
+            return False
+
+        import spack.caches
+        cached_tree = spack.caches.fetch_cache.expanded_tree(self.digest)
+        if cached_tree is None:
+            return False
+
+        tty.debug('Staging cached source tree {0}'.format(cached_tree))
+        replicate_tree(cached_tree, dest)
+        return True
+
+    def _store_expanded_tree(self, src):
+        """Add the pristine expanded archive in src to the cache of
+        expanded archives, if its checksum was verified."""
+        if (not self._caches_source_tree() or
+                self._checked_archive != self.archive_file):
+            return
+
+        import spack.caches
+        spack.caches.fetch_cache.store_expanded_tree(self.digest, src)
+
     def archive(self, destination):
         """Just moves this archive to the destination."""
         if not self.archive_file:
@@ -521,11 +769,19 @@ def check(self):
                 "Attempt to check URLFetchStrategy with no digest.")
 
         checker = crypto.Checker(self.digest)
-        if not checker.check(self.archive_file):
+        if self._streamed_checksum is not None and \
+                self._streamed_checksum[0] == self.archive_file:
+            checker.sum = self._streamed_checksum[1]
+            ok = checker.sum == self.digest
+        else:
+            ok = checker.check(self.archive_file)
+
+        if not ok:
             raise ChecksumError(
                 "%s checksum failed for %s" %
                 (checker.hash_name, self.archive_file),
                 "Expected %s but got %s" % (self.digest, checker.sum))
+        self._checked_archive = self.archive_file
 
     @_needs_stage
     def reset(self):
@@ -818,7 +1074,11 @@ def fetch(self):
         tty.debug('Cloning git repository: {0}'.format(self._repo_info()))
 
         git = self.git
-        if self.commit:
+        use_cache = spack.config.get('config:git_cache')
+        if use_cache:
+            self._clone_from_cache()
+
+        elif self.commit:
             # Need to do a regular clone and check out everything if
             # they asked for a particular commit.
             debug = spack.config.get('config:debug')
@@ -899,13 +1159,151 @@ def fetch(self):
                     git(*args)
 
         # Init submodules if the user asked for them.
-        if self.submodules:
+        if self.submodules and use_cache:
+            self._update_submodules_from_cache(self.stage.source_path)
+
+        elif self.submodules:
             with working_dir(self.stage.source_path):
                 args = ['submodule', 'update', '--init', '--recursive']
                 if not spack.config.get('config:debug'):
                     args.insert(1, '--quiet')
                 git(*args)
 
+    def _quiet_args(self):
+        return [] if spack.config.get('config:debug') else ['--quiet']
+
+    def _has_commit(self, repo_path, ref):
+        with working_dir(repo_path):
+            self.git('cat-file', '-e', '{0}^{{commit}}'.format(ref),
+                     fail_on_error=False, output=os.devnull,
+                     error=os.devnull)
+        return self.git.returncode == 0
+
+    def _update_git_cache(self, url, ref=None):
+        """Create or update a bare mirror of a remote repository in the
+        source cache, and return its path.
+
+        Args:
+            url (str): URL of the remote repository
+            ref (str): commit or tag needed from the remote. If the mirror
+                already has it, the remote is not contacted. If None, the
+                mirror is always updated.
+        """
+        import spack.caches
+        import spack.util.lock
+
+        name = os.path.basename(url.rstrip('/'))
+        if not name.endswith('.git'):
+            name += '.git'
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        path = os.path.join(
+            spack.caches.fetch_cache.root, '_git', '{0}-{1}'.format(key, name))
+        mkdirp(os.path.dirname(path))
+
+        # Cloning a large repository can take much longer than any lock
+        # timeout: wait for other processes as long as they need
+        lock = spack.util.lock.Lock(path + '.lock', desc=url)
+        lock.acquire_write()
+        try:
+            if not os.path.isdir(path):
+                tty.debug('Caching git repository {0} in {1}'.format(
+                    url, path))
+                self._clone_mirror(url, path)
+            elif ref is None or not self._has_commit(path, ref):
+                tty.debug('Updating cached git repository {0}'.format(path))
+                with working_dir(path):
+                    self.git('remote', 'update', '--prune')
+        finally:
+            lock.release_write()
+
+        return path
+
+    def _clone_mirror(self, url, path):
+        """Clone a bare mirror of url at path, which is only created once
+        the clone is complete."""
+        # Remove what interrupted clones left behind. The caller holds the
+        # lock of the mirror, so no other process is writing them.
+        parent, name = os.path.split(path)
+        for entry in os.listdir(parent):
+            if entry.startswith(name + '.tmp-'):
+                shutil.rmtree(os.path.join(parent, entry), ignore_errors=True)
+
+        tmp_path = tempfile.mkdtemp(prefix=name + '.tmp-', dir=parent)
+        try:
+            self.git('clone', '--mirror', *(
+                self._quiet_args() + [url, tmp_path]))
+            os.rename(tmp_path, path)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+    def _clone_from_cache(self):
+        """Clone the repository into the stage from its bare mirror in the
+        source cache. The objects of the mirror are hard linked when possible,
+        so the stage does not depend on the mirror, which may be pruned."""
+        git = self.git
+        quiet = self._quiet_args()
+        cache_path = self._update_git_cache(
+            self.url, self.commit or self.tag)
+
+        args = ['clone', '--local'] + quiet
+        if self.branch:
+            args.extend(['--branch', self.branch])
+        git(*(args + [cache_path, self.stage.source_path]))
+
+        repo_name = os.path.basename(self.url.rstrip('/'))
+        if repo_name.endswith('.git'):
+            repo_name = repo_name[:-len('.git')]
+        self.stage.srcdir = repo_name
+
+        with working_dir(self.stage.source_path):
+            git('remote', 'set-url', 'origin', self.url)
+            if self.commit or self.tag:
+                git('checkout', *(quiet + [self.commit or self.tag]))
+
+    def _update_submodules_from_cache(self, repo_path):
+        """Initialize the submodules of a repository recursively, cloning
+        them from bare mirrors in the source cache."""
+        git = self.git
+        quiet = self._quiet_args()
+        if not os.path.exists(os.path.join(repo_path, '.gitmodules')):
+            return
+
+        submodules = []
+        with working_dir(repo_path):
+            git('submodule', 'init', *quiet)
+            paths = git('config', '-f', '.gitmodules', '--get-regexp',
+                        r'^submodule\..*\.path$', output=str,
+                        fail_on_error=False)
+            for line in paths.splitlines():
+                key, path = line.split(None, 1)
+                url_key = key[:-len('.path')] + '.url'
+                url = git('config', url_key, output=str,
+                          fail_on_error=False).strip()
+                if not url:
+                    continue
+
+                # The commit recorded for the submodule, to avoid updating
+                # the mirror when it already has it
+                tree_entry = git('ls-tree', 'HEAD', path, output=str).split()
+                commit = tree_entry[2] if len(tree_entry) > 2 else None
+                cache_path = self._update_git_cache(url, commit)
+                git('config', url_key, cache_path)
+                submodules.append((url_key, path, url))
+
+            # Mirrors in the cache are local paths, which recent versions
+            # of git don't clone for submodules unless explicitly allowed
+            git('-c', 'protocol.file.allow=always', 'submodule', 'update',
+                *quiet)
+
+            for url_key, path, url in submodules:
+                git('config', url_key, url)
+                with working_dir(path):
+                    git('remote', 'set-url', 'origin', url)
+
+        for _, path, _ in submodules:
+            self._update_submodules_from_cache(os.path.join(repo_path, path))
+
     def archive(self, destination):
         super(GitFetchStrategy, self).archive(destination, exclude='.git')
 
@@ -1416,6 +1814,38 @@ class FsCache(object):
 
     def __init__(self, root):
         self.root = os.path.abspath(root)
+        self.trees_root = os.path.join(self.root, '_expanded')
+
+    def _tree_path(self, digest):
+        return os.path.join(self.trees_root, digest[:2], digest)
+
+    def expanded_tree(self, digest):
+        """Return the path of the pristine expanded archive with the given
+        checksum, or None if it is not in the cache."""
+        path = self._tree_path(digest)
+        return path if os.path.isdir(path) else None
+
+    def store_expanded_tree(self, digest, src):
+        """Add a pristine expanded archive to the cache.
+
+        Args:
+            digest (str): checksum of the archive
+            src (str): directory where the archive was expanded
+        """
+        dst = self._tree_path(digest)
+        if os.path.exists(dst):
+            return
+
+        mkdirp(os.path.dirname(dst))
+        tmp = tempfile.mkdtemp(prefix='.tmp-', dir=os.path.dirname(dst))
+        try:
+            replicate_tree(src, tmp)
+            # Another process may have stored the same tree meanwhile
+            os.rename(tmp, dst)
+        except (IOError, OSError) as e:
+            tty.debug('Could not cache the source tree {0}: {1}'.format(
+                src, str(e)))
+            shutil.rmtree(tmp, ignore_errors=True)
 
     def store(self, fetcher, relative_dest):
         # skip fetchers that aren't cachable
@@ -44,6 +44,7 @@
 import llnl.util.tty as tty
 import spack.binary_distribution as binary_distribution
 import spack.compilers
+import spack.config
 import spack.error
 import spack.hooks
 import spack.package
@@ -518,8 +519,16 @@ def log(pkg):
         # FIXME : this potentially catches too many things...
         tty.debug(e)
 
-    # Archive the whole stdout + stderr for the package
-    fs.install(pkg.log_path, pkg.install_log_path)
+    # Archive the whole stdout + stderr for the package, with the same
+    # compression as in the stage, and drop a log of another build that
+    # would be found instead
+    log_path = spack.package._install_log_file(
+        pkg.metadata_dir, pkg.log_path)
+    other_log = spack.package._install_log_file(
+        pkg.metadata_dir, '' if log_path.endswith('.gz') else '.gz')
+    if os.path.exists(other_log):
+        os.remove(other_log)
+    fs.install(pkg.log_path, log_path)
 
     # Archive the environment used for the build
     fs.install(pkg.env_path, pkg.install_env_path)
@@ -1390,6 +1399,13 @@ def install(self):
             pkg (Package): the package to be built and installed"""
         self._init_queue()
 
+        # Refresh the build cache indices without delaying the installation
+        use_cache = any(request.install_args.get('use_cache')
+                        for request in self.build_requests)
+        if use_cache and spack.config.get(
+                'config:binary_index_background_refresh', False):
+            binary_distribution.update_index_in_background()
+
         fail_fast_err = 'Terminating after first install failure'
         single_explicit_spec = len(self.build_requests) == 1
         failed_explicits = []
@@ -1607,6 +1623,7 @@ def install(self):
 
         # Cleanup, which includes releasing all of the read locks
         self._cleanup_all_tasks()
+        tty.debug('Lock statistics: {0}'.format(lk.statistics))
 
         # Ensure we properly report if one or more explicit specs failed
         if exists_errors or failed_explicits:
@@ -1693,8 +1710,10 @@ def build_process(pkg, kwargs):
 
                 # Spawn a daemon that reads from a pipe and redirects
                 # everything to log_path
+                echo_rate = spack.config.get('config:build_echo_rate', 0)
                 with log_output(pkg.log_path, echo, True,
-                                env=unmodified_env) as logger:
+                                env=unmodified_env,
+                                echo_rate=echo_rate) as logger:
 
                     for phase_name, phase_attr in zip(
                             pkg.phases, pkg._InstallPhase_phases):
@@ -11,8 +11,11 @@
 where spack is run is not connected to the internet, it allows spack
 to download packages directly from a mirror (e.g., on an intranet).
 """
+import functools
 import sys
 import os
+import threading
+import time
 import traceback
 import os.path
 import operator
@@ -401,7 +404,8 @@ def get_matching_versions(specs, num_versions=1):
     return matching
 
 
-def create(path, specs, skip_unstable_versions=False):
+def create(path, specs, skip_unstable_versions=False, jobs=None,
+           stats=None):
     """Create a directory to be used as a spack mirror, and fill it with
     package archives.
 
@@ -412,6 +416,10 @@ def create(path, specs, skip_unstable_versions=False):
         skip_unstable_versions: if true, this skips adding resources when
             they do not have a stable archive checksum (as determined by
             ``fetch_strategy.stable_target``)
+        jobs (int): maximum number of specs mirrored concurrently, defaults
+            to ``config:fetch_jobs``
+        stats (MirrorStats): if given, it is updated with the statistics of
+            the mirror creation, including transfer rates
 
     Return Value:
         Returns a tuple of lists: (present, mirrored, error)
@@ -422,7 +430,10 @@ def create(path, specs, skip_unstable_versions=False):
 
     This routine iterates through all known package versions, and
     it creates specs for those versions.  If the version satisfies any spec
-    in the specs list, it is downloaded and added to the mirror.
+    in the specs list, it is downloaded and added to the mirror. Resources
+    shared by several specs are added only once, and entries that are
+    already in the mirror are checked by size and checksum rather than
+    downloaded again.
     """
     parsed = url_util.parse(path)
     mirror_root = url_util.local_file_path(parsed)
@@ -445,12 +456,21 @@ def create(path, specs, skip_unstable_versions=False):
 
     mirror_cache = spack.caches.MirrorCache(
         mirror_root, skip_unstable_versions=skip_unstable_versions)
-    mirror_stats = MirrorStats()
+    mirror_stats = stats if stats is not None else MirrorStats()
+    stats_lock = threading.Lock()
+
+    def _add_spec(spec):
+        spec_stats = MirrorStats()
+        spec_stats.next_spec(spec)
+        _add_single_spec(spec, mirror_cache, spec_stats)
+        with stats_lock:
+            mirror_stats.update(spec_stats)
 
     # Iterate through packages and download all safe tarballs for each
-    for spec in specs:
-        mirror_stats.next_spec(spec)
-        _add_single_spec(spec, mirror_cache, mirror_stats)
+    unique_specs = OrderedDict((str(s), s) for s in specs)
+    fs.fetch_concurrently(
+        [functools.partial(_add_spec, spec) for spec in unique_specs.values()],
+        jobs=jobs)
 
     return mirror_stats.stats()
 
@@ -465,6 +485,13 @@ def __init__(self):
         self.added_resources = set()
         self.existing_resources = set()
 
+        #: Total size of the resources added, in bytes
+        self.bytes_added = 0
+        #: Maps hosts to the number of resources, bytes and seconds spent
+        #: fetching from them
+        self.hosts = {}
+        self.start_time = time.time()
+
     def next_spec(self, spec):
         self._tally_current_spec()
         self.current_spec = spec
@@ -489,12 +516,38 @@ def already_existed(self, resource):
         if resource not in self.added_resources:
             self.existing_resources.add(resource)
 
-    def added(self, resource):
+    def added(self, resource, size=0, seconds=0.0, url=None):
         self.added_resources.add(resource)
+        size = size or 0
+        self.bytes_added += size
+
+        host = 'unknown'
+        if url:
+            parsed = url_util.parse(url)
+            host = parsed.netloc or parsed.scheme
+        count, nbytes, elapsed = self.hosts.get(host, (0, 0, 0.0))
+        self.hosts[host] = (count + 1, nbytes + size, elapsed + seconds)
 
     def error(self):
         self.errors.add(self.current_spec)
 
+    def update(self, other):
+        """Merge the statistics of another MirrorStats into this one."""
+        other._tally_current_spec()
+        self.present.update(other.present)
+        self.new.update(other.new)
+        self.errors.update(other.errors)
+        self.bytes_added += other.bytes_added
+        for host, (count, nbytes, elapsed) in other.hosts.items():
+            c, b, e = self.hosts.get(host, (0, 0, 0.0))
+            self.hosts[host] = (c + count, b + nbytes, e + elapsed)
+
+    @property
+    def throughput(self):
+        """Bytes added to the mirror per second of wall clock time."""
+        elapsed = time.time() - self.start_time
+        return self.bytes_added / elapsed if elapsed > 0 else 0.0
+
 
 def _add_single_spec(spec, mirror, mirror_stats):
     tty.msg("Adding package {pkg} to mirror".format(
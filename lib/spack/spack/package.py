@@ -455,6 +455,30 @@ def remove_files_from_view(self, view, merge_map):
             view.remove_file(src, dst)
 
 
+def _build_log_file(directory):
+    """Return the path of the build log in ``directory``.
+
+    The log is compressed if a compressed log already exists there, or if
+    there is no log yet and ``config:compress_build_logs`` is set.
+    """
+    log = os.path.join(directory, _spack_build_logfile)
+    compressed = log + '.gz'
+    if os.path.exists(compressed) or (
+            not os.path.exists(log) and
+            spack.config.get('config:compress_build_logs', False)):
+        return compressed
+    return log
+
+
+def _install_log_file(directory, build_log):
+    """Return the path in ``directory`` to archive ``build_log`` to.
+
+    The archived log is compressed if, and only if, ``build_log`` is.
+    """
+    log = os.path.join(directory, _spack_build_logfile)
+    return log + '.gz' if build_log.endswith('.gz') else log
+
+
 def test_log_pathname(test_stage, spec):
     """Build the pathname of the test log file
 
@@ -756,53 +780,9 @@ def possible_dependencies(
         visited = {} if visited is None else visited
         missing = {} if missing is None else missing
 
-        visited.setdefault(cls.name, set())
-
-        for name, conditions in cls.dependencies.items():
-            # check whether this dependency could be of the type asked for
-            types = [dep.type for cond, dep in conditions.items()]
-            types = set.union(*types)
-            if not any(d in types for d in deptype):
-                continue
-
-            # expand virtuals if enabled, otherwise just stop at virtuals
-            if spack.repo.path.is_virtual(name):
-                if virtuals is not None:
-                    virtuals.add(name)
-                if expand_virtuals:
-                    providers = spack.repo.path.providers_for(name)
-                    dep_names = [spec.name for spec in providers]
-                else:
-                    visited.setdefault(cls.name, set()).add(name)
-                    visited.setdefault(name, set())
-                    continue
-            else:
-                dep_names = [name]
-
-            # add the dependency names to the visited dict
-            visited.setdefault(cls.name, set()).update(set(dep_names))
-
-            # recursively traverse dependencies
-            for dep_name in dep_names:
-                if dep_name in visited:
-                    continue
-
-                visited.setdefault(dep_name, set())
-
-                # skip the rest if not transitive
-                if not transitive:
-                    continue
-
-                try:
-                    dep_cls = spack.repo.path.get_pkg_class(dep_name)
-                except spack.repo.UnknownPackageError:
-                    # log unknown packages
-                    missing.setdefault(cls.name, set()).add(dep_name)
-                    continue
-
-                dep_cls.possible_dependencies(
-                    transitive, expand_virtuals, deptype, visited, missing,
-                    virtuals)
+        _possible_dependencies(
+            cls.name, spack.dependency.possible_deptypes(cls.dependencies),
+            transitive, expand_virtuals, deptype, visited, missing, virtuals)
 
         return visited
 
@@ -1064,7 +1044,7 @@ def log_path(self):
                 return old_log
 
         # Otherwise, return the current log path name.
-        return os.path.join(self.stage.path, _spack_build_logfile)
+        return _build_log_file(self.stage.path)
 
     @property
     def install_log_path(self):
@@ -1076,7 +1056,7 @@ def install_log_path(self):
                 return old_log
 
         # Otherwise, return the current install log path name.
-        return os.path.join(self.metadata_dir, _spack_build_logfile)
+        return _build_log_file(self.metadata_dir)
 
     @property
     def configure_args_path(self):
@@ -2445,11 +2425,16 @@ def all_urls(self):
                 urls.append(args['url'])
         return urls
 
-    def fetch_remote_versions(self, concurrency=128):
+    def fetch_remote_versions(self, concurrency=128, web_spider=None):
         """Find remote versions of this package.
 
         Uses ``list_url`` and any other URLs listed in the package file.
 
+        Args:
+            concurrency (int): maximum number of concurrent requests
+            web_spider (spack.util.web.Spider): spider shared with other
+                packages, if any
+
         Returns:
             dict: a dictionary mapping versions to URLs
         """
@@ -2458,7 +2443,8 @@ def fetch_remote_versions(self, concurrency=128):
 
         try:
             return spack.util.web.find_versions_of_archive(
-                self.all_urls, self.list_url, self.list_depth, concurrency
+                self.all_urls, self.list_url, self.list_depth, concurrency,
+                web_spider=web_spider
             )
         except spack.util.web.NoNetworkConnectionError as e:
             tty.die("Package.fetch_versions couldn't connect to:", e.url,
@@ -2656,6 +2642,71 @@ def flatten_dependencies(spec, flat_dir):
         dep_files.merge(flat_dir + '/' + name)
 
 
+def _possible_dependencies(pkg_name, dependencies, transitive,
+                           expand_virtuals, deptype, visited, missing,
+                           virtuals):
+    """Implementation of ``PackageBase.possible_dependencies``.
+
+    Dependencies of dependencies are looked up in the dependency index of
+    the repository, so that their package classes need not be loaded.
+
+    Args:
+        pkg_name (str): name of the package whose dependencies are visited
+        dependencies (dict): possible direct dependencies of the package,
+            mapped to the types they can have
+    """
+    visited.setdefault(pkg_name, set())
+
+    for name, dep_types in dependencies.items():
+        # check whether this dependency could be of the type asked for
+        if not any(d in dep_types for d in deptype):
+            continue
+
+        # expand virtuals if enabled, otherwise just stop at virtuals
+        if spack.repo.path.is_virtual(name):
+            if virtuals is not None:
+                virtuals.add(name)
+            if expand_virtuals:
+                providers = spack.repo.path.providers_for(name)
+                dep_names = [spec.name for spec in providers]
+            else:
+                visited.setdefault(pkg_name, set()).add(name)
+                visited.setdefault(name, set())
+                continue
+        else:
+            dep_names = [name]
+
+        # add the dependency names to the visited dict
+        visited.setdefault(pkg_name, set()).update(set(dep_names))
+
+        # recursively traverse dependencies
+        for dep_name in dep_names:
+            if dep_name in visited:
+                continue
+
+            visited.setdefault(dep_name, set())
+
+            # skip the rest if not transitive
+            if not transitive:
+                continue
+
+            if not spack.repo.path.exists(dep_name):
+                # log unknown packages
+                missing.setdefault(pkg_name, set()).add(dep_name)
+                continue
+
+            # load the package class only if it is not in the index
+            dep_deptypes = spack.repo.path.dependency_index.get(dep_name)
+            if dep_deptypes is None:
+                dep_cls = spack.repo.path.get_pkg_class(dep_name)
+                dep_deptypes = spack.dependency.possible_deptypes(
+                    dep_cls.dependencies)
+
+            _possible_dependencies(
+                dep_name, dep_deptypes, transitive, expand_virtuals, deptype,
+                visited, missing, virtuals)
+
+
 def possible_dependencies(*pkg_or_spec, **kwargs):
     """Get the possible dependencies of a number of packages.
 
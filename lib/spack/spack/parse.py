@@ -11,10 +11,29 @@
 
 import spack.error
 
+#: Characters with a special meaning for shlex.split(), besides whitespace
+_shell_special_re = re.compile(r'[\'"\\]')
+
+#: Words, for text that contains no quotes and no escapes
+_shell_word_re = re.compile(r'[^ \t\r\n]+')
+
+
+def split(text):
+    """Split text into words like ``shlex.split()``.
+
+    Text without quotes or escapes, which is most of it, is split
+    with a regular expression instead of going through shlex.
+    """
+    if _shell_special_re.search(text):
+        return shlex.split(text)
+    return _shell_word_re.findall(text)
+
 
 class Token(object):
     """Represents tokens; generated from input by lexer and fed to parse()."""
 
+    __slots__ = ('type', 'value', 'start', 'end')
+
     def __init__(self, type, value='', start=0, end=0):
         self.type = type
         self.value = value
@@ -143,7 +162,7 @@ def expect(self, id):
 
     def setup(self, text):
         if isinstance(text, string_types):
-            text = shlex.split(str(text))
+            text = split(str(text))
         self.text = text
         self.push_tokens(self.lexer.lex(text))
 
@@ -56,6 +56,12 @@ class _IndexBase(object):
     #: this attribute according to the semantics above.
     providers = None
 
+    #: Sorted providers of the virtual specs queried so far, keyed by the
+    #: fingerprint of the virtual spec. Derived classes need to reset this
+    #: whenever they modify ``providers``. Results are not cached if this
+    #: is None.
+    _candidates = None
+
     def providers_for(self, virtual_spec):
         """Return a list of specs of all packages that provide virtual
         packages with the supplied spec.
@@ -63,19 +69,31 @@ def providers_for(self, virtual_spec):
         Args:
             virtual_spec: virtual spec to be provided
         """
-        result = set()
         # Allow string names to be passed as input, as well as specs
         if isinstance(virtual_spec, six.string_types):
             virtual_spec = spack.spec.Spec(virtual_spec)
 
-        # Add all the providers that satisfy the vpkg spec.
-        if virtual_spec.name in self.providers:
-            for p_spec, spec_set in self.providers[virtual_spec.name].items():
-                if p_spec.satisfies(virtual_spec, deps=False):
-                    result.update(spec_set)
+        candidates = None
+        if self._candidates is not None:
+            key = virtual_spec._node_fingerprint()
+            candidates = self._candidates.get(key)
+
+        if candidates is None:
+            result = set()
+
+            # Add all the providers that satisfy the vpkg spec.
+            if virtual_spec.name in self.providers:
+                vpkg_map = self.providers[virtual_spec.name]
+                for p_spec, spec_set in vpkg_map.items():
+                    if p_spec.satisfies(virtual_spec, deps=False):
+                        result.update(spec_set)
+
+            candidates = sorted(result)
+            if self._candidates is not None:
+                self._candidates[key] = candidates
 
         # Return providers in order. Defensively copy.
-        return sorted(s.copy() for s in result)
+        return [s.copy() for s in candidates]
 
     def __contains__(self, name):
         return name in self.providers
@@ -149,6 +167,7 @@ def __init__(self, specs=None, restrict=False):
 
         self.restrict = restrict
         self.providers = {}
+        self._clear_candidates()
 
         for spec in specs:
             if not isinstance(spec, spack.spec.Spec):
@@ -173,6 +192,7 @@ def update(self, spec):
             return
 
         assert not spec.virtual, "cannot update an index using a virtual spec"
+        self._clear_candidates()
 
         pkg_provided = spec.package_class.provided
         for provided_spec, provider_specs in six.iteritems(pkg_provided):
@@ -208,6 +228,11 @@ def update(self, spec):
                         constrained.constrain(provider_spec)
                         provider_map[provided_spec].add(constrained)
 
+    def _clear_candidates(self):
+        # Restricted indexes hold the input specs, which callers may still
+        # modify, so their providers are sorted again on every query.
+        self._candidates = None if self.restrict else {}
+
     def to_json(self, stream=None):
         """Dump a JSON representation of this object.
 
@@ -227,6 +252,7 @@ def merge(self, other):
             other (ProviderIndex): provider index to be merged
         """
         other = other.copy()   # defensive copy.
+        self._clear_candidates()
 
         for pkg in other.providers:
             if pkg not in self.providers:
@@ -244,6 +270,7 @@ def merge(self, other):
 
     def remove_provider(self, pkg_name):
         """Remove a provider from the ProviderIndex."""
+        self._clear_candidates()
         empty_pkg_dict = []
         for pkg, pkg_dict in self.providers.items():
             empty_pset = []
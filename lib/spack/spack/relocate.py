@@ -17,6 +17,7 @@
 import spack.cmd
 import spack.repo
 import spack.spec
+import spack.util.elf as elf
 import spack.util.executable as executable
 
 
@@ -103,7 +104,9 @@ def _patchelf():
 def _elf_rpaths_for(path):
     """Return the RPATHs for an executable or a library.
 
-    The RPATHs are obtained by ``patchelf --print-rpath PATH``.
+    The RPATHs are read directly from the dynamic section of the file. If
+    the file cannot be parsed, they are obtained by
+    ``patchelf --print-rpath PATH``.
 
     Args:
         path (str): full path to the executable or library
@@ -111,6 +114,12 @@ def _elf_rpaths_for(path):
     Return:
         RPATHs as a list of strings.
     """
+    try:
+        return elf.get_rpaths(path)
+    except (elf.ElfParsingError, IOError, OSError) as e:
+        msg = 'Cannot read the RPATHs of {0} directly [{1}]'
+        tty.debug(msg.format(path, str(e)))
+
     # If we're relocating patchelf itself, use it
     patchelf_path = path if path.endswith("/bin/patchelf") else _patchelf()
     patchelf = executable.Executable(patchelf_path)
@@ -388,44 +397,107 @@ def macholib_get_paths(cur_path):
     return (rpaths, deps, ident)
 
 
-def _set_elf_rpaths(target, rpaths):
-    """Replace the original RPATH of the target with the paths passed
-    as arguments.
-
-    This function uses ``patchelf`` to set RPATHs.
+def _set_elf_rpaths_in_place(target, rpaths):
+    """Try to replace the RPATH of the target without calling ``patchelf``.
 
     Args:
         target: target executable. Must be an ELF object.
         rpaths: paths to be set in the RPATH
 
+    Returns:
+        True if the RPATH was set, False if ``patchelf`` is needed
+    """
+    try:
+        return elf.set_rpaths_in_place(target, rpaths)
+    except (elf.ElfParsingError, IOError, OSError) as e:
+        msg = 'Cannot set the RPATHs of {0} directly [{1}]'
+        tty.debug(msg.format(target, str(e)))
+    return False
+
+
+def _patchelf_set_rpaths(targets, rpaths):
+    """Set the same RPATH on all the targets with a single call to
+    ``patchelf``.
+
+    Args:
+        targets: target executables. Must be ELF objects.
+        rpaths: paths to be set in the RPATH
+
     Returns:
         A string concatenating the stdout and stderr of the call
-        to ``patchelf``
+        to ``patchelf``, or None if the call failed
     """
     # Join the paths using ':' as a separator
     rpaths_str = ':'.join(rpaths)
 
     # If we're relocating patchelf itself, make a copy and use it
     bak_path = None
-    if target.endswith("/bin/patchelf"):
-        bak_path = target + ".bak"
-        shutil.copy(target, bak_path)
+    if len(targets) == 1 and targets[0].endswith("/bin/patchelf"):
+        bak_path = targets[0] + ".bak"
+        shutil.copy(targets[0], bak_path)
 
     patchelf, output = executable.Executable(bak_path or _patchelf()), None
     try:
         # TODO: revisit the use of --force-rpath as it might be conditional
         # TODO: if we want to support setting RUNPATH from binary packages
-        patchelf_args = ['--force-rpath', '--set-rpath', rpaths_str, target]
+        patchelf_args = ['--force-rpath', '--set-rpath', rpaths_str]
+        patchelf_args.extend(targets)
         output = patchelf(*patchelf_args, output=str, error=str)
     except executable.ProcessError as e:
         msg = 'patchelf --force-rpath --set-rpath {0} failed with error {1}'
-        tty.warn(msg.format(target, e))
+        tty.warn(msg.format(' '.join(targets), e))
     finally:
         if bak_path and os.path.exists(bak_path):
             os.remove(bak_path)
     return output
 
 
+def _set_elf_rpaths(target, rpaths):
+    """Replace the original RPATH of the target with the paths passed
+    as arguments.
+
+    The RPATH is rewritten in place if the new value fits in the space
+    of the old one, otherwise this function uses ``patchelf``.
+
+    Args:
+        target: target executable. Must be an ELF object.
+        rpaths: paths to be set in the RPATH
+
+    Returns:
+        A string concatenating the stdout and stderr of the call
+        to ``patchelf``, an empty string if the RPATH was rewritten in
+        place, or None if ``patchelf`` failed
+    """
+    if _set_elf_rpaths_in_place(target, rpaths):
+        return ''
+    return _patchelf_set_rpaths([target], rpaths)
+
+
+def _set_elf_rpaths_for_many(targets_and_rpaths, batch_size=64):
+    """Replace the RPATHs of many ELF objects at once.
+
+    RPATHs that fit in the space of the original ones are rewritten in
+    place. The remaining targets are grouped by their new RPATH, so that
+    ``patchelf`` is called once per group instead of once per file.
+
+    Args:
+        targets_and_rpaths (list): list of (target, rpaths) tuples
+        batch_size (int): maximum number of files passed to a single
+            call to ``patchelf``
+    """
+    needs_patchelf = OrderedDict()
+    for target, rpaths in targets_and_rpaths:
+        # patchelf relocating itself needs to run from a copy
+        if target.endswith("/bin/patchelf"):
+            _set_elf_rpaths(target, rpaths)
+        elif not _set_elf_rpaths_in_place(target, rpaths):
+            needs_patchelf.setdefault(tuple(rpaths), []).append(target)
+
+    for rpaths, targets in needs_patchelf.items():
+        for i in range(0, len(targets), batch_size):
+            _patchelf_set_rpaths(targets[i:i + batch_size], list(rpaths))
+
+
 def needs_binary_relocation(m_type, m_subtype):
     """Returns True if the file with MIME type/subtype passed as arguments
     needs binary relocation, False otherwise.
@@ -622,8 +694,9 @@ def relocate_elf_binaries(binaries, orig_root, new_root,
                           new_prefixes, rel, orig_prefix, new_prefix):
     """Relocate the binaries passed as arguments by changing their RPATHs.
 
-    Use patchelf to get the original RPATHs and then replace them with
-    rpaths in the new directory layout.
+    Read the original RPATHs and then replace them with rpaths in the new
+    directory layout. RPATHs are modified in place when possible, and
+    ``patchelf`` is used only for the binaries where they need to grow.
 
     New RPATHs are determined from a dictionary mapping the prefixes in the
     old directory layout to the prefixes in the new directory layout if the
@@ -640,6 +713,7 @@ def relocate_elf_binaries(binaries, orig_root, new_root,
         orig_prefix (str): prefix where the executable was originally located
         new_prefix (str): prefix where we want to relocate the executable
     """
+    targets_and_rpaths = []
     for new_binary in binaries:
         orig_rpaths = _elf_rpaths_for(new_binary)
         # TODO: Can we deduce `rel` from the original RPATHs?
@@ -664,12 +738,14 @@ def relocate_elf_binaries(binaries, orig_root, new_root,
             )
             # check to see if relative rpaths are changed before rewriting
             if sorted(new_rpaths) != sorted(orig_rpaths):
-                _set_elf_rpaths(new_binary, new_rpaths)
+                targets_and_rpaths.append((new_binary, new_rpaths))
         else:
             new_rpaths = _transform_rpaths(
                 orig_rpaths, orig_root, new_prefixes
             )
-            _set_elf_rpaths(new_binary, new_rpaths)
+            targets_and_rpaths.append((new_binary, new_rpaths))
+
+    _set_elf_rpaths_for_many(targets_and_rpaths)
 
 
 def make_link_relative(new_links, orig_links):
@@ -716,13 +792,16 @@ def make_elf_binaries_relative(new_binaries, orig_binaries, orig_layout_root):
         orig_layout_root (str): path to be used as a base for making
             RPATHs relative
     """
+    targets_and_rpaths = []
     for new_binary, orig_binary in zip(new_binaries, orig_binaries):
         orig_rpaths = _elf_rpaths_for(new_binary)
         if orig_rpaths:
             new_rpaths = _make_relative(
                 orig_binary, orig_layout_root, orig_rpaths
             )
-            _set_elf_rpaths(new_binary, new_rpaths)
+            targets_and_rpaths.append((new_binary, new_rpaths))
+
+    _set_elf_rpaths_for_many(targets_and_rpaths)
 
 
 def raise_if_not_relocatable(binaries, allow_root):
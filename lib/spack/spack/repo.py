@@ -32,6 +32,7 @@
 import llnl.util.filesystem as fs
 import spack.config
 import spack.caches
+import spack.dependency
 import spack.error
 import spack.patch
 import spack.spec
@@ -266,6 +267,154 @@ def update_package(self, pkg_name):
             self._tag_dict[tag].append(package.name)
 
 
+class DependencyIndex(Mapping):
+    """Maps package names to their possible direct dependencies.
+
+    Each dependency is mapped to the list of types it can have, so that
+    possible dependencies can be found without loading package classes.
+    """
+
+    def __init__(self):
+        self._dependencies = {}
+
+    def to_json(self, stream):
+        sjson.dump({'dependencies': self._dependencies}, stream)
+
+    @staticmethod
+    def from_json(stream):
+        d = sjson.load(stream)
+
+        r = DependencyIndex()
+        r._dependencies.update(d['dependencies'])
+
+        return r
+
+    def __getitem__(self, item):
+        return self._dependencies[item]
+
+    def __iter__(self):
+        return iter(self._dependencies)
+
+    def __len__(self):
+        return len(self._dependencies)
+
+    def merge(self, other):
+        """Merge another index into this one.
+
+        Packages in ``other`` take precedence over the ones in this index.
+        """
+        self._dependencies.update(other._dependencies)
+
+    def update_package(self, pkg_name):
+        """Updates a package in the dependency index.
+
+        Args:
+            pkg_name (str): name of the package to be updated in the index
+
+        """
+        pkg_cls = path.get_pkg_class(pkg_name)
+        self._dependencies[pkg_cls.name] = spack.dependency.possible_deptypes(
+            pkg_cls.dependencies)
+
+
+class DependentsIndex(object):
+    """Maps package names to the packages that may depend on them.
+
+    This is the reverse of the ``DependencyIndex``. Each package that
+    depends on another one is mapped to the types of the dependency, so
+    that dependents can be found without loading package classes.
+    Virtual packages are looked up through the packages providing them.
+    """
+
+    def __init__(self):
+        #: dependency name -> {dependent name -> list of deptypes}
+        self._dependents = {}
+
+        #: indexed package name -> list of virtuals it provides
+        self._provides = {}
+
+    def to_json(self, stream):
+        sjson.dump({'dependents': self._dependents,
+                    'provides': self._provides}, stream)
+
+    @staticmethod
+    def from_json(stream):
+        d = sjson.load(stream)
+
+        r = DependentsIndex()
+        r._dependents.update(d['dependents'])
+        r._provides.update(d['provides'])
+
+        return r
+
+    def merge(self, other):
+        """Merge another index into this one.
+
+        Packages in ``other`` take precedence over the ones in this index.
+        """
+        for pkg_name in other._provides:
+            self._remove_package(pkg_name)
+
+        for dep_name, dependents in other._dependents.items():
+            self._dependents.setdefault(dep_name, {}).update(dependents)
+        self._provides.update(other._provides)
+
+    def _remove_package(self, pkg_name):
+        if pkg_name not in self._provides:
+            return
+
+        for dependents in self._dependents.values():
+            dependents.pop(pkg_name, None)
+        del self._provides[pkg_name]
+
+    def update_package(self, pkg_name):
+        """Updates a package in the dependents index.
+
+        Args:
+            pkg_name (str): name of the package to be updated in the index
+
+        """
+        pkg_cls = path.get_pkg_class(pkg_name)
+        self._remove_package(pkg_cls.name)
+
+        dependencies = spack.dependency.possible_deptypes(pkg_cls.dependencies)
+        for dep_name, dep_types in dependencies.items():
+            self._dependents.setdefault(dep_name, {})[pkg_cls.name] = dep_types
+        self._provides[pkg_cls.name] = sorted(
+            set(vspec.name for vspec in pkg_cls.provided))
+
+    def dependents_for(self, pkg_name, transitive=False, deptype='all'):
+        """Get the packages that may depend on a package.
+
+        Args:
+            pkg_name (str): name of a package or of a virtual package
+            transitive (bool): if True, also return dependents of dependents
+            deptype (str or tuple): only follow dependencies of these types
+
+        Returns:
+            (set): names of the dependents, not including ``pkg_name``
+        """
+        deptype = spack.dependency.canonical_deptype(deptype)
+
+        dependents = set()
+        queue = [pkg_name]
+        while queue:
+            name = queue.pop()
+            for dep_name in [name] + self._provides.get(name, []):
+                for dependent, dep_types in self._dependents.get(
+                        dep_name, {}).items():
+                    if dependent in dependents:
+                        continue
+                    if not any(t in dep_types for t in deptype):
+                        continue
+                    dependents.add(dependent)
+                    if transitive:
+                        queue.append(dependent)
+
+        dependents.discard(pkg_name)
+        return dependents
+
+
 @six.add_metaclass(abc.ABCMeta)
 class Indexer(object):
     """Adaptor for indexes that need to be generated when repos are updated."""
@@ -340,6 +489,36 @@ def write(self, stream):
         self.index.to_json(stream)
 
 
+class DependencyIndexer(Indexer):
+    """Lifecycle methods for a DependencyIndex on a Repo."""
+    def _create(self):
+        return DependencyIndex()
+
+    def read(self, stream):
+        self.index = DependencyIndex.from_json(stream)
+
+    def update(self, pkg_fullname):
+        self.index.update_package(pkg_fullname)
+
+    def write(self, stream):
+        self.index.to_json(stream)
+
+
+class DependentsIndexer(Indexer):
+    """Lifecycle methods for a DependentsIndex on a Repo."""
+    def _create(self):
+        return DependentsIndex()
+
+    def read(self, stream):
+        self.index = DependentsIndex.from_json(stream)
+
+    def update(self, pkg_fullname):
+        self.index.update_package(pkg_fullname)
+
+    def write(self, stream):
+        self.index.to_json(stream)
+
+
 class PatchIndexer(Indexer):
     """Lifecycle methods for patch cache."""
     def _create(self):
@@ -474,6 +653,8 @@ def __init__(self, *repos):
         self._all_package_names = None
         self._provider_index = None
         self._patch_index = None
+        self._dependency_index = None
+        self._dependents_index = None
 
         # Add each repo to this path.
         for repo in repos:
@@ -586,6 +767,26 @@ def patch_index(self):
 
         return self._patch_index
 
+    @property
+    def dependency_index(self):
+        """Merged DependencyIndex from all Repos in the RepoPath."""
+        if self._dependency_index is None:
+            self._dependency_index = DependencyIndex()
+            for repo in reversed(self.repos):
+                self._dependency_index.merge(repo.dependency_index)
+
+        return self._dependency_index
+
+    @property
+    def dependents_index(self):
+        """Merged DependentsIndex from all Repos in the RepoPath."""
+        if self._dependents_index is None:
+            self._dependents_index = DependentsIndex()
+            for repo in reversed(self.repos):
+                self._dependents_index.merge(repo.dependents_index)
+
+        return self._dependents_index
+
     @autospec
     def providers_for(self, vpkg_spec):
         providers = self.provider_index.providers_for(vpkg_spec)
@@ -977,6 +1178,8 @@ def index(self):
             self._repo_index.add_indexer('providers', ProviderIndexer())
             self._repo_index.add_indexer('tags', TagIndexer())
             self._repo_index.add_indexer('patches', PatchIndexer())
+            self._repo_index.add_indexer('dependencies', DependencyIndexer())
+            self._repo_index.add_indexer('dependents', DependentsIndexer())
         return self._repo_index
 
     @property
@@ -994,6 +1197,16 @@ def patch_index(self):
         """Index of patches and packages they're defined on."""
         return self.index['patches']
 
+    @property
+    def dependency_index(self):
+        """Index of the possible direct dependencies of each package."""
+        return self.index['dependencies']
+
+    @property
+    def dependents_index(self):
+        """Index of the packages that may depend on each package."""
+        return self.index['dependents']
+
     @autospec
     def providers_for(self, vpkg_spec):
         providers = self.provider_index.providers_for(vpkg_spec)
@@ -7,9 +7,11 @@
 import codecs
 import collections
 import functools
+import gzip
 import time
 import traceback
 import os
+from contextlib import closing
 
 import llnl.util.lang
 import spack.build_environment
@@ -41,7 +43,12 @@ def fetch_log(pkg, do_fn, dir):
         'do_test': os.path.join(dir, TestSuite.test_log_name(pkg.spec)),
     }
     try:
-        with codecs.open(log_files[do_fn.__name__], 'r', 'utf-8') as f:
+        log_file = log_files[do_fn.__name__]
+        if log_file.endswith('.gz'):
+            f = codecs.getreader('utf-8')(gzip.open(log_file, 'rb'))
+        else:
+            f = codecs.open(log_file, 'r', 'utf-8')
+        with closing(f):
             return ''.join(f.readlines())
     except Exception:
         return 'Cannot open log for {0}'.format(
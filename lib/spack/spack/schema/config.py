@@ -73,6 +73,18 @@
             'source_cache': {'type': 'string'},
             'misc_cache': {'type': 'string'},
             'connect_timeout': {'type': 'integer', 'minimum': 0},
+            'url_fetch_method': {
+                'type': 'string',
+                'enum': ['urllib', 'curl']
+            },
+            'fetch_jobs': {'type': 'integer', 'minimum': 1},
+            'spider_cache_ttl': {'type': 'integer', 'minimum': 0},
+            'spider_host_jobs': {'type': 'integer', 'minimum': 1},
+            'git_cache': {'type': 'boolean'},
+            'source_tree_cache': {
+                'type': 'string',
+                'enum': ['none', 'copy']
+            },
             'verify_ssl': {'type': 'boolean'},
             'suppress_gpg_warnings': {'type': 'boolean'},
             'install_missing_compilers': {'type': 'boolean'},
@@ -82,6 +94,8 @@
             'dirty': {'type': 'boolean'},
             'build_language': {'type': 'string'},
             'build_jobs': {'type': 'integer', 'minimum': 1},
+            'compress_build_logs': {'type': 'boolean'},
+            'build_echo_rate': {'type': 'integer', 'minimum': 0},
             'ccache': {'type': 'boolean'},
             'concretizer': {
                 'type': 'string',
@@ -96,6 +110,8 @@
             },
             'allow_sgid': {'type': 'boolean'},
             'binary_index_root': {'type': 'string'},
+            'binary_index_ttl': {'type': 'integer', 'minimum': 0},
+            'binary_index_background_refresh': {'type': 'boolean'},
         },
     },
 }
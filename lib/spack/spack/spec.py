@@ -87,6 +87,7 @@
 
 import six
 import ruamel.yaml as yaml
+from ordereddict_backport import OrderedDict
 
 import llnl.util.filesystem as fs
 import llnl.util.lang as lang
@@ -198,6 +199,10 @@ def __call__(self, match):
 
 @lang.key_ordering
 class ArchSpec(object):
+    __slots__ = ('_platform', '_os', '_target')
+
+    __reduce_ex__ = lang.reduce_ex_with_slots
+
     def __init__(self, spec_or_platform_tuple=(None, None, None)):
         """ Architecture specification a package should be built with.
 
@@ -219,7 +224,7 @@ def __init__(self, spec_or_platform_tuple=(None, None, None)):
         # and construct an ArchSpec
         def _string_or_none(s):
             if s and s != 'None':
-                return str(s)
+                return lang.shared(str(s))
             return None
 
         if isinstance(spec_or_platform_tuple, six.string_types):
@@ -467,8 +472,11 @@ def constrain(self, other):
 
     def copy(self):
         """Copy the current instance and returns the clone."""
+        # The fields of self are already validated, so skip the setters
         clone = ArchSpec.__new__(ArchSpec)
-        clone._dup(self)
+        clone._platform = self._platform
+        clone._os = self._os
+        clone._target = self._target
         return clone
 
     @property
@@ -533,6 +541,10 @@ class CompilerSpec(object):
        versions that a package should be built with.  CompilerSpecs have a
        name and a version list. """
 
+    __slots__ = ('name', 'versions')
+
+    __reduce_ex__ = lang.reduce_ex_with_slots
+
     def __init__(self, *args):
         nargs = len(args)
         if nargs == 1:
@@ -628,7 +640,8 @@ def to_dict(self):
     @staticmethod
     def from_dict(d):
         d = d['compiler']
-        return CompilerSpec(d['name'], vn.VersionList.from_dict(d))
+        return CompilerSpec(
+            lang.shared(d['name']), vn.VersionList.from_dict(d))
 
     def __str__(self):
         out = self.name
@@ -657,10 +670,14 @@ class DependencySpec(object):
     - deptypes: list of strings, representing dependency relationships.
     """
 
+    __slots__ = ('parent', 'spec', 'deptypes')
+
+    __reduce_ex__ = lang.reduce_ex_with_slots
+
     def __init__(self, parent, spec, deptypes):
         self.parent = parent
         self.spec = spec
-        self.deptypes = tuple(sorted(set(deptypes)))
+        self.deptypes = lang.shared(tuple(sorted(set(deptypes))))
 
     def update_deptypes(self, deptypes):
         deptypes = set(deptypes)
@@ -696,6 +713,8 @@ def __str__(self):
 
 class FlagMap(lang.HashableMap):
 
+    __slots__ = ('spec',)
+
     def __init__(self, spec):
         super(FlagMap, self).__init__()
         self.spec = spec
@@ -736,8 +755,7 @@ def valid_compiler_flags():
 
     def copy(self):
         clone = FlagMap(None)
-        for name, value in self.items():
-            clone[name] = value
+        clone.dict = self.dict.copy()
         return clone
 
     def _cmp_key(self):
@@ -756,6 +774,8 @@ class DependencyMap(lang.HashableMap):
     """Each spec has a DependencyMap containing specs for its dependencies.
        The DependencyMap is keyed by name. """
 
+    __slots__ = ()
+
     def __str__(self):
         return "{deps: %s}" % ', '.join(str(d) for d in sorted(self.values()))
 
@@ -1012,8 +1032,19 @@ def __init__(self, spec, name, query_parameters):
 @lang.key_ordering
 class Spec(object):
 
-    #: Cache for spec's prefix, computed lazily in the corresponding property
-    _prefix = None
+    # Installed databases hold many thousands of specs, so their attributes
+    # live in slots. The __dict__ slot keeps specs open to attributes set by
+    # packages (e.g. ``spec.mpicc``), and is only allocated when they do.
+    __slots__ = (
+        'name', 'versions', 'variants', 'architecture', 'compiler',
+        'compiler_flags', '_dependents', '_dependencies', 'namespace',
+        '_hash', '_build_hash', '_full_hash', '_cmp_key_cache', '_package',
+        '_normal', '_concrete', 'external_path', 'external_modules',
+        '_hashes_final', 'extra_attributes', '_prefix',
+        '__dict__', '__weakref__'
+    )
+
+    __reduce_ex__ = lang.reduce_ex_with_slots
 
     def __init__(self, spec_like=None,
                  normal=False, concrete=False, external_path=None,
@@ -1034,6 +1065,8 @@ def __init__(self, spec_like=None,
         self._full_hash = full_hash
 
         """
+        # Cache for spec's prefix, computed lazily in the prefix property
+        self._prefix = None
 
         # Copy if spec_like is a Spec.
         if isinstance(spec_like, Spec):
@@ -1082,15 +1115,61 @@ def __init__(self, spec_like=None,
         self.extra_attributes = None
 
         if isinstance(spec_like, six.string_types):
-            spec_list = SpecParser(self).parse(spec_like)
-            if len(spec_list) > 1:
-                raise ValueError("More than one spec in string: " + spec_like)
-            if len(spec_list) < 1:
-                raise ValueError("String contains no specs: " + spec_like)
+            # Only specs without any of the attributes above are cached
+            cache = not (normal or concrete or external_path or
+                         external_modules or full_hash)
+            self._parse(spec_like, cache)
 
         elif spec_like is not None:
             raise TypeError("Can't make spec out of %s" % type(spec_like))
 
+    def _parse(self, string, cache=True):
+        """Parse a single spec from a string into this spec.
+
+        Parsed specs are kept in a least-recently-used cache, so that
+        parsing a string again only copies the spec parsed before.
+
+        Args:
+            string (str): string to be parsed
+            cache (bool): whether to use the cache of parsed specs
+        """
+        entry = _parsed_specs.pop(string, None) if cache else None
+        if entry is not None:
+            spec, platform = entry
+            # Architectures are completed with the current platform
+            if platform is None or \
+               platform == spack.architecture.platform().name:
+                # Parsed specs have only direct dependencies, so they are
+                # copied node by node rather than by traversing the DAG
+                self._dup(spec, deps=False)
+                for dspec in spec._dependencies.values():
+                    self._add_dependency(
+                        dspec.spec.copy(deps=False), dspec.deptypes)
+                _parsed_specs[string] = entry
+                return
+
+        parser = SpecParser(self)
+        spec_list = parser.parse(string)
+        if len(spec_list) > 1:
+            raise ValueError("More than one spec in string: " + string)
+        if len(spec_list) < 1:
+            raise ValueError("String contains no specs: " + string)
+
+        # Specs looked up by hash or read from files can change, and
+        # anonymous or indirect dependencies aren't copied as above
+        nodes = list(self.traverse())
+        if not cache or not parser.cacheable or any(
+                node.name is None or node._dependencies
+                for node in nodes[1:]):
+            return
+
+        platform = None
+        if any(node.architecture for node in nodes):
+            platform = spack.architecture.platform().name
+        _parsed_specs[string] = (self.copy(), platform)
+        if len(_parsed_specs) > parsed_specs_cache_size:
+            _parsed_specs.popitem(last=False)
+
     @staticmethod
     def _format_module_list(modules):
         """Return a module list that is suitable for YAML serialization
@@ -1354,7 +1433,7 @@ def traverse_edges(self, visited=None, d=0, deptype='all',
 
         """
         # get initial values for kwargs
-        depth = kwargs.get('depth', False)
+        with_depth = kwargs.get('depth', False)
         key_fun = kwargs.get('key', id)
         if isinstance(key_fun, six.string_types):
             key_fun = operator.attrgetter(key_fun)
@@ -1375,53 +1454,64 @@ def validate(name, val, allowed_values):
 
         if visited is None:
             visited = set()
-        key = key_fun(self)
 
-        # Node traversal does not yield visited nodes.
-        if key in visited and cover == 'nodes':
-            return
+        if direction == 'children':
+            neighbors = operator.attrgetter('_dependencies')
+            succ = operator.attrgetter('spec')
+        else:
+            neighbors = operator.attrgetter('_dependents')
+            succ = operator.attrgetter('parent')
 
-        def return_val(dspec):
+        def return_val(depth, spec, dspec):
             if not dspec:
                 # make a fake dspec for the root.
                 if direction == 'parents':
-                    dspec = DependencySpec(self, None, ())
+                    dspec = DependencySpec(spec, None, ())
                 else:
-                    dspec = DependencySpec(None, self, ())
-            return (d, dspec) if depth else dspec
-
-        yield_me = yield_root or d > 0
-
-        # Preorder traversal yields before successors
-        if yield_me and order == 'pre':
-            yield return_val(dep_spec)
-
-        # Edge traversal yields but skips children of visited nodes
-        if not (key in visited and cover == 'edges'):
-            visited.add(key)
-
-            # This code determines direction and yields the children/parents
-            if direction == 'children':
-                where = self._dependencies
-                succ = lambda dspec: dspec.spec
-            elif direction == 'parents':
-                where = self._dependents
-                succ = lambda dspec: dspec.parent
-            else:
-                raise ValueError('Invalid traversal direction: %s' % direction)
+                    dspec = DependencySpec(None, spec, ())
+            return (depth, dspec) if with_depth else dspec
+
+        # The traversal is iterative to avoid yielding through a generator
+        # per level of the DAG. Each entry of the stack is a node that was
+        # entered, with the edges to its successors that remain to be
+        # followed (None if its successors are skipped).
+        stack = []
+        spec, depth, dspec = self, d, dep_spec
+        while True:
+            if spec is not None:
+                key = key_fun(spec)
+
+                # Node traversal does not yield visited nodes.
+                if not (key in visited and cover == 'nodes'):
+                    # Preorder traversal yields before successors
+                    if order == 'pre' and (yield_root or depth > 0):
+                        yield return_val(depth, spec, dspec)
+
+                    # Edge traversal yields but skips children of visited
+                    # nodes
+                    edges = None
+                    if not (key in visited and cover == 'edges'):
+                        visited.add(key)
+                        edges = iter(sorted(neighbors(spec).items()))
+                    stack.append((spec, depth, dspec, edges))
+                spec = None
+
+            if not stack:
+                break
 
-            for name, dspec in sorted(where.items()):
+            parent, depth, parent_dspec, edges = stack[-1]
+            for _, dspec in edges or ():
                 dt = dspec.deptypes
-                if dt and not any(d in deptype for d in dt):
+                if dt and not any(t in deptype for t in dt):
                     continue
+                spec, depth = succ(dspec), depth + 1
+                break
+            else:
+                stack.pop()
 
-                for child in succ(dspec).traverse_edges(
-                        visited, d + 1, deptype, dspec, **kwargs):
-                    yield child
-
-        # Postorder traversal yields after successors
-        if yield_me and order == 'post':
-            yield return_val(dep_spec)
+                # Postorder traversal yields after successors
+                if order == 'post' and (yield_root or depth > 0):
+                    yield return_val(depth, parent, parent_dspec)
 
     @property
     def short_spec(self):
@@ -1780,7 +1870,9 @@ def from_node_dict(node):
         node = node[name]
 
         spec = Spec(name, full_hash=node.get('full_hash', None))
-        spec.namespace = node.get('namespace', None)
+        # There are many specs with the same name and namespace in a database
+        spec.name = lang.shared(spec.name)
+        spec.namespace = lang.shared(node.get('namespace', None))
         spec._hash = node.get('hash', None)
         spec._build_hash = node.get('build_hash', None)
 
@@ -2286,7 +2378,6 @@ def feq(cfield, sfield):
                 if spec._dup(replacement, deps=False, cleardeps=False):
                     changed = True
 
-                spec._dependencies.owner = spec
                 self_index.update(spec)
                 done = False
                 break
@@ -3137,6 +3228,12 @@ def satisfies(self, other, deps=True, strict=False, strict_deps=False):
         """
         other = self._autospec(other)
 
+        # Specs with different names can only match if other is a virtual
+        # provided by self. Check that before looking up any package.
+        if (self.name != other.name and self.name and other.name and
+                not other.virtual):
+            return False
+
         # The only way to satisfy a concrete spec is to match its hash exactly.
         if other.concrete:
             return self.concrete and self.dag_hash() == other.dag_hash()
@@ -3219,11 +3316,30 @@ def satisfies_dependencies(self, other, strict=False):
         if not other._dependencies:
             return True
 
-        if strict:
-            # if we have no dependencies, we can't satisfy any constraints.
-            if not self._dependencies:
-                return False
+        # If we have no dependencies, we can't satisfy any constraints when
+        # strict. If not strict, this spec *could* eventually satisfy them.
+        if not self._dependencies:
+            return not strict
+
+        # The result only depends on the nodes of both specs and on the
+        # packages in the repository, so it is cached by fingerprint.
+        global _satisfied_dependencies_repo
+        if _satisfied_dependencies_repo is not spack.repo.path:
+            _satisfied_dependencies.clear()
+            _satisfied_dependencies_repo = spack.repo.path
+
+        key = (self._fingerprint(), other._fingerprint(), strict)
+        result = _satisfied_dependencies.pop(key, None)
+        if result is None:
+            result = self._satisfies_dependencies(other, strict)
+
+        _satisfied_dependencies[key] = result
+        if len(_satisfied_dependencies) > satisfied_dependencies_cache_size:
+            _satisfied_dependencies.popitem(last=False)
+        return result
 
+    def _satisfies_dependencies(self, other, strict):
+        if strict:
             # use list to prevent double-iteration
             selfdeps = list(self.traverse(root=False))
             otherdeps = list(other.traverse(root=False))
@@ -3231,11 +3347,6 @@ def satisfies_dependencies(self, other, strict=False):
                        for dep in otherdeps):
                 return False
 
-        elif not self._dependencies:
-            # if not strict, this spec *could* eventually satisfy the
-            # constraints on other.
-            return True
-
         # Handle first-order constraints directly
         for name in self.common_dependencies(other):
             if not self[name].satisfies(other[name], deps=False):
@@ -3402,21 +3513,36 @@ def _dup(self, other, deps=True, cleardeps=True, caches=None):
 
     def _dup_deps(self, other, deptypes, caches):
         new_specs = {self.name: self}
-        for dspec in other.traverse_edges(cover='edges',
-                                          root=False):
+
+        # Visit each edge once, in the same order as
+        # traverse_edges(cover='edges'), but without nested generators.
+        visited = set([id(other)])
+        stack = [iter(sorted(other._dependencies.items()))]
+        while stack:
+            item = next(stack[-1], None)
+            if item is None:
+                stack.pop()
+                continue
+
+            dspec = item[1]
+            parent, child = dspec.parent, dspec.spec
+            if id(child) not in visited:
+                visited.add(id(child))
+                stack.append(iter(sorted(child._dependencies.items())))
+
             if (dspec.deptypes and
                 not any(d in deptypes for d in dspec.deptypes)):
                 continue
 
-            if dspec.parent.name not in new_specs:
-                new_specs[dspec.parent.name] = dspec.parent.copy(
+            if parent.name not in new_specs:
+                new_specs[parent.name] = parent.copy(
                     deps=False, caches=caches)
-            if dspec.spec.name not in new_specs:
-                new_specs[dspec.spec.name] = dspec.spec.copy(
+            if child.name not in new_specs:
+                new_specs[child.name] = child.copy(
                     deps=False, caches=caches)
 
-            new_specs[dspec.parent.name]._add_dependency(
-                new_specs[dspec.spec.name], dspec.deptypes)
+            new_specs[parent.name]._add_dependency(
+                new_specs[child.name], dspec.deptypes)
 
     def copy(self, deps=True, **kwargs):
         """Make a copy of this spec.
@@ -3447,6 +3573,7 @@ def copy(self, deps=True, **kwargs):
 
         """
         clone = Spec.__new__(Spec)
+        clone._prefix = None
         clone._dup(self, deps=deps, **kwargs)
         return clone
 
@@ -3605,6 +3732,46 @@ def _cmp_key(self):
             self._cmp_key_cache = key
         return key
 
+    def _node_fingerprint(self):
+        """Immutable key for the constraints on *this node* alone.
+
+        Concrete nodes are identified by their DAG hash, abstract nodes
+        by the values of every attribute that ``satisfies()`` compares.
+        """
+        if self._concrete:
+            return self.dag_hash()
+
+        arch = self.architecture
+        compiler = self.compiler
+        return (
+            self.name,
+            self.namespace,
+            tuple(self.versions),
+            tuple(sorted((name, type(v), v._value)
+                         for name, v in self.variants.items())),
+            (arch.platform, arch.os, arch.target) if arch else None,
+            (compiler.name, tuple(compiler.versions)) if compiler else None,
+            tuple(sorted((name, tuple(flags))
+                         for name, flags in self.compiler_flags.items())),
+        )
+
+    def _fingerprint(self):
+        """Immutable key for the constraints on every node of this spec.
+
+        Unlike ``_cmp_key()`` this is a snapshot that does not change when
+        the spec is modified later. It describes the nodes and the edges
+        between them, since strict checks of ``satisfies_dependencies()``
+        also compare the dependencies of each node.
+        """
+        nodes = []
+        edges = []
+        for s in self.traverse():
+            nodes.append(s._node_fingerprint())
+            for dspec in s._dependencies.values():
+                edges.append((s.name or '', dspec.spec.name or '',
+                              tuple(sorted(dspec.deptypes))))
+        return tuple(nodes), tuple(sorted(edges))
+
     def colorized(self):
         return colorize_spec(self)
 
@@ -4233,44 +4400,105 @@ def __missing__(self, key):
 spec_id_re = r'\w[\w.-]*'
 
 
-class SpecLexer(spack.parse.Lexer):
+class SpecLexer(object):
+    """Parses tokens that make up spack specs.
 
-    """Parses tokens that make up spack specs."""
+    Each word is tokenized in a single pass, by matching one regular
+    expression with an alternative for each kind of token. The text
+    following an ``=`` is a value (``VAL``), up to the end of the line,
+    which is in the next word if the ``=`` ends the current one.
+    """
+
+    #: Alternatives for each token type, in the order they are tried.
+    #: Whitespace is skipped.
+    lexicon = [
+        (r'\^', DEP),
+        (r'\@', AT),
+        (r'\:', COLON),
+        (r'\,', COMMA),
+        (r'\+', ON),
+        (r'\-', OFF),
+        (r'\~', OFF),
+        (r'\%', PCT),
+        (r'\=', EQ),
+
+        # Filenames match before identifiers, so no initial filename
+        # component is parsed as a spec (e.g., in subdir/spec.yaml)
+        (r'[/\w.-]*/[/\w/-]+\.yaml[^\b]*', FILE),
+
+        # Hash match after filename. No valid filename can be a hash
+        # (files end w/.yaml), but a hash can match a filename prefix.
+        (r'/', HASH),
+
+        # Identifiers match after filenames and hashes.
+        (spec_id_re, ID),
+
+        (r'\s+', None)]
 
     def __init__(self):
-        super(SpecLexer, self).__init__([
-            (r'\^', lambda scanner, val: self.token(DEP,   val)),
-            (r'\@', lambda scanner, val: self.token(AT,    val)),
-            (r'\:', lambda scanner, val: self.token(COLON, val)),
-            (r'\,', lambda scanner, val: self.token(COMMA, val)),
-            (r'\+', lambda scanner, val: self.token(ON,    val)),
-            (r'\-', lambda scanner, val: self.token(OFF,   val)),
-            (r'\~', lambda scanner, val: self.token(OFF,   val)),
-            (r'\%', lambda scanner, val: self.token(PCT,   val)),
-            (r'\=', lambda scanner, val: self.token(EQ,    val)),
-
-            # Filenames match before identifiers, so no initial filename
-            # component is parsed as a spec (e.g., in subdir/spec.yaml)
-            (r'[/\w.-]*/[/\w/-]+\.yaml[^\b]*',
-             lambda scanner, v: self.token(FILE, v)),
-
-            # Hash match after filename. No valid filename can be a hash
-            # (files end w/.yaml), but a hash can match a filename prefix.
-            (r'/', lambda scanner, val: self.token(HASH, val)),
-
-            # Identifiers match after filenames and hashes.
-            (spec_id_re, lambda scanner, val: self.token(ID, val)),
-
-            (r'\s+', lambda scanner, val: None)],
-            [EQ],
-            [(r'[\S].*', lambda scanner, val: self.token(VAL,    val)),
-             (r'\s+', lambda scanner, val: None)],
-            [VAL])
+        self.token_re = re.compile(
+            '|'.join('({0})'.format(regex) for regex, _ in self.lexicon))
+        # Token types, indexed by the group that matched
+        self.types = [None] + [type for _, type in self.lexicon]
+        self.value_re = re.compile(r'(\S.*)|\s+')
+
+    def lex(self, text):
+        tokens = []
+        in_value = False
+
+        for word in text:
+            # Token positions are relative to the start of the word, or to
+            # the end of the last key-value pair in it.
+            start = pos = 0
+            while pos < len(word):
+                if in_value:
+                    match = self.value_re.match(word, pos)
+                    if match.lastindex:
+                        tokens.append(spack.parse.Token(
+                            VAL, match.group(),
+                            match.start() - start, match.end() - start))
+                        in_value = False
+                        start = match.end()
+                else:
+                    match = self.token_re.match(word, pos)
+                    if not match:
+                        raise spack.parse.LexError(
+                            "Invalid character", word[start:], pos - start)
+
+                    type = self.types[match.lastindex]
+                    if type is not None:
+                        tokens.append(spack.parse.Token(
+                            type, match.group(),
+                            match.start() - start, match.end() - start))
+                    if type == EQ:
+                        in_value = True
+                        start = match.end()
+                pos = match.end()
+
+        return tokens
 
 
 # Lexer is always the same for every parser.
 _lexer = SpecLexer()
 
+#: Maximum number of specs kept in the cache of parsed specs
+parsed_specs_cache_size = 4096
+
+#: Cache of parsed specs, keyed by string, least recently used first.
+#: The values are pairs of a spec and the name of the platform its
+#: architecture was completed with, if it has any.
+_parsed_specs = OrderedDict()
+
+#: Maximum number of results kept in the satisfies_dependencies() cache
+satisfied_dependencies_cache_size = 2048
+
+#: Results of satisfies_dependencies(), keyed by the fingerprints of both
+#: specs and strictness, least recently used first.
+_satisfied_dependencies = OrderedDict()
+
+#: Repository path the cached results were computed with
+_satisfied_dependencies_repo = None
+
 
 class SpecParser(spack.parse.Parser):
 
@@ -4286,6 +4514,9 @@ def __init__(self, initial_spec=None):
         self.previous = None
         self._initial = initial_spec
 
+        #: False if the parsed specs depend on the database or on files
+        self.cacheable = True
+
     def do_parse(self):
         specs = []
 
@@ -4432,6 +4663,7 @@ def spec_from_file(self):
         if not os.path.exists(path):
             raise NoSuchSpecFileError("No such spec file: '{0}'".format(path))
 
+        self.cacheable = False
         with open(path) as f:
             return Spec.from_yaml(f)
 
@@ -4443,6 +4675,7 @@ def spec_by_hash(self):
         self.expect(ID)
 
         dag_hash = self.token.value
+        self.cacheable = False
         matches = spack.store.db.get_by_hash(dag_hash)
         if not matches:
             raise NoSuchHashError(dag_hash)
@@ -4621,6 +4854,44 @@ def save_dependency_spec_yamls(
             fd.write(dep_spec.to_yaml(hash=ht.build_hash))
 
 
+def specs_to_node_dicts(specs, hash=ht.build_hash):
+    """Returns the node dicts of many concrete specs and their dependencies,
+       keyed by hash. Nodes shared by several specs are serialized only once,
+       and their subtrees are not traversed again. Each node dict also
+       records the DAG hash of its node."""
+    hash_of = lambda s: s._cached_hash(hash)
+
+    node_dicts = {}
+    visited = set()
+    for spec in specs:
+        for s in spec.traverse(deptype=hash.deptype, key=hash_of,
+                               visited=visited):
+            node = s.to_node_dict(hash=hash)
+            node[s.name]['hash'] = s.dag_hash()
+            node_dicts[hash_of(s)] = node
+
+    return node_dicts
+
+
+def specs_from_node_dicts(node_dicts, hash=None):
+    """Reads specs written by ``specs_to_node_dicts()`` and returns them
+       keyed like the input, with their dependencies attached. If ``hash``
+       is given, the keys are trusted as hashes of that type and are stored
+       on the specs, instead of being recomputed when they are needed."""
+    specs = {}
+    for key, node in node_dicts.items():
+        spec = Spec.from_node_dict(node)
+        if hash:
+            setattr(spec, hash.attr, key)
+        specs[key] = spec
+
+    for key, node in node_dicts.items():
+        for _, dep_key, deptypes in Spec.dependencies_from_node_dict(node):
+            specs[key]._add_dependency(specs[dep_key], deptypes)
+
+    return specs
+
+
 def base32_prefix_bits(hash_string, bits):
     """Return the first <bits> bits of a base32 string as an integer."""
     if bits > len(hash_string) * 5:
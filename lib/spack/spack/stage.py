@@ -6,6 +6,7 @@
 from __future__ import print_function
 
 import errno
+import functools
 import getpass
 import glob
 import hashlib
@@ -14,6 +15,8 @@
 import stat
 import sys
 import tempfile
+import threading
+import time
 from six import string_types
 from six import iteritems
 from typing import Dict  # novm
@@ -569,17 +572,30 @@ def cache_mirror(self, mirror, stats):
             not fs.stable_target(self.default_fetcher)):
             return
 
-        absolute_storage_path = os.path.join(
-            mirror.root, self.mirror_paths.storage_path)
+        storage_path = self.mirror_paths.storage_path
+        absolute_storage_path = os.path.join(mirror.root, storage_path)
+        digest = getattr(self.default_fetcher, 'digest', None)
 
-        if os.path.exists(absolute_storage_path):
-            stats.already_existed(absolute_storage_path)
-        else:
-            self.fetch()
-            self.check()
-            mirror.store(
-                self.fetcher, self.mirror_paths.storage_path)
-            stats.added(absolute_storage_path)
+        while True:
+            if mirror.is_cached(storage_path, digest):
+                stats.already_existed(absolute_storage_path)
+                break
+            if not mirror.claim(storage_path):
+                # Another task is adding the same resource: check it again
+                # when it's done, and add it here if that task failed
+                mirror.wait(storage_path)
+                continue
+            try:
+                start = time.time()
+                self.fetch()
+                self.check()
+                elapsed = time.time() - start
+                size = mirror.store(self.fetcher, storage_path)
+            finally:
+                mirror.release(storage_path)
+            stats.added(absolute_storage_path, size=size, seconds=elapsed,
+                        url=getattr(self.fetcher, 'url', None))
+            break
 
         mirror.symlink(self.mirror_paths)
 
@@ -701,7 +717,7 @@ class StageComposite(pattern.Composite):
 
     def __init__(self):
         super(StageComposite, self).__init__([
-            'fetch', 'create', 'created', 'check', 'expand_archive', 'restage',
+            'create', 'created', 'check', 'expand_archive', 'restage',
             'destroy', 'cache_local', 'cache_mirror', 'steal_source',
             'managed_by_spack'])
 
@@ -715,6 +731,12 @@ def __exit__(self, exc_type, exc_val, exc_tb):
             item.keep = getattr(self, 'keep', False)
             item.__exit__(exc_type, exc_val, exc_tb)
 
+    def fetch(self, *args, **kwargs):
+        """Fetch the sources of all the stages, concurrently."""
+        fs.fetch_concurrently([
+            functools.partial(stage.fetch, *args, **kwargs) for stage in self
+        ])
+
     #
     # Below functions act only on the *first* stage in the composite.
     #
@@ -810,7 +832,7 @@ def purge():
 
 def get_checksums_for_versions(
         url_dict, name, first_stage_function=None, keep_stage=False,
-        fetch_options=None, batch=False):
+        fetch_options=None, batch=False, jobs=None):
     """Fetches and checksums archives from URLs.
 
     This function is called by both ``spack checksum`` and ``spack
@@ -818,6 +840,10 @@ def get_checksums_for_versions(
     inspect the first downloaded archive, e.g., to determine the build
     system.
 
+    Unless the archives have to be kept or inspected, several archives are
+    downloaded at the same time and checksummed while they are downloaded,
+    without writing them to disk.
+
     Args:
         url_dict (dict): A dictionary of the form: version -> URL
         name (str): The name of the package
@@ -828,6 +854,8 @@ def get_checksums_for_versions(
             or fetch all versions (true)
         fetch_options (dict): Options used for the fetcher (such as timeout
             or cookies)
+        jobs (int): maximum number of archives downloaded at the same time,
+            defaults to ``config:fetch_jobs``
 
     Returns:
         (str): A multi-line string containing versions and corresponding hashes
@@ -860,6 +888,40 @@ def get_checksums_for_versions(
     urls = [url_dict[v] for v in versions]
 
     tty.debug('Downloading...')
+    streamed = (not (keep_stage or first_stage_function) and
+                fs._url_fetch_method() == 'urllib')
+    if streamed:
+        version_hashes, errors = _stream_checksums(
+            urls, versions, fetch_options, jobs)
+    else:
+        version_hashes, errors = _stage_checksums(
+            urls, versions, first_stage_function, keep_stage, fetch_options)
+
+    for msg in errors:
+        tty.debug(msg)
+
+    if not version_hashes:
+        tty.die("Could not fetch any versions for {0}".format(name))
+
+    # Find length of longest string in the list for padding
+    max_len = max(len(str(v)) for v, h in version_hashes)
+
+    # Generate the version directives to put in a package.py
+    version_lines = "\n".join([
+        "    version('{0}', {1}sha256='{2}')".format(
+            v, ' ' * (max_len - len(str(v))), h) for v, h in version_hashes
+    ])
+
+    num_hash = len(version_hashes)
+    tty.debug('Checksummed {0} version{1} of {2}:'.format(
+              num_hash, '' if num_hash == 1 else 's', name))
+
+    return version_lines
+
+
+def _stage_checksums(
+        urls, versions, first_stage_function, keep_stage, fetch_options):
+    """Download archives one at a time in a stage, and checksum them."""
     version_hashes = []
     i = 0
     errors = []
@@ -886,27 +948,39 @@ def get_checksums_for_versions(
             errors.append('Failed to fetch {0}'.format(url))
         except Exception as e:
             tty.msg('Something failed on {0}, skipping.  ({1})'.format(url, e))
+    return version_hashes, errors
 
-    for msg in errors:
-        tty.debug(msg)
 
-    if not version_hashes:
-        tty.die("Could not fetch any versions for {0}".format(name))
+def _stream_checksums(urls, versions, fetch_options, jobs):
+    """Download archives concurrently, checksumming them in flight.
 
-    # Find length of longest string in the list for padding
-    max_len = max(len(str(v)) for v, h in version_hashes)
+    Checksums are printed as soon as they are computed, and returned in
+    the same order as the versions.
+    """
+    hashes = {}
+    errors = []
+    lock = threading.Lock()
 
-    # Generate the version directives to put in a package.py
-    version_lines = "\n".join([
-        "    version('{0}', {1}sha256='{2}')".format(
-            v, ' ' * (max_len - len(str(v))), h) for v, h in version_hashes
-    ])
+    def _checksum(url, version):
+        try:
+            digest = fs.checksum_url(url, fetch_options=fetch_options)
+        except FailedDownloadError:
+            with lock:
+                errors.append('Failed to fetch {0}'.format(url))
+        except Exception as e:
+            tty.msg('Something failed on {0}, skipping.  ({1})'.format(url, e))
+        else:
+            with lock:
+                hashes[version] = digest
+                tty.msg('{0}  {1}'.format(digest, version))
 
-    num_hash = len(version_hashes)
-    tty.debug('Checksummed {0} version{1} of {2}:'.format(
-              num_hash, '' if num_hash == 1 else 's', name))
+    fs.fetch_concurrently(
+        [functools.partial(_checksum, url, version)
+         for url, version in zip(urls, versions)],
+        jobs=jobs)
 
-    return version_lines
+    version_hashes = [(v, hashes[v]) for v in versions if v in hashes]
+    return version_hashes, errors
 
 
 class StageError(spack.error.SpackError):
@@ -12,6 +12,8 @@
 import pytest
 import argparse
 import platform
+import spack.database
+import spack.hash_types as ht
 import spack.repo
 import spack.store
 import spack.binary_distribution as bindist
@@ -23,6 +25,7 @@
 from spack.main import SpackCommand
 import spack.mirror
 import spack.util.gpg
+import spack.util.spack_json as sjson
 import spack.util.web as web_util
 from spack.directory_layout import YamlDirectoryLayout
 from spack.spec import Spec
@@ -754,3 +757,275 @@ def test_update_sbang(tmpdir, install_mockery, function_mirror):
     finally:
         spack.store.store = real_store
         spack.store.layout = real_layout
+
+
+@pytest.fixture()
+def mirror_with_index(tmpdir, database, mutable_config):
+    """Create a mirror whose build cache index contains all the specs in the
+    mock database, and configure it."""
+    cache_dir = tmpdir.join('mirror', bindist.build_cache_relative_path())
+    cache_dir.ensure(dir=True)
+    db = spack.database.Database(
+        None, db_dir=str(tmpdir.join('db_root')),
+        enable_transaction_locking=False,
+        record_fields=['spec', 'ref_count'])
+    for spec in spack.store.db.query_local():
+        db.add(spec, None)
+    with open(str(cache_dir.join('index.json')), 'w') as f:
+        db._write_to_file(f)
+    index_hash = bindist.compute_hash(cache_dir.join('index.json').read())
+    cache_dir.join('index.json.hash').write(index_hash)
+
+    mirror_url = 'file://{0}'.format(tmpdir.join('mirror'))
+    spack.config.set('mirrors', {'test-mirror': mirror_url})
+    return mirror_url
+
+
+def test_binary_index_lookup_table(tmpdir, mirror_with_index):
+    """Check that finding a built spec only materializes the spec that was
+    requested, using the lookup table stored next to the cached index."""
+    index = bindist.BinaryCacheIndex(str(tmpdir.join('binary_index')))
+    index.update()
+
+    # A lookup table was written next to the cached index
+    cache_entry = index._local_index_cache[mirror_with_index]
+    lookup_key = bindist._lookup_table_key(cache_entry['index_path'])
+    assert os.path.isfile(index._index_file_cache.cache_path(lookup_key))
+
+    # Looking up a spec doesn't read any other spec into memory
+    mpileaks = spack.store.db.query_one('mpileaks ^mpich')
+    found = index.find_built_spec(mpileaks)
+    assert len(found) == 1
+    assert found[0]['mirror_url'] == mirror_with_index
+    assert found[0]['spec'].dag_hash() == mpileaks.dag_hash()
+    assert found[0]['spec'].concrete
+    assert found[0]['spec']['mpich'].dag_hash() == mpileaks['mpich'].dag_hash()
+    assert list(index._mirrors_for_spec) == [mpileaks.dag_hash()]
+
+    # A fresh index reuses the lookup table computed above
+    other_index = bindist.BinaryCacheIndex(str(tmpdir.join('binary_index')))
+    other_index.regenerate_lookup_cache()
+    assert mpileaks.dag_hash() in other_index._built_spec_lookup
+
+    # Listing everything materializes all the specs
+    all_hashes = set(s.dag_hash() for s in index.get_all_built_specs())
+    assert all_hashes == set(
+        s.dag_hash() for s in spack.store.db.query_local())
+
+
+def test_binary_index_ttl(tmpdir, mirror_with_index, monkeypatch):
+    """Check that indices checked recently are not checked again."""
+    index = bindist.BinaryCacheIndex(str(tmpdir.join('binary_index')))
+    index.update()
+
+    read_urls = []
+    read_from_url = web_util.read_from_url
+
+    def _read_from_url(url, *args, **kwargs):
+        read_urls.append(url)
+        return read_from_url(url, *args, **kwargs)
+
+    monkeypatch.setattr(web_util, 'read_from_url', _read_from_url)
+
+    index.update(ttl=3600)
+    assert not read_urls
+
+    # Only the hash is checked once the TTL expired
+    index.update(ttl=0)
+    assert len(read_urls) == 1
+    assert read_urls[0].endswith('index.json.hash')
+
+
+def test_binary_index_conditional_request(
+        tmpdir, mirror_with_index, monkeypatch):
+    """Check that a mirror which sent an ETag is checked with a single
+    conditional request for the index."""
+    index = bindist.BinaryCacheIndex(str(tmpdir.join('binary_index')))
+    index.update()
+    entry = index._local_index_cache[mirror_with_index]
+    entry['etag'] = '"abc"'
+    entry['last_checked'] = 0
+
+    calls = []
+
+    def _not_modified(url, *args, **kwargs):
+        calls.append((url, kwargs))
+        return url, {}, None
+
+    monkeypatch.setattr(web_util, 'read_from_url', _not_modified)
+
+    index.update(ttl=0)
+    assert len(calls) == 1
+    url, kwargs = calls[0]
+    assert url.endswith('index.json')
+    assert kwargs['etag'] == '"abc"'
+    assert index._local_index_cache[mirror_with_index]['last_checked'] > 0
+
+
+def _change_mirror_index(tmpdir):
+    """Change the index of the mirror_with_index, but not its contents."""
+    cache_dir = tmpdir.join('mirror', bindist.build_cache_relative_path())
+    index_json = ' ' + cache_dir.join('index.json').read()
+    cache_dir.join('index.json').write(index_json)
+    cache_dir.join('index.json.hash').write(bindist.compute_hash(index_json))
+
+
+def test_binary_index_lookup_follows_index_path(tmpdir, mirror_with_index):
+    """Check that lookup entries of a mirror are dropped when its cached
+    index is replaced."""
+    index_root = str(tmpdir.join('binary_index'))
+    index = bindist.BinaryCacheIndex(index_root)
+    index.update()
+    index.regenerate_lookup_cache()
+
+    # Another instance replaces the cached index, and removes the old one
+    _change_mirror_index(tmpdir)
+    other_index = bindist.BinaryCacheIndex(index_root)
+    other_index.update()
+    new_entry = other_index._local_index_cache[mirror_with_index]
+    index._local_index_cache[mirror_with_index] = dict(new_entry)
+
+    mpileaks = spack.store.db.query_one('mpileaks ^mpich')
+    assert len(index.find_built_spec(mpileaks)) == 1
+    assert all(entry[2] == new_entry['index_path']
+               for entries in index._built_spec_lookup.values()
+               for entry in entries)
+
+
+def test_binary_index_keeps_indices_in_use(tmpdir, mirror_with_index):
+    """Check that refreshing indices in the background doesn't remove the
+    indices that lookups in the foreground may still read."""
+    index_root = str(tmpdir.join('binary_index'))
+    index = bindist.BinaryCacheIndex(index_root)
+    index.update()
+    old_key = index._local_index_cache[mirror_with_index]['index_path']
+    old_path = index._index_file_cache.cache_path(old_key)
+    other_index = bindist.BinaryCacheIndex(index_root)
+    other_index.regenerate_lookup_cache()
+
+    # The index on the mirror changes, and is refreshed in the background
+    _change_mirror_index(tmpdir)
+    background = bindist.BinaryCacheIndex(index_root)
+    background.update(remove_stale=False)
+    new_key = background._local_index_cache[mirror_with_index]['index_path']
+    assert new_key != old_key
+    assert os.path.isfile(old_path)
+
+    # Lookups in the foreground still read the old index
+    mpileaks = spack.store.db.query_one('mpileaks ^mpich')
+    assert len(index.find_built_spec(mpileaks)) == 1
+
+    # The next update in the foreground removes it
+    foreground = bindist.BinaryCacheIndex(index_root)
+    foreground.update()
+    assert not os.path.exists(old_path)
+    assert os.path.isfile(foreground._index_file_cache.cache_path(new_key))
+    assert len(foreground.find_built_spec(mpileaks)) == 1
+
+    # Lookups in an index that was removed meanwhile just find nothing
+    assert other_index.find_built_spec(mpileaks) is None
+
+
+def test_binary_index_merges_new_mirrors(tmpdir, mirror_with_index):
+    """Check that specs found before a mirror was added, or recorded after
+    a direct fetch, are merged with the mirrors of the lookup table."""
+    tmpdir.join('mirror').copy(tmpdir.join('other-mirror'))
+    other_url = 'file://{0}'.format(tmpdir.join('other-mirror'))
+    mpileaks = spack.store.db.query_one('mpileaks ^mpich')
+
+    index = bindist.BinaryCacheIndex(str(tmpdir.join('binary_index')))
+    index.update()
+    assert len(index.find_built_spec(mpileaks)) == 1
+
+    spack.config.set('mirrors', {'test-mirror': mirror_with_index,
+                                 'other-mirror': other_url})
+    index.update()
+    found = index.find_built_spec(mpileaks)
+    assert set(e['mirror_url'] for e in found) == set(
+        [mirror_with_index, other_url])
+
+    # A spec fetched directly from a mirror doesn't hide the others
+    index = bindist.BinaryCacheIndex(str(tmpdir.join('binary_index')))
+    direct_url = 'file://{0}'.format(tmpdir.join('direct-mirror'))
+    index.update_spec(mpileaks, [{'mirror_url': direct_url, 'spec': mpileaks}])
+    index.update_spec(mpileaks, [{'mirror_url': other_url, 'spec': mpileaks}])
+    found = index.find_built_spec(mpileaks)
+    assert sorted(e['mirror_url'] for e in found) == sorted(
+        [direct_url, mirror_with_index, other_url])
+
+
+def test_generate_package_index_incremental(tmpdir, database, monkeypatch):
+    """Check that an incremental update of the index only reads the specs
+    that were pushed since the last update."""
+    cache_dir = tmpdir.join('mirror', bindist.build_cache_relative_path())
+    cache_dir.ensure(dir=True)
+    cache_url = 'file://{0}'.format(cache_dir)
+
+    def push(spec_str, delta=True):
+        spec = spack.store.db.query_one(spec_str)
+        specfile_name = bindist.tarball_name(spec, '.spec.yaml')
+        cache_dir.join(specfile_name).write(spec.to_yaml(hash=ht.build_hash))
+        if delta:
+            cache_dir.join('_deltas', specfile_name).write(
+                specfile_name, ensure=True)
+        return spec
+
+    def index_hashes():
+        index = sjson.load(cache_dir.join('index.json').read())
+        return set(index['database']['installs'])
+
+    def deltas():
+        return [p.basename for p in cache_dir.join('_deltas').listdir()
+                if p.basename.endswith('.spec.yaml')]
+
+    read_urls = []
+    read_spec_yaml = bindist._read_spec_yaml_from_url
+
+    def _read_spec_yaml(url):
+        read_urls.append(url)
+        return read_spec_yaml(url)
+
+    monkeypatch.setattr(bindist, '_read_spec_yaml_from_url', _read_spec_yaml)
+
+    # A full rebuild reads everything, and consumes the delta manifests
+    libelf = push('libelf')
+    bindist.generate_package_index(cache_url)
+    assert len(read_urls) == 1
+    assert index_hashes() == set([libelf.dag_hash()])
+    assert not deltas()
+    assert not cache_dir.join('_deltas', 'incremental').exists()
+
+    # Specs recorded in delta manifests are merged into the index
+    del read_urls[:]
+    mpileaks = push('mpileaks ^mpich')
+    bindist.generate_package_index(cache_url, incremental=True)
+    assert len(read_urls) == 1
+    hashes = index_hashes()
+    assert libelf.dag_hash() in hashes
+    assert all(s.dag_hash() in hashes for s in mpileaks.traverse())
+    assert not deltas()
+
+    # Incremental updates make pushes record delta manifests
+    assert cache_dir.join('_deltas', 'incremental').exists()
+
+    # Without delta manifests, the listing is compared with the index
+    del read_urls[:]
+    externaltool = push('externaltool', delta=False)
+    bindist.generate_package_index(cache_url, incremental=True)
+    assert len(read_urls) == 1
+    assert read_urls[0].endswith(
+        bindist.tarball_name(externaltool, '.spec.yaml'))
+    assert externaltool.dag_hash() in index_hashes()
+
+    # Specs pushed again are read, even though they are in the index
+    del read_urls[:]
+    push('libelf')
+    bindist.generate_package_index(cache_url, incremental=True)
+    assert len(read_urls) == 1
+    assert read_urls[0].endswith(bindist.tarball_name(libelf, '.spec.yaml'))
+    assert not deltas()
+
+    # Delta manifests whose spec.yaml can't be read are kept
+    cache_dir.join('_deltas', 'missing.spec.yaml').write('missing.spec.yaml')
+    bindist.generate_package_index(cache_url, incremental=True)
+    assert deltas() == ['missing.spec.yaml']
@@ -39,3 +39,25 @@ def test_build_tarball_overwrite(
 
         with pytest.raises(spack.binary_distribution.NoOverwriteException):
             spack.binary_distribution.build_tarball(spec, '.', unsigned=True)
+
+
+def test_build_tarball_records_deltas(
+        install_mockery, mock_fetch, monkeypatch, tmpdir):
+    """Delta manifests are only written to build caches whose index is
+    updated incrementally."""
+    with tmpdir.as_cwd():
+        spec = spack.spec.Spec('trivial-install-test-package').concretized()
+        install(str(spec))
+
+        deltas_dir = os.path.join(
+            spack.binary_distribution.build_cache_prefix('.'), '_deltas')
+        spack.binary_distribution.build_tarball(spec, '.', unsigned=True)
+        assert not os.path.exists(deltas_dir)
+
+        os.makedirs(deltas_dir)
+        open(os.path.join(deltas_dir, 'incremental'), 'w').close()
+        spack.binary_distribution.build_tarball(
+            spec, '.', force=True, unsigned=True)
+        assert os.path.exists(os.path.join(
+            deltas_dir,
+            spack.binary_distribution.tarball_name(spec, '.spec.yaml')))
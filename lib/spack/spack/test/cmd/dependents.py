@@ -44,6 +44,17 @@ def test_transitive_dependents(mock_packages):
     ])
 
 
+def test_dependents_deptype(mock_packages):
+    out = dependents('--deptype=link', 'dt-diamond-bottom')
+    assert set(out.split()) == set(['dt-diamond-right'])
+
+    out = dependents('--transitive', '--deptype=link', 'dt-diamond-bottom')
+    assert set(out.split()) == set(['dt-diamond-right', 'dt-diamond'])
+
+    out = dependents('--deptype=run', 'dt-diamond')
+    assert out.strip() == 'No dependents'
+
+
 @pytest.mark.db
 def test_immediate_installed_dependents(mock_packages, database):
     with color_when(False):
@@ -72,3 +72,14 @@ def test_no_versions_no_url():
     """Test a package without versions or a ``url`` attribute."""
 
     versions('opengl')
+
+
+def test_safe_versions_batch():
+    """Test the safe versions of several packages."""
+
+    output = versions('--safe', '--batch', 'zlib', 'bzip2')
+    assert 'zlib:' in output
+    assert 'bzip2:' in output
+
+    versions('--safe', 'zlib', 'bzip2', fail_on_error=False)
+    assert versions.returncode != 0
@@ -910,3 +910,39 @@ def _raise(db, spec):
     with pytest.raises(Exception):
         with spack.store.db.prefix_write_lock(s):
             assert False
+
+
+def test_read_only_when_index_changes(mutable_database, monkeypatch):
+    """The index file is parsed again only when another process wrote it."""
+    reads = []
+    read_from_file = spack.database.Database._read_from_file
+
+    def _read_from_file(db, filename):
+        reads.append(filename)
+        return read_from_file(db, filename)
+    monkeypatch.setattr(
+        spack.database.Database, '_read_from_file', _read_from_file)
+
+    with mutable_database.read_transaction():
+        mutable_database.query('mpileaks')
+    with mutable_database.read_transaction():
+        mutable_database.query('mpileaks')
+    assert len(reads) <= 1
+
+    # Our own writes don't require reading the index again
+    del reads[:]
+    with mutable_database.write_transaction():
+        pass
+    with mutable_database.read_transaction():
+        pass
+    assert not reads
+
+    # Writes by another process (with the same verifier) are detected
+    with open(mutable_database._index_path) as f:
+        index = f.read()
+    os.remove(mutable_database._index_path)
+    with open(mutable_database._index_path, 'w') as f:
+        f.write(index)
+    with mutable_database.read_transaction():
+        pass
+    assert len(reads) == 1
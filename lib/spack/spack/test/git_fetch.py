@@ -11,8 +11,11 @@
 
 from llnl.util.filesystem import working_dir, touch, mkdirp
 
+import spack.caches
+import spack.fetch_strategy
 import spack.repo
 import spack.config
+import spack.util.executable
 from spack.spec import Spec
 from spack.stage import Stage
 from spack.version import ver
@@ -272,3 +275,81 @@ def test_gitsubmodules_delete(mock_git_repository, config, mutable_mock_repo):
         file_path = os.path.join(pkg.stage.source_path,
                                  'third_party/submodule1')
         assert not os.path.isdir(file_path)
+
+
+@pytest.fixture
+def git_remote_with_submodule(tmpdir):
+    """A git repository with one submodule, both with a single commit."""
+    git = which('git', required=True)
+
+    def _make_repo(name):
+        path = str(tmpdir.join(name))
+        mkdirp(path)
+        with working_dir(path):
+            git('init', '--quiet')
+            git('config', 'user.name', 'Spack')
+            git('config', 'user.email', 'spack@spack.io')
+            touch(name + '.txt')
+            git('add', name + '.txt')
+            git('commit', '--quiet', '-m', 'initial commit')
+        return path
+
+    sub = _make_repo('sub')
+    main = _make_repo('main')
+    with working_dir(main):
+        git('-c', 'protocol.file.allow=always', 'submodule', 'add',
+            '--quiet', 'file://' + sub, 'sub')
+        git('commit', '--quiet', '-m', 'add submodule')
+        commit = git('rev-parse', 'HEAD', output=str).strip()
+    return 'file://' + main, sub, commit
+
+
+def test_git_cache(git_remote_with_submodule, tmpdir, monkeypatch):
+    """Check that stages are cloned from bare mirrors in the source cache,
+    and that the remotes are not needed once the commits are cached."""
+    url, sub, commit = git_remote_with_submodule
+    cache = spack.fetch_strategy.FsCache(str(tmpdir.join('cache')))
+    monkeypatch.setattr(spack.caches, 'fetch_cache', cache)
+
+    def _stage_and_check(name):
+        fetcher = GitFetchStrategy(git=url, commit=commit, submodules=True)
+        with Stage(fetcher, path=str(tmpdir.join(name))) as stage:
+            fetcher.fetch()
+            source_path = stage.source_path
+            assert os.path.isfile(os.path.join(source_path, 'main.txt'))
+            assert os.path.isfile(
+                os.path.join(source_path, 'sub', 'sub.txt'))
+            with working_dir(source_path):
+                git = which('git', required=True)
+                assert git('rev-parse', 'HEAD', output=str).strip() == commit
+                origin = git('remote', 'get-url', 'origin', output=str)
+                assert origin.strip() == url
+            # The stage has its own objects, the mirrors may be pruned
+            assert not os.path.exists(os.path.join(
+                source_path, '.git', 'objects', 'info', 'alternates'))
+
+    with spack.config.override('config:git_cache', True):
+        _stage_and_check('first')
+        assert len(os.listdir(str(tmpdir.join('cache', '_git')))) == 4
+
+        # Commits already in the cache don't need the remotes
+        shutil.rmtree(url[len('file://'):])
+        shutil.rmtree(sub)
+        _stage_and_check('second')
+
+
+def test_git_cache_failed_clone(tmpdir, monkeypatch):
+    """Check that a mirror is not left in the source cache when cloning
+    it fails."""
+    cache = spack.fetch_strategy.FsCache(str(tmpdir.join('cache')))
+    monkeypatch.setattr(spack.caches, 'fetch_cache', cache)
+
+    url = 'file://' + str(tmpdir.join('no-such-repo'))
+    fetcher = GitFetchStrategy(git=url, commit='abc123')
+    with spack.config.override('config:git_cache', True):
+        with Stage(fetcher, path=str(tmpdir.join('stage'))):
+            with pytest.raises(spack.util.executable.ProcessError):
+                fetcher.fetch()
+
+    entries = os.listdir(str(tmpdir.join('cache', '_git')))
+    assert len(entries) == 1 and entries[0].endswith('.lock')
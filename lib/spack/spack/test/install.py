@@ -8,13 +8,16 @@
 import shutil
 
 import llnl.util.filesystem as fs
+from llnl.util.tty.log import open_log
 
 from spack.package import InstallError, PackageBase, PackageStillNeededError
+import spack.config
 import spack.error
 import spack.patch
 import spack.repo
 import spack.store
 from spack.spec import Spec
+from spack.util.log_parse import parse_log_events
 from spack.package import (_spack_build_envfile, _spack_build_logfile,
                            _spack_configure_argsfile)
 
@@ -398,6 +401,27 @@ def test_pkg_build_paths(install_mockery):
     shutil.rmtree(log_dir)
 
 
+def test_compressed_build_log(install_mockery, mock_fetch):
+    spec = Spec('trivial-install-test-package').concretized()
+
+    with spack.config.override('config:compress_build_logs', True):
+        assert spec.package.log_path.endswith(_spack_build_logfile + '.gz')
+        spec.package.do_install()
+
+    # the log stays compressed, regardless of the configuration
+    log_path = spec.package.build_log_path
+    assert log_path.endswith(_spack_build_logfile + '.gz')
+
+    log = open_log(log_path)
+    try:
+        assert "Executing phase: 'install'" in log.read()
+    finally:
+        log.close()
+
+    errors, _ = parse_log_events(log_path)
+    assert not errors
+
+
 def test_pkg_install_paths(install_mockery):
     # Get a basic concrete spec for the trivial install package.
     spec = Spec('trivial-install-test-package').concretized()
@@ -434,6 +458,35 @@ def test_pkg_install_paths(install_mockery):
     shutil.rmtree(log_dir)
 
 
+def test_log_install_compression(install_mockery):
+    """Test that the installed log is compressed only if the build log
+    is, whatever the configuration is when it is installed."""
+    spec = Spec('trivial-install-test-package').concretized()
+    pkg = spec.package
+    fs.mkdirp(pkg.stage.path)
+    fs.mkdirp(pkg.metadata_dir)
+    fs.touch(pkg.env_path)
+    log = os.path.join(pkg.stage.path, _spack_build_logfile)
+    install_log = os.path.join(pkg.metadata_dir, _spack_build_logfile)
+
+    fs.touch(log)
+    with spack.config.override('config:compress_build_logs', True):
+        spack.installer.log(pkg)
+    assert os.path.exists(install_log)
+    assert not os.path.exists(install_log + '.gz')
+    assert pkg.install_log_path == install_log
+
+    # The log of the previous build is replaced
+    os.rename(log, log + '.gz')
+    with spack.config.override('config:compress_build_logs', False):
+        spack.installer.log(pkg)
+    assert os.path.exists(install_log + '.gz')
+    assert not os.path.exists(install_log)
+    assert pkg.install_log_path == install_log + '.gz'
+
+    pkg.stage.destroy()
+
+
 def test_log_install_without_build_files(install_mockery):
     """Test the installer log function when no build files are present."""
     # Get a basic concrete spec for the trivial install package.
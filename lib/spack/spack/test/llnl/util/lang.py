@@ -137,3 +137,36 @@ def test_uniq():
     assert [1, 2, 3] == llnl.util.lang.uniq([1, 1, 1, 1, 2, 2, 2, 3, 3])
     assert [1, 2, 1] == llnl.util.lang.uniq([1, 1, 1, 1, 2, 2, 2, 1, 1])
     assert [] == llnl.util.lang.uniq([])
+
+
+def test_shared():
+    # A string that no other test shares
+    first = ''.join(['test', '_shared'])
+    second = ''.join(['test_', 'shared'])
+    assert first is not second
+    assert llnl.util.lang.shared(first) is first
+    assert llnl.util.lang.shared(second) is first
+
+
+def test_object_wrapper_with_slots():
+    class Slotted(object):
+        __slots__ = ('name', 'unset', '__dict__')
+
+        def __init__(self, name):
+            self.name = name
+
+    class Wrapper(llnl.util.lang.ObjectWrapper):
+        def greet(self):
+            return 'hello ' + self.name
+
+    obj = Slotted('world')
+    obj.extra = 1
+    wrapper = Wrapper(obj)
+
+    assert isinstance(wrapper, Slotted)
+    assert wrapper.greet() == 'hello world'
+    assert not hasattr(wrapper, 'unset')
+
+    # Attributes that are not in slots are shared with the wrapped object
+    wrapper.extra += 1
+    assert obj.extra == 2
@@ -46,9 +46,11 @@
 import errno
 import fcntl
 import os
+import signal
 import socket
 import shutil
 import tempfile
+import time
 import traceback
 import glob
 import getpass
@@ -312,10 +314,12 @@ def __call__(self, barrier):
 
 
 class TimeoutWrite(object):
-    def __init__(self, lock_path, start=0, length=0):
+    def __init__(self, lock_path, start=0, length=0,
+                 timeout=lock_fail_timeout):
         self.lock_path = lock_path
         self.start = start
         self.length = length
+        self.timeout = timeout
 
     @property
     def __name__(self):
@@ -325,7 +329,7 @@ def __call__(self, barrier):
         lock = lk.Lock(self.lock_path, self.start, self.length)
         barrier.wait()  # wait for lock acquire in first process
         with pytest.raises(lk.LockTimeoutError):
-            lock.acquire_write(lock_fail_timeout)
+            lock.acquire_write(self.timeout)
         barrier.wait()
 
 
@@ -347,6 +351,76 @@ def __call__(self, barrier):
         barrier.wait()
 
 
+class ReleaseOneOfTwoRanges(object):
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+
+    @property
+    def __name__(self):
+        return self.__class__.__name__
+
+    def __call__(self, barrier):
+        lock1 = lk.Lock(self.lock_path, 0, 1)
+        lock2 = lk.Lock(self.lock_path, 1, 1)
+        lock1.acquire_write()
+        lock2.acquire_write()
+        assert lock1._file is lock2._file
+
+        # Closing the file would release the lock on the other range too
+        lock1.release_write()
+        assert not lock2._file.closed
+        barrier.wait()
+        barrier.wait()  # hold the lock until timeout in other procs.
+
+
+class HoldWriteBriefly(object):
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+
+    @property
+    def __name__(self):
+        return self.__class__.__name__
+
+    def __call__(self, barrier):
+        lock = lk.Lock(self.lock_path)
+        lock.acquire_write()
+        barrier.wait()
+        time.sleep(0.5)
+        lock.release_write()
+
+
+class BlockingWrite(object):
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+
+    @property
+    def __name__(self):
+        return self.__class__.__name__
+
+    def __call__(self, barrier):
+        lock = lk.Lock(self.lock_path)
+        barrier.wait()  # wait for lock acquire in first process
+        lk.statistics.reset()
+        wait_time, nattempts = lock._lock(fcntl.LOCK_EX)
+
+        # A blocking call doesn't poll the lock
+        assert nattempts == 2
+        assert lk.statistics.contended == 1
+        assert lk.statistics.wait_time == lk.statistics.max_wait_time > 0
+
+
+def test_release_keeps_other_ranges_locked(lock_path):
+    multiproc_test(
+        ReleaseOneOfTwoRanges(lock_path),
+        TimeoutWrite(lock_path, 1, 1))
+
+
+def test_blocking_lock(lock_path):
+    multiproc_test(
+        HoldWriteBriefly(lock_path),
+        BlockingWrite(lock_path))
+
+
 #
 # Test that exclusive locks on other processes time out when an
 # exclusive lock is held.
@@ -357,6 +431,13 @@ def test_write_lock_timeout_on_write(lock_path):
         TimeoutWrite(lock_path))
 
 
+def test_write_lock_near_zero_timeout_on_write(lock_path):
+    # Too short for an alarm, as with the prefix locks of the installer
+    multiproc_test(
+        AcquireWrite(lock_path),
+        TimeoutWrite(lock_path, timeout=1e-9))
+
+
 def test_write_lock_timeout_on_write_2(lock_path):
     multiproc_test(
         AcquireWrite(lock_path),
@@ -1369,3 +1450,49 @@ def test_upgrade_read_fails(tmpdir):
         msg = 'Cannot upgrade lock from read to write on file: lockfile'
         with pytest.raises(lk.LockUpgradeError, match=msg):
             lock.upgrade_read_to_write()
+
+
+def test_file_tracker_shares_descriptors(tmpdir):
+    with tmpdir.as_cwd():
+        fh = lk.file_tracker.get_fh('lockfile')
+        assert lk.file_tracker.get_fh(os.path.abspath('lockfile')) is fh
+
+        lk.file_tracker.release_fh(fh)
+        assert not fh.closed
+        lk.file_tracker.release_fh(fh)
+        assert fh.closed
+
+
+def test_alarm_after_blocking_lock(lock_path, monkeypatch):
+    lockf = fcntl.lockf
+    attempts = []
+
+    def _lockf(fd, cmd, len, start, whence):
+        if cmd & fcntl.LOCK_NB and not attempts:
+            attempts.append(cmd)
+            raise IOError(errno.EAGAIN, 'Fake EAGAIN error')
+        lockf(fd, cmd, len, start, whence)
+        if cmd in (fcntl.LOCK_SH, fcntl.LOCK_EX):
+            # the alarm goes off right after the lock was acquired
+            raise lk._AlarmTimeout()
+    monkeypatch.setattr(fcntl, 'lockf', _lockf)
+
+    lock = lk.Lock(lock_path)
+    lock.acquire_write(timeout=1.0)
+    assert lock._writes == 1
+    assert signal.getitimer(signal.ITIMER_REAL)[0] == 0
+    assert signal.getsignal(signal.SIGALRM) == signal.SIG_DFL
+    lock.release_write()
+
+
+def test_lock_statistics_timeout(lock_path, monkeypatch):
+    def _lockf(fd, cmd, len, start, whence):
+        raise IOError(errno.EAGAIN, 'Fake EAGAIN error')
+    monkeypatch.setattr(fcntl, 'lockf', _lockf)
+
+    lock = lk.Lock(lock_path)
+    lk.statistics.reset()
+    with pytest.raises(lk.LockTimeoutError):
+        lock.acquire_write(timeout=0.1)
+    assert lk.statistics.timeouts == 1
+    assert lk.statistics.acquired == 0
@@ -73,6 +73,43 @@ def test_log_python_output_and_echo_output(capfd, tmpdir):
         assert capfd.readouterr()[0] == 'force echo\n'
 
 
+def test_log_output_compressed(capfd, tmpdir):
+    with tmpdir.as_cwd():
+        with log_output('foo.txt.gz'):
+            print('logged')
+            print('partial', end='')
+
+        with open('foo.txt.gz', 'rb') as f:
+            assert f.read(2) == b'\x1f\x8b'
+
+        f = llnl.util.tty.log.open_log('foo.txt.gz')
+        try:
+            assert f.read() == 'logged\npartial'
+        finally:
+            f.close()
+
+        assert capfd.readouterr()[0] == ''
+
+
+def test_echo_rate_limit():
+    limiter = llnl.util.tty.log._EchoLimiter(10)
+
+    # a burst larger than the remaining budget is echoed and paid for later
+    assert limiter.limit('12345\n') == '12345\n'
+    assert limiter.limit('1234567\n') == '1234567\n'
+    assert limiter.limit('one\ntwo\n') == (
+        '[too much output to echo, skipping lines]\n')
+    assert limiter.limit('three\n') == ''
+
+    # once the budget is refilled, a note about the skipped lines is echoed
+    limiter.last -= 10
+    assert limiter.limit('four\n') == (
+        '[3 lines not shown, see the log for all output]\nfour\n')
+    assert limiter.notice() == ''
+
+    assert llnl.util.tty.log._EchoLimiter(None).limit('x' * 100) == 'x' * 100
+
+
 @pytest.mark.skipif(not which('echo'), reason="needs echo command")
 def test_log_subproc_and_echo_output_no_capfd(capfd, tmpdir):
     echo = which('echo')
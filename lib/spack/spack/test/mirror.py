@@ -4,11 +4,15 @@
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
 import filecmp
+import hashlib
 import os
+import threading
+
 import pytest
 
 import spack.repo
 import spack.mirror
+import spack.util.crypto
 import spack.util.executable
 from spack.spec import Spec
 from spack.stage import Stage
@@ -224,3 +228,88 @@ def test_mirror_cache_symlinks(tmpdir):
     assert os.path.exists(link_target)
     assert (os.path.normpath(link_target) ==
             os.path.join(cache.root, reference.storage_path))
+
+
+def test_mirror_cache_journal(tmpdir, monkeypatch):
+    """Entries recorded in the journal are not checked again, and entries
+       that were modified are verified against their checksum.
+    """
+    storage_path = '_source-cache/archive/c3/c3e5.tar.gz'
+    fetcher = MockFetcher()
+    fetcher.digest = hashlib.sha256().hexdigest()
+
+    cache = spack.caches.MirrorCache(str(tmpdir), False)
+    assert not cache.is_cached(storage_path, fetcher.digest)
+    assert cache.store(fetcher, storage_path) == 0
+    assert os.path.exists(cache.journal_path)
+
+    # A new cache for the same root resumes from the journal, without
+    # computing checksums
+    checked = []
+    check = spack.util.crypto.Checker.check
+
+    def _check(self, filename):
+        checked.append(filename)
+        return check(self, filename)
+    monkeypatch.setattr(spack.util.crypto.Checker, 'check', _check)
+
+    cache = spack.caches.MirrorCache(str(tmpdir), False)
+    assert cache.is_cached(storage_path, fetcher.digest)
+    assert not checked
+
+    # The entry has changed, so it is verified against its checksum
+    tmpdir.join(storage_path).write('corrupted')
+    assert not cache.is_cached(storage_path, fetcher.digest)
+    assert checked
+
+    tmpdir.join(storage_path).write('')
+    assert cache.is_cached(storage_path, fetcher.digest)
+
+
+def test_mirror_cache_claim(tmpdir):
+    cache = spack.caches.MirrorCache(str(tmpdir), False)
+    storage_path = '_source-cache/archive/c3/c3e5.tar.gz'
+
+    assert cache.claim(storage_path)
+    assert not cache.claim(storage_path)
+    cache.release(storage_path)
+    assert cache.claim(storage_path)
+
+
+def test_mirror_cache_claim_failed(tmpdir, monkeypatch):
+    """A resource claimed by another task is added again if that task
+       fails, instead of being reported as already in the mirror.
+    """
+    cache = spack.caches.MirrorCache(str(tmpdir.join('mirror')), False)
+    reference = spack.mirror.MirrorReference(
+        'zlib/zlib-1.2.11.tar.gz', '_source-cache/archive/c3/c3e5.tar.gz')
+    fetcher = spack.fetch_strategy.URLFetchStrategy('file:///zlib.tar.gz')
+    stats = spack.mirror.MirrorStats()
+
+    waiting = threading.Event()
+    wait, store = cache.wait, cache.store
+
+    def _wait(relative_dest):
+        waiting.set()
+        wait(relative_dest)
+    monkeypatch.setattr(cache, 'wait', _wait)
+    monkeypatch.setattr(cache, 'store',
+                        lambda fetcher, dst: store(MockFetcher(), dst))
+
+    with Stage(fetcher, mirror_paths=reference,
+               path=str(tmpdir.join('stage'))) as stage:
+        monkeypatch.setattr(stage, 'fetch', lambda: None)
+        monkeypatch.setattr(stage, 'check', lambda: None)
+
+        # Another task claims the resource, and fails to add it
+        assert cache.claim(reference.storage_path)
+        task = threading.Thread(target=stage.cache_mirror,
+                                args=(cache, stats))
+        task.start()
+        waiting.wait()
+        cache.release(reference.storage_path)
+        task.join()
+
+    assert cache.is_cached(reference.storage_path)
+    assert stats.added_resources
+    assert not stats.existing_resources
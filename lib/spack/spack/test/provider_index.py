@@ -73,3 +73,22 @@ def test_copy(mock_packages):
     p = ProviderIndex(spack.repo.all_package_names())
     q = p.copy()
     assert p == q
+
+
+def test_providers_for_after_changes(mock_packages):
+    def provider_names(vspec):
+        return set(s.name for s in p.providers_for(vspec))
+
+    p = ProviderIndex(['mpich'])
+    assert provider_names('mpi') == set(['mpich'])
+
+    p.update('zmpi')
+    assert provider_names('mpi') == set(['mpich', 'zmpi'])
+    assert provider_names('mpi@10') == set(['zmpi'])
+
+    p.remove_provider('mpich')
+    assert provider_names('mpi') == set(['zmpi'])
+
+    # results are copies, so changing them does not affect the index
+    p.providers_for('mpi')[0].name = 'mpich'
+    assert provider_names('mpi') == set(['zmpi'])
@@ -79,3 +79,44 @@ def test_namespace_hasattr(attr_name, exists, mutable_mock_repo):
     # of a custom __getattr__ implementation
     nms = spack.repo.SpackNamespace('spack.pkg.builtin.mock')
     assert hasattr(nms, attr_name) == exists
+
+
+def test_dependency_index(mock_packages):
+    index = spack.repo.path.dependency_index
+    assert index['mpileaks'] == {'callpath': ['build', 'link'],
+                                 'mpi': ['build', 'link']}
+    assert index['zmpi'] == {'fake': ['build', 'link']}
+
+    # possible dependencies are found from the index
+    pkg_cls = spack.repo.path.get_pkg_class('mpileaks')
+    for name, deps in pkg_cls.possible_dependencies().items():
+        dep_cls = spack.repo.path.get_pkg_class(name)
+        direct = dep_cls.possible_dependencies(transitive=False)
+        assert set(direct[name]) == deps
+
+
+def test_dependents_index(mock_packages):
+    index = spack.repo.path.dependents_index
+    assert index.dependents_for('dtlink3') == set(['dtlink1'])
+    assert index.dependents_for('dtlink3', transitive=True) == set(
+        ['dtlink1', 'dttop', 'dtuse'])
+    assert index.dependents_for('dtrun3', transitive=True) == set(
+        ['dtrun1', 'dttop', 'dtuse'])
+    assert index.dependents_for(
+        'dtrun3', transitive=True, deptype=('build', 'link')) == set()
+
+    # packages depending on a virtual are dependents of its providers
+    assert index.dependents_for('mpi') <= index.dependents_for('mpich')
+    assert 'mpileaks' in index.dependents_for('mpich')
+
+
+def test_dependents_index_merge(mock_packages):
+    index = spack.repo.DependentsIndex()
+    index.merge(spack.repo.path.dependents_index)
+    assert 'libdwarf' in index.dependents_for('libelf')
+
+    # a repository overriding libdwarf with a package without dependencies
+    index.merge(spack.repo.DependentsIndex.from_json(
+        '{"dependents": {}, "provides": {"libdwarf": []}}'))
+    assert 'libdwarf' not in index.dependents_for('libelf')
+    assert 'dyninst' in index.dependents_for('libelf')
@@ -291,6 +291,21 @@ def test_postorder_path_traversal(self):
         traversal = dag.traverse(cover='paths', depth=True, order='post')
         assert [(x, y.name) for x, y in traversal] == pairs
 
+    def test_deep_traversal(self):
+        """Ensure traversal depth is not limited by the recursion limit."""
+        chain = [Spec('node%d' % i) for i in range(5000)]
+        for parent, child in zip(chain, chain[1:]):
+            parent._add_dependency(child, ('link',))
+
+        # Compare by identity, since comparing specs is recursive
+        traversal = chain[0].traverse(order='post', depth=True)
+        assert [(x, id(y)) for x, y in traversal] == list(
+            reversed([(x, id(y)) for x, y in enumerate(chain)]))
+
+        traversal = chain[-1].traverse(direction='parents')
+        assert [id(x) for x in traversal] == list(
+            reversed([id(x) for x in chain]))
+
     def test_conflicting_spec_constraints(self):
         mpileaks = Spec('mpileaks ^mpich ^callpath ^dyninst ^libelf ^libdwarf')
 
@@ -874,6 +889,20 @@ def test_copy_deptypes(self):
         s4 = s3.copy()
         self.check_diamond_deptypes(s4)
 
+    def test_copy_selected_deptypes(self):
+        """Ensure that only edges of the requested types are copied."""
+        s = Spec('dt-diamond')
+        s.concretize()
+
+        link = s.copy(deps=('link',))
+        assert 'dt-diamond-bottom' not in link['dt-diamond-left']
+        assert 'dt-diamond-bottom' in link['dt-diamond-right']
+        assert link['dt-diamond-right']._dependencies[
+            'dt-diamond-bottom'].deptypes == ('build', 'link', 'run')
+
+        run = s.copy(deps=('run',))
+        assert not run._dependencies
+
     def test_getitem_query(self):
         s = Spec('mpileaks')
         s.concretize()
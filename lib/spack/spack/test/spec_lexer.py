@@ -0,0 +1,242 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""Equivalence tests of the spec lexer and parser with the re.Scanner
+lexer they replaced.
+
+The functions that collect directive strings from a repository are also
+used by ``share/spack/qa/spec-parse-benchmark.py``.
+"""
+import ast
+import os
+import random
+
+import pytest
+
+import spack.parse
+import spack.paths
+import spack.spec as sp
+from spack.spec import (
+    HASH, DEP, AT, COLON, COMMA, ON, OFF, PCT, EQ, VAL, FILE, ID, spec_id_re)
+
+
+class OldSpecLexer(spack.parse.Lexer):
+    """The spec lexer before it was rewritten to tokenize in one pass."""
+
+    def __init__(self):
+        super(OldSpecLexer, self).__init__([
+            (r'\^', lambda scanner, val: self.token(DEP,   val)),
+            (r'\@', lambda scanner, val: self.token(AT,    val)),
+            (r'\:', lambda scanner, val: self.token(COLON, val)),
+            (r'\,', lambda scanner, val: self.token(COMMA, val)),
+            (r'\+', lambda scanner, val: self.token(ON,    val)),
+            (r'\-', lambda scanner, val: self.token(OFF,   val)),
+            (r'\~', lambda scanner, val: self.token(OFF,   val)),
+            (r'\%', lambda scanner, val: self.token(PCT,   val)),
+            (r'\=', lambda scanner, val: self.token(EQ,    val)),
+            (r'[/\w.-]*/[/\w/-]+\.yaml[^\b]*',
+             lambda scanner, v: self.token(FILE, v)),
+            (r'/', lambda scanner, val: self.token(HASH, val)),
+            (spec_id_re, lambda scanner, val: self.token(ID, val)),
+            (r'\s+', lambda scanner, val: None)],
+            [EQ],
+            [(r'[\S].*', lambda scanner, val: self.token(VAL,    val)),
+             (r'\s+', lambda scanner, val: None)],
+            [VAL])
+
+
+#: Like the old module-level lexer, shared by all the parsers
+_old_lexer = OldSpecLexer()
+
+
+def _reset_old_lexer():
+    # The old lexer stays in value mode after some errors
+    _old_lexer.mode = 0
+    return _old_lexer
+
+
+#: Names of the directives whose first argument is a spec string
+spec_directives = ('depends_on', 'conflicts', 'provides', 'extends')
+
+
+def _string_value(node):
+    if isinstance(node, ast.Str):
+        return node.s
+    return None
+
+
+def directive_strings(repo_root):
+    """Return the spec strings of the directives of all the packages in a
+    repository, in the order they appear: the first argument of
+    ``depends_on``, ``conflicts``, ``provides`` and ``extends``, and the
+    ``when`` argument of any call."""
+    strings = []
+    packages_root = os.path.join(repo_root, 'packages')
+    for name in sorted(os.listdir(packages_root)):
+        path = os.path.join(packages_root, name, 'package.py')
+        if not os.path.isfile(path):
+            continue
+        with open(path) as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call):
+                continue
+            func = getattr(node.func, 'id', None)
+            if func in spec_directives and node.args:
+                value = _string_value(node.args[0])
+                if value is not None:
+                    strings.append(value)
+            for keyword in node.keywords:
+                if keyword.arg == 'when':
+                    value = _string_value(keyword.value)
+                    if value is not None:
+                        strings.append(value)
+    return strings
+
+
+def old_lex(text):
+    """Tokenize like the old lexer. Return the list of (type, value) pairs,
+    or None if the text can't be tokenized."""
+    try:
+        tokens = _reset_old_lexer().lex(spack.parse.split(text))
+    except spack.parse.LexError:
+        return None
+    return [(t.type, t.value) for t in tokens]
+
+
+def new_lex(text):
+    try:
+        tokens = sp._lexer.lex(spack.parse.split(text))
+    except spack.parse.LexError:
+        return None
+    return [(t.type, t.value) for t in tokens]
+
+
+def old_parse(text):
+    """Parse with the old lexer, without the cache of parsed specs."""
+    parser = sp.SpecParser()
+    parser.lexer = _reset_old_lexer()
+    return parser.parse(text)
+
+
+def _parse_result(parse, text):
+    """Return the specs parsed from text as strings, or the type of the
+    error raised."""
+    try:
+        return [str(s) for s in parse(text)]
+    except Exception as e:
+        return type(e)
+
+
+#: Pieces of random spec strings. Hashes and files are only tokenized,
+#: as parsing them needs a database or files.
+_pieces = [
+    'mpileaks', 'libelf', '_openmpi', 'mvapich_foo', 'builtin.mock.mpich',
+    'x', '1', '1.2', '2.0.1', '1.2a', 'develop', 'foo-bar', 'a.b-c',
+    'debug', 'shared', 'cflags', 'cppflags', 'os', 'target', 'arch',
+    'gcc', 'intel', 'None', 'True', 'abc=def', '-O3',
+    '^', '@', ':', ',', '+', '-', '~', '%', '=', '==',
+    ' ', ' ', ' ', '  ', '\t']
+_special_pieces = ['/', '/abc123', 'dir/spec.yaml', './x.yaml', '*', '!']
+_words = [p for p in _pieces if p.strip() and p[0].isalnum()]
+_quotes = ['"', "'"]
+
+
+def random_strings(count, seed, pieces=_pieces, quotes=True):
+    """Return a reproducible list of random spec strings."""
+    rng = random.Random(seed)
+    strings = []
+    for _ in range(count):
+        text = ''.join(rng.choice(pieces)
+                       for _ in range(rng.randint(1, 12)))
+        if quotes and rng.random() < 0.1:
+            # A quoted value with spaces, like cflags="-O3 -g"
+            text += ' cflags={0}{1} {2}{0}'.format(
+                rng.choice(_quotes), rng.choice(_words), rng.choice(_words))
+        strings.append(text)
+    return strings
+
+
+def random_specs(count, seed):
+    """Return a reproducible list of random, mostly valid, spec strings."""
+    rng = random.Random(seed)
+
+    def _node(name):
+        text = name
+        if rng.random() < 0.5:
+            text += rng.choice(['@', ' @', '@ ']) + rng.choice(
+                ['1.2', '1.2:', ':2.0.1', '1.2:1.4,1.6', 'develop', '=1.2'])
+        for _ in range(rng.randint(0, 2)):
+            text += rng.choice([' +', '+', '~', ' ~', ' -']) + rng.choice(
+                ['debug', 'shared', 'qt_4'])
+        if rng.random() < 0.3:
+            text += ' {0}={1}'.format(
+                rng.choice(['debug', 'cflags', 'mode']),
+                rng.choice(['4', '-O3', '"-O3 -g"', "'a b'", 'x,y']))
+        if rng.random() < 0.3:
+            text += rng.choice(['%', ' %', ' % ']) + rng.choice(
+                ['gcc', 'intel@12.1:12.6', 'clang@3.3'])
+        return text
+
+    strings = []
+    for _ in range(count):
+        text = _node(rng.choice(['mpileaks', 'mvapich_foo', '']))
+        for _ in range(rng.randint(0, 3)):
+            text += rng.choice([' ^', '^', ' ^ ']) + _node(rng.choice(
+                ['libelf', '_openmpi', 'builtin.mock.mpich', 'dyninst']))
+        strings.append(text.strip())
+    return strings
+
+
+_spec_strings = [
+    'mvapich_foo ^_openmpi@1.2:1.4,1.6%intel@12.1:12.6+debug~qt_4',
+    'mvapich_foo ^_openmpi@1.2:1.4,1.6%intel@12.1:12.6 debug=2 ~qt_4',
+    "mvapich cppflags='-O3 -fPIC' emacs_foo",
+    'mvapich cflags="-O3" ^mpich cflags="-g" os=fe',
+    'mvapich_foo debug= 4 ^_openmpi',
+    'mvapich_foo ^ _openmpi @1.2 : 1.4 , 1.6 % intel @ 12.1 : 12.6 + debug',
+    'builtin.mock.mpileaks@2.3 arch=test-debian6-x86_64',
+    'dir/spec.yaml', '/abcdef', 'mpileaks ^/abcdef',
+]
+
+
+def test_old_lexer_corpus_tokens():
+    corpus = _spec_strings + directive_strings(spack.paths.mock_packages_path)
+    for text in corpus:
+        assert new_lex(text) == old_lex(text), text
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_old_lexer_random_tokens(seed):
+    strings = random_specs(500, seed) + random_strings(
+        1000, seed, _pieces + _special_pieces)
+    for text in strings:
+        assert new_lex(text) == old_lex(text), text
+
+
+def _check_same_specs(text):
+    expected = _parse_result(old_parse, text)
+    assert _parse_result(sp.SpecParser().parse, text) == expected, text
+
+    if not isinstance(expected, list) or len(expected) != 1:
+        return
+    # Specs built from strings are the same, whether they are parsed or
+    # copied from the cache
+    sp._parsed_specs.pop(text, None)
+    assert [str(sp.Spec(text))] == expected, text
+    assert [str(sp.Spec(text))] == expected, text
+    assert sp.Spec(text) == old_parse(text)[0], text
+
+
+def test_old_parser_corpus_specs(mock_packages):
+    corpus = _spec_strings[:-3] + directive_strings(
+        spack.paths.mock_packages_path)
+    for text in corpus:
+        _check_same_specs(text)
+
+
+@pytest.mark.parametrize('seed', range(2))
+def test_old_parser_random_specs(mock_packages, seed):
+    for text in random_specs(200, seed) + random_strings(200, seed):
+        _check_same_specs(text)
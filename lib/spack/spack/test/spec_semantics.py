@@ -16,6 +16,7 @@
 import spack.architecture
 import spack.directives
 import spack.error
+import spack.spec
 
 
 def make_spec(spec_like, concrete):
@@ -528,6 +529,41 @@ def test_satisfies_same_spec_with_different_hash(self):
         assert not s1.satisfies(s2)
         assert not s2.satisfies(s1)
 
+    def test_fingerprint_is_a_snapshot(self):
+        s = Spec('mpileaks ^callpath')
+        fingerprint = s._fingerprint()
+        assert Spec('mpileaks ^callpath')._fingerprint() == fingerprint
+
+        s['callpath'].constrain('@2.0')
+        assert s._fingerprint() != fingerprint
+
+    def test_satisfies_dependencies_strict_edges(self):
+        """Ensure cached results of strict checks depend on the edges of
+        the DAGs, not only on their nodes."""
+        def _dag(nested):
+            mpileaks, callpath, dyninst = (
+                Spec('mpileaks'), Spec('callpath'), Spec('dyninst'))
+            mpileaks._add_dependency(callpath, ('build', 'link'))
+            parent = callpath if nested else mpileaks
+            parent._add_dependency(dyninst, ('build', 'link'))
+            return mpileaks
+
+        flat, nested = _dag(False), _dag(True)
+        assert flat._fingerprint() != nested._fingerprint()
+
+        spack.spec._satisfied_dependencies.clear()
+        assert flat.satisfies(flat, strict=True)
+        assert not flat.satisfies(nested, strict=True)
+
+    def test_satisfies_dependencies_after_changes(self):
+        """Ensure cached results are not reused for modified specs."""
+        s = Spec('mpileaks ^callpath')
+        assert s.satisfies('mpileaks ^callpath@1.0')
+
+        s['callpath'].constrain('@2.0')
+        assert not s.satisfies('mpileaks ^callpath@1.0')
+        assert s.satisfies('mpileaks ^callpath@2.0')
+
     # ========================================================================
     # Indexing specs
     # ========================================================================
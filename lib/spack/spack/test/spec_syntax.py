@@ -10,6 +10,7 @@
 import llnl.util.filesystem as fs
 
 import spack.hash_types as ht
+import spack.parse
 import spack.repo
 import spack.store
 import spack.spec as sp
@@ -829,3 +830,41 @@ def test_compare_abstract_specs(self):
         for a, b in itertools.product(specs, repeat=2):
             # Check that we can compare without raising an error
             assert a <= b or b < a
+
+    @pytest.mark.parametrize('text', [
+        'mvapich_foo ^_openmpi@1.2:1.4,1.6%intel@12.1:12.6+debug~qt_4',
+        "\tmvapich_foo debug='4'  cflags=\"-O3 -g\"\n",
+        'mvapich_foo\\ bar debug= 4',
+        '',
+    ])
+    def test_split_like_shlex(self, text):
+        assert spack.parse.split(text) == shlex.split(text)
+
+    def test_lex_error_position(self):
+        with pytest.raises(spack.parse.LexError) as exc_info:
+            sp.SpecLexer().lex(['mvapich_foo.2:.'])
+        assert exc_info.value.pos == len('mvapich_foo.2:')
+
+    def test_parsed_specs_are_copies(self):
+        string = 'mvapich_foo@1.2+debug cflags=-O3 ^_openmpi@1.6 ^stackwalker'
+        first = Spec(string)
+        second = Spec(string)
+        assert second == first
+        assert second is not first
+        assert second['_openmpi'] is not first['_openmpi']
+        assert second['_openmpi'].dependents() == [second]
+
+        # Modifying a parsed spec doesn't modify the specs parsed later
+        second.versions = sp.vn.VersionList(['1.3'])
+        second.variants['debug'].value = False
+        second['_openmpi'].versions.intersect(sp.vn.ver('1.6.1'))
+        second._add_dependency(Spec('libelf'), ())
+        assert Spec(string) == first
+        assert str(Spec(string)) == str(first)
+
+    @pytest.mark.db
+    def test_spec_by_hash_is_not_cached(self, database):
+        mpileaks = database.query_one('mpileaks ^zmpi')
+        string = 'mpileaks /' + mpileaks.dag_hash()
+        assert Spec(string) == mpileaks
+        assert string not in sp._parsed_specs
@@ -11,6 +11,7 @@
 import ast
 import inspect
 import os
+import pickle
 
 from collections import Iterable, Mapping
 
@@ -125,6 +126,90 @@ def test_to_record_dict(mock_packages, config):
             assert record[key] == value
 
 
+@pytest.mark.parametrize('protocol', range(pickle.HIGHEST_PROTOCOL + 1))
+def test_pickle_round_trip(mock_packages, config, protocol):
+    spec = Spec('mpileaks ^zmpi').concretized()
+    copy = pickle.loads(pickle.dumps(spec, protocol))
+    assert copy == spec
+    assert copy.dag_hash() == spec.dag_hash()
+    for node in spec.traverse():
+        assert copy[node.name].variants == node.variants
+        assert copy[node.name].architecture == node.architecture
+
+
+def test_specs_node_dicts_round_trip(mock_packages, config, monkeypatch):
+    specs = [Spec(s).concretized() for s in ('mpileaks ^zmpi', 'callpath')]
+    node_dicts = spack.spec.specs_to_node_dicts(specs, hash=ht.build_hash)
+
+    nodes = set(s.build_hash() for x in specs for s in x.traverse())
+    assert set(node_dicts) == nodes
+
+    node_dicts = sjson.load(sjson.dump(node_dicts))
+
+    # Stored hashes are trusted instead of being computed again
+    monkeypatch.setattr(Spec, '_spec_hash', None)
+    copies = spack.spec.specs_from_node_dicts(node_dicts, hash=ht.build_hash)
+    for spec in specs:
+        copy = copies[spec.build_hash()]
+        assert copy.eq_dag(spec)
+        assert copy.dag_hash() == spec.dag_hash()
+
+
+def test_specs_from_node_dict_share_values(mock_packages, config):
+    spec = Spec('multivalue-variant foo="bar,baz"').concretized()
+    node = sjson.load(sjson.dump(spec.to_node_dict()))
+    first, second = (Spec.from_node_dict(node) for _ in range(2))
+
+    assert first == second
+    assert first.name is second.name
+    assert first.versions[0] is second.versions[0]
+    assert first.compiler.name is second.compiler.name
+    assert first.architecture.os is second.architecture.os
+    for name, variant in first.variants.items():
+        assert variant.name is second.variants[name].name
+        assert variant.value is second.variants[name].value
+
+    # Attributes live in slots, a __dict__ is made only when needed
+    assert not first.__dict__
+    first.mpicc = 'mpicc'
+    assert first.__dict__ == {'mpicc': 'mpicc'}
+
+
+def test_memory_per_spec_from_node_dict():
+    """Checks the memory used by the specs of a large, synthetic database"""
+    tracemalloc = pytest.importorskip('tracemalloc')
+
+    def node(i):
+        parameters = dict(
+            [('shared', True), ('build_type', 'Release'), ('cxxstd', ['11'])] +
+            [(flag, []) for flag in spack.spec._valid_compiler_flags]
+        )
+        return {'pkg{0}'.format(i % 50): {
+            'version': '{0}.{1}'.format(i % 7, i % 3),
+            'arch': {'platform': 'linux', 'platform_os': 'ubuntu18.04',
+                     'target': 'x86_64'},
+            'compiler': {'name': 'gcc', 'version': '9.3.0'},
+            'namespace': 'builtin',
+            'parameters': parameters,
+            'hash': 'a' * 32
+        }}
+
+    nodes = [node(i) for i in range(500)]
+    # Warm up the caches used to read specs
+    Spec.from_node_dict(nodes[0])
+
+    tracemalloc.start()
+    try:
+        specs = [Spec.from_node_dict(n) for n in nodes]
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Each of these specs took ~3600 bytes with a __dict__ per object and
+    # no shared values, and takes ~1800 bytes with slots
+    assert size / len(specs) < 2800
+
+
 def test_ordered_read_not_required_for_consistent_dag_hash(
         config, mock_packages
 ):
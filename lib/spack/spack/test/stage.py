@@ -11,14 +11,18 @@
 import stat
 import tempfile
 import getpass
+import hashlib
 
 import pytest
 
 from llnl.util.filesystem import mkdirp, partition_path, touch, working_dir
 
+import spack.config
 import spack.paths
 import spack.stage
 import spack.util.executable
+import spack.util.web
+import spack.version
 
 from spack.resource import Resource
 from spack.stage import Stage, StageComposite, ResourceStage, DIYStage
@@ -942,3 +946,47 @@ def test_cannot_access(capsys):
 
     captured = capsys.readouterr()
     assert 'Insufficient permissions' in str(captured)
+
+
+def test_get_checksums_for_versions_streamed(tmpdir, monkeypatch):
+    """Archives are checksummed while they are downloaded, without
+    creating a stage."""
+    url_dict = {}
+    expected = {}
+    for version in ('1.0', '1.1', '2.0'):
+        archive = tmpdir.join('foo-{0}.tar.gz'.format(version))
+        archive.write('foo {0}\n'.format(version))
+        url_dict[spack.version.Version(version)] = 'file://' + str(archive)
+        expected[version] = hashlib.sha256(archive.read_binary()).hexdigest()
+    url_dict[spack.version.Version('3.0')] = 'file:///no/such/foo.tar.gz'
+
+    def _no_stage(*args, **kwargs):
+        raise AssertionError('archives should not be staged')
+    monkeypatch.setattr(spack.stage.Stage, '__init__', _no_stage)
+
+    with spack.config.override('config:url_fetch_method', 'urllib'):
+        version_lines = spack.stage.get_checksums_for_versions(
+            url_dict, 'foo', batch=True, jobs=2)
+    assert version_lines.split('\n') == [
+        "    version('{0}', sha256='{1}')".format(v, expected[v])
+        for v in ('2.0', '1.1', '1.0')]
+
+
+def test_get_checksums_for_versions_streamed_html(monkeypatch):
+    """HTML pages are not reported as the checksums of archives."""
+    def _fetch_url_to_file(url, path, hasher=None, **kwargs):
+        hasher.update(b'content')
+        if url.endswith('.html'):
+            return url, {'Content-Type': 'text/html'}
+        return url, {'Content-Type': 'application/x-gzip'}
+    monkeypatch.setattr(
+        spack.util.web, 'fetch_url_to_file', _fetch_url_to_file)
+
+    url_dict = {
+        spack.version.Version('1.0'): 'https://example.com/foo-1.0.tar.gz',
+        spack.version.Version('2.0'): 'https://example.com/foo-2.0.html'}
+    with spack.config.override('config:url_fetch_method', 'urllib'):
+        version_lines = spack.stage.get_checksums_for_versions(
+            url_dict, 'foo', batch=True, jobs=2)
+    assert version_lines == "    version('1.0', sha256='{0}')".format(
+        hashlib.sha256(b'content').hexdigest())
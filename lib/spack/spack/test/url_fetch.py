@@ -11,9 +11,11 @@
 from llnl.util.filesystem import working_dir, is_exe
 import llnl.util.tty as tty
 
+import spack.caches
 import spack.repo
 import spack.config
 import spack.fetch_strategy as fs
+import spack.stage
 from spack.spec import Spec
 from spack.stage import Stage
 from spack.version import ver
@@ -26,6 +28,12 @@ def checksum_type(request):
     return request.param
 
 
+@pytest.fixture(params=['curl', 'urllib'])
+def url_fetch_method(request):
+    with spack.config.override('config:url_fetch_method', request.param):
+        yield request.param
+
+
 @pytest.fixture
 def pkg_factory():
     Pkg = collections.namedtuple(
@@ -79,7 +87,8 @@ def test_fetch(
         secure,
         checksum_type,
         config,
-        mutable_mock_repo
+        mutable_mock_repo,
+        url_fetch_method
 ):
     """Fetch an archive and make sure we can checksum it."""
     mock_archive.url
@@ -185,6 +194,7 @@ def is_true():
 
     monkeypatch.setattr(sys.stdout, 'isatty', is_true)
     monkeypatch.setattr(tty, 'msg_enabled', is_true)
+    monkeypatch.setattr(fs, '_url_fetch_method', lambda: 'curl')
 
     fetcher = fs.URLFetchStrategy(mock_archive.url)
     with Stage(fetcher, path=testpath) as stage:
@@ -241,6 +251,7 @@ def _which(*args, **kwargs):
     # since it is too late in import processing to patch the defining
     # (spack.util.executable) module's symbol.
     monkeypatch.setattr(fs, 'which', _which)
+    monkeypatch.setattr(fs, '_url_fetch_method', lambda: 'curl')
 
     testpath = str(tmpdir)
     url = 'http://github.com/spack/spack'
@@ -252,3 +263,73 @@ def _which(*args, **kwargs):
             out = stage.fetch()
 
         assert err_fmt.format('curl') in out
+
+
+def test_urllib_fetch_checksums_while_downloading(
+        tmpdir, mock_archive, monkeypatch, config):
+    """Check that the archive is not read again to verify its checksum
+    after it was downloaded with urllib."""
+    with open(mock_archive.archive_file, 'rb') as f:
+        digest = crypto.hash_fun_for_algo('sha256')(f.read()).hexdigest()
+
+    fetcher = fs.URLFetchStrategy(mock_archive.url, digest)
+    with spack.config.override('config:url_fetch_method', 'urllib'):
+        with Stage(fetcher, path=str(tmpdir)):
+            fetcher.fetch()
+            assert not os.path.exists(fetcher.archive_file + '.part')
+
+            def _fail(*args, **kwargs):
+                raise AssertionError('the archive should not be read again')
+            monkeypatch.setattr(crypto.Checker, 'check', _fail)
+            fetcher.check()
+
+            # A corrupted download is still detected
+            fetcher._streamed_checksum = (fetcher.archive_file, 'abc')
+            with pytest.raises(fs.ChecksumError):
+                fetcher.check()
+
+
+def test_fetch_without_save_filename(
+        tmpdir, mock_archive, monkeypatch, config, url_fetch_method):
+    """Check that an archive the stage has no name for is saved under its
+    remote name."""
+    monkeypatch.setattr(spack.stage.Stage, 'save_filename', None)
+
+    fetcher = fs.URLFetchStrategy(mock_archive.url)
+    with Stage(fetcher, path=str(tmpdir)) as stage:
+        fetcher.fetch()
+        archive = os.path.join(stage.path, os.path.basename(mock_archive.url))
+        assert os.path.isfile(archive)
+        assert not os.path.exists(archive + '.part')
+
+
+def test_source_tree_cache(tmpdir, mock_archive, monkeypatch, config):
+    """Check that expanded archives are cached, and that later stages are
+    populated from the cache instead of expanding the archive again."""
+    with open(mock_archive.archive_file, 'rb') as f:
+        digest = crypto.hash_fun_for_algo('sha256')(f.read()).hexdigest()
+
+    cache = fs.FsCache(str(tmpdir.join('cache')))
+    monkeypatch.setattr(spack.caches, 'fetch_cache', cache)
+
+    def stage_archive(name):
+        fetcher = fs.URLFetchStrategy(mock_archive.url, digest)
+        with Stage(fetcher, path=str(tmpdir.join(name))) as stage:
+            stage.fetch()
+            stage.check()
+            stage.expand_archive()
+            assert stage.srcdir == mock_archive.expanded_archive_basedir
+            configure = os.path.join(stage.source_path, 'configure')
+            assert is_exe(configure)
+            return os.stat(configure).st_nlink
+
+    with spack.config.override('config:source_tree_cache', 'copy'):
+        stage_archive('first')
+        assert cache.expanded_tree(digest) is not None
+
+        def _fail(*args, **kwargs):
+            raise AssertionError('the archive should not be expanded again')
+        monkeypatch.setattr(fs, 'decompressor_for', lambda *args: _fail)
+
+        # Staged files are never shared with the cached tree
+        assert stage_archive('second') == 1
@@ -0,0 +1,172 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+import io
+import os
+import stat
+import tarfile
+import zipfile
+
+import pytest
+
+import llnl.util.filesystem as fs
+import spack.util.compression as compression
+from spack.util.executable import which
+
+#: Size of a file that is written without the pool of threads
+large_size = compression._threaded_write_max_size + 1
+
+
+def _add_to_tar(tar, name, data=None, mode=0o644, **kwargs):
+    info = tarfile.TarInfo(name)
+    info.mode = mode
+    info.mtime = 1000000000
+    for key, value in kwargs.items():
+        setattr(info, key, value)
+    if data is not None:
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+    else:
+        tar.addfile(info)
+
+
+@pytest.fixture()
+def tarball(tmpdir):
+    path = str(tmpdir.join('archive.tar'))
+    with tarfile.open(path, 'w') as tar:
+        _add_to_tar(tar, 'pkg', type=tarfile.DIRTYPE, mode=0o755)
+        _add_to_tar(tar, 'pkg/configure', b'#!/bin/sh\n', mode=0o755)
+        _add_to_tar(tar, 'pkg/src/main.c', b'int main(){}\n')
+        _add_to_tar(tar, 'pkg/big.dat', b'x' * large_size)
+        _add_to_tar(tar, 'pkg/link.c', type=tarfile.SYMTYPE,
+                    linkname='src/main.c')
+        _add_to_tar(tar, 'pkg/hard.c', type=tarfile.LNKTYPE,
+                    linkname='pkg/src/main.c')
+        _add_to_tar(tar, '../evil', b'evil\n')
+    return path
+
+
+def _compress(path, codec):
+    if codec is None:
+        return path
+    if codec == 'xz' and not which('xz'):
+        pytest.skip('xz is not available')
+    exe = which({'gz': 'gzip', 'bz2': 'bzip2', 'xz': 'xz'}[codec])
+    exe('-k', path)
+    return '{0}.{1}'.format(path, codec)
+
+
+@pytest.mark.parametrize('codec', [None, 'gz', 'bz2', 'xz'])
+def test_untar(tmpdir, tarball, codec):
+    archive = _compress(tarball, codec)
+    expand_dir = tmpdir.join('expanded')
+    expand_dir.ensure(dir=True)
+
+    with expand_dir.as_cwd():
+        compression.decompressor_for(archive)(archive)
+
+    pkg = expand_dir.join('pkg')
+    assert fs.is_exe(str(pkg.join('configure')))
+    assert pkg.join('src', 'main.c').read() == 'int main(){}\n'
+    assert pkg.join('big.dat').size() == large_size
+    assert os.readlink(str(pkg.join('link.c'))) == 'src/main.c'
+    assert pkg.join('link.c').read() == 'int main(){}\n'
+    assert pkg.join('hard.c').read() == 'int main(){}\n'
+    assert os.path.getmtime(str(pkg.join('src', 'main.c'))) == 1000000000
+    assert not tmpdir.join('evil').exists()
+
+
+def test_unzip(tmpdir):
+    archive = str(tmpdir.join('archive.zip'))
+    with zipfile.ZipFile(archive, 'w') as zf:
+        info = zipfile.ZipInfo('pkg/configure')
+        info.external_attr = (stat.S_IFREG | 0o755) << 16
+        zf.writestr(info, '#!/bin/sh\n')
+        zf.writestr('pkg/src/main.c', 'int main(){}\n')
+        info = zipfile.ZipInfo('pkg/link.c')
+        info.external_attr = (stat.S_IFLNK | 0o777) << 16
+        zf.writestr(info, 'src/main.c')
+
+    expand_dir = tmpdir.join('expanded')
+    expand_dir.ensure(dir=True)
+    with expand_dir.as_cwd():
+        compression.decompressor_for(archive)(archive)
+
+    pkg = expand_dir.join('pkg')
+    assert fs.is_exe(str(pkg.join('configure')))
+    assert pkg.join('src', 'main.c').read() == 'int main(){}\n'
+    assert os.readlink(str(pkg.join('link.c'))) == 'src/main.c'
+
+
+def test_expanded_modes_follow_umask(tmpdir, monkeypatch):
+    monkeypatch.setattr(compression, '_current_umask', lambda: 0o022)
+    archive = str(tmpdir.join('archive.tar'))
+    with tarfile.open(archive, 'w') as tar:
+        _add_to_tar(tar, 'pkg', type=tarfile.DIRTYPE, mode=0o777)
+        _add_to_tar(tar, 'pkg/tool', b'tool\n', mode=0o6777)
+        _add_to_tar(tar, 'pkg/big.dat', b'x' * large_size, mode=0o4666)
+
+    expand_dir = tmpdir.join('expanded')
+    expand_dir.ensure(dir=True)
+    with expand_dir.as_cwd():
+        compression._untar(archive)
+
+    def _mode(*parts):
+        return stat.S_IMODE(os.stat(str(expand_dir.join(*parts))).st_mode)
+
+    assert _mode('pkg') == 0o755
+    assert _mode('pkg', 'tool') == 0o755
+    assert _mode('pkg', 'big.dat') == 0o644
+
+
+def test_untar_falls_back_to_tar(tmpdir, monkeypatch):
+    calls = []
+    monkeypatch.setattr(compression, '_tar', calls.append)
+
+    archive = tmpdir.join('archive.tar.gz')
+    archive.write_binary(b'\x1f\x8b' + b'not really gzip')
+    compression._untar(str(archive))
+
+    assert calls == [str(archive)]
+
+
+def test_untar_fallback_removes_partial_output(tmpdir, tarball, monkeypatch):
+    expand_dir = tmpdir.join('expanded')
+    expand_dir.ensure(dir=True)
+    expand_dir.ensure('existing')
+
+    def _fail(*args, **kwargs):
+        raise IOError('disk full')
+    monkeypatch.setattr(compression, '_write_member_data', _fail)
+
+    listings = []
+    monkeypatch.setattr(
+        compression, '_tar', lambda archive: listings.append(
+            sorted(os.listdir(os.getcwd()))))
+
+    with expand_dir.as_cwd():
+        compression._untar(tarball)
+
+    assert listings == [['existing']]
+
+
+def test_unzip_closes_archive_handles(tmpdir, monkeypatch):
+    archive = str(tmpdir.join('archive.zip'))
+    with zipfile.ZipFile(archive, 'w') as zf:
+        for i in range(8):
+            zf.writestr('pkg/file{0}'.format(i), 'data\n')
+
+    opened = []
+
+    class _ZipFile(zipfile.ZipFile):
+        def __init__(self, *args, **kwargs):
+            super(_ZipFile, self).__init__(*args, **kwargs)
+            opened.append(self)
+    monkeypatch.setattr(zipfile, 'ZipFile', _ZipFile)
+
+    with tmpdir.as_cwd():
+        compression._unzip(archive)
+
+    assert opened
+    assert all(zf.fp is None for zf in opened)
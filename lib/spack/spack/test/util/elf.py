@@ -0,0 +1,101 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+import os
+import platform
+
+import pytest
+
+import spack.paths
+import spack.relocate
+import spack.util.elf as elf
+import spack.util.executable
+
+pytestmark = pytest.mark.skipif(
+    platform.system().lower() != 'linux', reason='ELF is Linux only'
+)
+
+
+@pytest.fixture()
+def elf_binary(tmpdir):
+    """Factory fixture that compiles an ELF executable with the
+    RPATHs passed as argument.
+    """
+    def _factory(rpaths, new_dtags=False):
+        source = tmpdir.join('main.c')
+        source.write('int main(){ return 0; }\n')
+        executable = tmpdir.join('main.x')
+        # Other tests may leave a build environment behind, with Spack's
+        # compiler wrappers in PATH and variables that add RPATHs
+        path = [d for d in os.environ['PATH'].split(os.pathsep)
+                if not d.startswith(spack.paths.build_env_path)]
+        gcc = spack.util.executable.which('gcc', path=path)
+        dtags = '--enable-new-dtags' if new_dtags else '--disable-new-dtags'
+        gcc('-Wl,{0}'.format(dtags),
+            '-Wl,-rpath={0}'.format(':'.join(rpaths)),
+            str(source), '-o', str(executable),
+            env={'PATH': os.pathsep.join(path)})
+        return str(executable)
+    return _factory
+
+
+@pytest.mark.requires_executables('gcc')
+@pytest.mark.parametrize('new_dtags', [True, False])
+def test_get_rpaths(elf_binary, new_dtags):
+    binary = elf_binary(['/foo/lib', '/bar/lib64'], new_dtags=new_dtags)
+    assert elf.get_rpaths(binary) == ['/foo/lib', '/bar/lib64']
+
+    with open(binary, 'rb') as f:
+        parsed = elf.parse_elf(f)
+    expected_tag = elf.DT_RUNPATH if new_dtags else elf.DT_RPATH
+    assert [tag for tag, _, _ in parsed.rpath_entries] == [expected_tag]
+
+
+@pytest.mark.requires_executables('gcc')
+@pytest.mark.parametrize('new_dtags', [True, False])
+def test_set_rpaths_in_place(elf_binary, new_dtags):
+    binary = elf_binary(['/a/long/prefix/lib'], new_dtags=new_dtags)
+    assert elf.set_rpaths_in_place(binary, ['/short/lib', '/x'])
+    assert elf.get_rpaths(binary) == ['/short/lib', '/x']
+
+    # RUNPATH is turned into RPATH, like with patchelf --force-rpath
+    with open(binary, 'rb') as f:
+        parsed = elf.parse_elf(f)
+    assert [tag for tag, _, _ in parsed.rpath_entries] == [elf.DT_RPATH]
+
+    # The binary must still be runnable
+    spack.util.executable.Executable(binary)()
+
+
+@pytest.mark.requires_executables('gcc')
+def test_set_rpaths_in_place_does_not_grow(elf_binary):
+    binary = elf_binary(['/lib'])
+    assert not elf.set_rpaths_in_place(binary, ['/a/much/longer/lib'])
+    assert elf.get_rpaths(binary) == ['/lib']
+
+
+def test_parse_non_elf_file(tmpdir):
+    script = tmpdir.join('script.sh')
+    script.write('#!/bin/sh\necho hello\n')
+    with pytest.raises(elf.ElfParsingError):
+        elf.get_rpaths(str(script))
+
+
+@pytest.mark.requires_executables('gcc')
+def test_relocate_without_patchelf(elf_binary, monkeypatch):
+    # Make sure patchelf is never needed when RPATHs shrink
+    def _fail():
+        raise AssertionError('patchelf should not be called')
+    monkeypatch.setattr(spack.relocate, '_patchelf', _fail)
+
+    binary = elf_binary(['/original/prefix/lib', '/usr/lib64'])
+    spack.relocate.relocate_elf_binaries(
+        binaries=[binary],
+        orig_root='/original',
+        new_root=None,
+        new_prefixes={'/original/prefix': '/new'},
+        rel=False,
+        orig_prefix=None, new_prefix=None
+    )
+    assert spack.relocate._elf_rpaths_for(binary) == ['/new/lib', '/usr/lib64']
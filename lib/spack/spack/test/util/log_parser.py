@@ -3,8 +3,16 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
+import gzip
+import re
+
+import pytest
+
+import ctest_log_parser
 from ctest_log_parser import CTestLogParser
 
+from spack.util.log_parse import parse_log_events
+
 
 def test_log_parser(tmpdir):
     log_file = tmpdir.join('log.txt')
@@ -32,3 +40,69 @@ def test_log_parser(tmpdir):
 
     assert len(warnings) == 1
     assert all(w.text.endswith('W') for w in warnings)
+
+
+def test_parse_compressed_log(tmpdir):
+    log_file = str(tmpdir.join('log.txt.gz'))
+    f = gzip.open(log_file, 'wb')
+    f.write(b"checking for gcc... gcc\n"
+            b"configure: error: cannot run C compiled programs.\n")
+    f.close()
+
+    errors, warnings = parse_log_events(log_file)
+
+    assert len(errors) == 1
+    assert errors[0].text.startswith('configure: error')
+    assert not warnings
+
+
+def _events(events):
+    return [(e.line_no, e.text, e.pre_context, e.post_context)
+            for e in events]
+
+
+@pytest.mark.parametrize('block_size', [64, 1024 * 1024])
+def test_log_parser_blocks(tmpdir, monkeypatch, block_size):
+    monkeypatch.setattr(ctest_log_parser, '_block_size', block_size)
+
+    lines = []
+    for i in range(200):
+        if i % 17 == 3:
+            lines.append('src/foo.c:%d:1: error: something went wrong' % i)
+        elif i % 23 == 5:
+            lines.append('src/bar.c:%d:7: warning: unused variable' % i)
+        else:
+            lines.append('checking for feature %d... yes' % i)
+    log_file = tmpdir.join('log.txt')
+    log_file.write('\n'.join(lines))  # no newline at the end
+
+    # scanning blocks finds the same events as checking each line
+    expected = CTestLogParser(profile=True).parse(str(log_file), 3, jobs=1)
+    errors, warnings = CTestLogParser().parse(str(log_file), 3)
+    assert _events(errors) == _events(expected[0])
+    assert _events(warnings) == _events(expected[1])
+    assert errors[1].source_file == 'src/foo.c'
+    assert errors[1].source_line_no == '20'
+
+    # lists of lines, like the output kept by reporters, are scanned too
+    errors, warnings = CTestLogParser().parse(lines, 3)
+    assert _events(errors) == _events(expected[0])
+    assert _events(warnings) == _events(expected[1])
+
+    errors, warnings = CTestLogParser().parse(
+        str(log_file), 3, max_errors=2)
+    assert [e.line_no for e in errors] == [4, 21]
+    assert len(errors[-1].post_context) == 3
+    assert all(w.line_no < 21 for w in warnings)
+
+
+def test_log_parser_keywords():
+    """Every regex matching errors or warnings contains a keyword."""
+    for regex in ctest_log_parser._error_matches + \
+            ctest_log_parser._warning_matches:
+        sources = getattr(regex, 'sources', [regex])
+        for source in sources:
+            # drop escapes and single characters in brackets, as in [Ee]
+            source = re.sub(r'\[.(.)\]', r'\1', source.replace('\\', ''))
+            assert any(k in source for k in ctest_log_parser._keywords), \
+                source
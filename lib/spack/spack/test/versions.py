@@ -7,6 +7,9 @@
 We try to maintain compatibility with RPM's version semantics
 where it makes sense.
 """
+import copy
+import pickle
+
 import pytest
 
 from spack.version import Version, VersionList, ver
@@ -562,3 +565,52 @@ def test_list_highest():
     assert vl2.highest_numeric() is None
     assert vl2.preferred() == Version('develop')
     assert vl2.lowest() == Version('master')
+
+
+def test_versions_are_interned():
+    assert Version('1.2.3') is Version('1.2.3')
+    assert Version(Version('1.2.3')) is Version('1.2.3')
+    assert ver('1.2.3') is Version('1.2.3')
+    assert ver('1.2:1.4') is ver('1.2:1.4')
+    assert ver('1.2:1.4').start is Version('1.2')
+
+    # Interned versions survive pickling and copies
+    v = Version('2.0.1')
+    assert pickle.loads(pickle.dumps(v)) is v
+    assert copy.deepcopy(v) is v
+
+    # Lists can be modified, so they are not shared
+    assert ver('1.2,1.4') is not ver('1.2,1.4')
+
+
+@pytest.mark.parametrize('versions', [
+    ['1.a', '1.b', '1.2.3', '1.2.3.1', '1.2.4', '1.10', '1.develop'],
+    ['0.9', '1', 'trunk', 'head', 'master', 'main', 'develop'],
+    ['alpha', 'beta', '1_0', '1.1', '1.1-rc1']
+])
+def test_version_sort_keys(versions):
+    parsed = [Version(v) for v in versions]
+    assert sorted(reversed(parsed)) == parsed
+    for a, b in zip(versions, versions[1:]):
+        assert_ver_lt(a, b)
+
+
+@pytest.mark.parametrize('vlist,other', [
+    ('1.0:1.5,2.0,3:', '1.4:2.1,2.5,3.1:3.2,4.0'),
+    ('1.2,1.4,1.6,1.8', '1.3:1.7'),
+    (':1.2,1.4:1.6', '1.1:1.3,1.6.7'),
+    ('1.2.5,1.3', '1.2'),
+    (':', '1.2,1.4:2'),
+])
+def test_list_intersection_matches_elementwise(vlist, other):
+    a, b = VersionList(vlist), VersionList(other)
+
+    expected = VersionList()
+    for x in a:
+        for y in b:
+            expected.add(x.intersection(y))
+
+    assert a.intersection(b) == expected
+    assert b.intersection(a) == expected
+    if expected:
+        assert a.overlaps(b) and b.overlaps(a)
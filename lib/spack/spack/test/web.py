@@ -2,10 +2,12 @@
 # Spack Project Developers. See the top-level COPYRIGHT file for details.
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
+import hashlib
 import os
 
 import ordereddict_backport
 import pytest
+import spack.config
 import spack.paths
 import spack.util.web
 from spack.version import ver
@@ -82,6 +84,61 @@ def test_spider_no_response(monkeypatch):
     assert not pages and not links
 
 
+def test_spider_reads_pages_once(monkeypatch):
+    read_urls = []
+    read_from_url = spack.util.web.read_from_url
+
+    def _read_from_url(url, *args, **kwargs):
+        read_urls.append(url)
+        return read_from_url(url, *args, **kwargs)
+    monkeypatch.setattr(spack.util.web, 'read_from_url', _read_from_url)
+
+    # Pages are not read again by later searches of the same spider
+    web_spider = spack.util.web.Spider(cache=False)
+    pages, links = web_spider.spider(root, depth=3)
+    assert sorted(read_urls) == sorted(pages) == sorted(
+        [root, page_1, page_2, page_3, page_4])
+
+    pages, links = web_spider.spider(page_1, depth=1)
+    assert sorted(pages) == sorted([page_1, page_2])
+    assert len(read_urls) == 5
+
+
+def test_spider_page_cache(monkeypatch, tmpdir):
+    import io
+    import spack.caches
+    import spack.util.file_cache
+
+    monkeypatch.setattr(spack.caches, 'misc_cache',
+                        spack.util.file_cache.FileCache(str(tmpdir)))
+
+    url = 'https://example.com/downloads/'
+    html = b'<a href="foo-1.0.tar.gz">foo-1.0.tar.gz</a>'
+    requests = []
+
+    def _read_from_url(url, accept_content_type=None, etag=None,
+                       last_modified=None):
+        requests.append(etag)
+        if etag == '"v1"':
+            return url, {}, None
+        return url, {'ETag': '"v1"'}, io.BytesIO(html)
+    monkeypatch.setattr(spack.util.web, 'read_from_url', _read_from_url)
+
+    # The first read stores the page in the cache
+    pages, links = spack.util.web.Spider().spider(url)
+    assert links == set([url + 'foo-1.0.tar.gz'])
+    assert requests == [None]
+
+    # By default cached pages are always validated with their ETag
+    assert spack.util.web.Spider().spider(url) == (pages, links)
+    assert requests == [None, '"v1"']
+
+    # Fresh pages are used without any request
+    with spack.config.override('config:spider_cache_ttl', 3600):
+        assert spack.util.web.Spider().spider(url) == (pages, links)
+    assert requests == [None, '"v1"']
+
+
 def test_find_versions_of_archive_0():
     versions = spack.util.web.find_versions_of_archive(
         root_tarball, root, list_depth=0)
@@ -195,3 +252,109 @@ def test_list_url(tmpdir):
                               'file-0.txt',
                               'file-1.txt',
                               'file-2.txt']
+
+
+@pytest.mark.parametrize('status,expect_stream', [
+    (304, False),
+    (404, None),
+])
+def test_read_from_url_conditional(monkeypatch, status, expect_stream):
+    from six.moves.urllib.error import HTTPError
+
+    requests = []
+
+    def _urlopen(req, *args, **kwargs):
+        requests.append(req)
+        raise HTTPError(req.get_full_url(), status, 'msg', {}, None)
+
+    monkeypatch.setattr(spack.util.web, '_urlopen', _urlopen)
+
+    url = 'https://example.com/index.json'
+    if expect_stream is None:
+        with pytest.raises(spack.util.web.SpackWebError):
+            spack.util.web.read_from_url(url, etag='"abc"')
+    else:
+        _, _, stream = spack.util.web.read_from_url(
+            url, etag='"abc"', last_modified='Tue, 02 Feb 2021 00:00:00 GMT')
+        assert stream is None
+
+    req = requests[-1]
+    assert req.get_header('If-none-match') == '"abc"'
+
+
+@pytest.fixture()
+def range_http_server(monkeypatch):
+    """Local HTTP/1.1 server that honors Range requests and records the
+    requests it receives and the connections it accepts."""
+    import threading
+    from six.moves import BaseHTTPServer
+
+    content = b''.join(b'%06d\n' % i for i in range(20000))
+    log = {'connections': 0, 'ranges': []}
+
+    class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+            log['connections'] += 1
+
+        def do_GET(self):
+            byte_range = self.headers.get('Range')
+            log['ranges'].append(byte_range)
+            start = int(byte_range[6:-1]) if byte_range else 0
+            self.send_response(206 if byte_range else 200)
+            self.send_header('Content-Type', 'application/x-gzip')
+            self.send_header('Content-Length', str(len(content) - start))
+            self.end_headers()
+            self.wfile.write(content[start:])
+
+        def log_message(self, *args):
+            pass
+
+    for var in ('http_proxy', 'HTTP_PROXY', 'all_proxy', 'ALL_PROXY'):
+        monkeypatch.delenv(var, raising=False)
+
+    server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    url = 'http://127.0.0.1:{0}/archive.tar.gz'.format(server.server_port)
+    try:
+        yield url, content, log
+    finally:
+        spack.util.web._connection_pool.clear()
+        server.shutdown()
+        server.server_close()
+
+
+def test_fetch_url_to_file_reuses_connections(range_http_server, tmpdir):
+    url, content, log = range_http_server
+
+    for name in ('a', 'b'):
+        hasher = hashlib.sha256()
+        path = str(tmpdir.join(name))
+        spack.util.web.fetch_url_to_file(url, path, hasher=hasher)
+        with open(path, 'rb') as f:
+            assert f.read() == content
+        assert hasher.hexdigest() == hashlib.sha256(content).hexdigest()
+
+    assert log['connections'] == 1
+
+
+def test_fetch_url_to_file_resumes(range_http_server, tmpdir):
+    url, content, log = range_http_server
+    partial = tmpdir.join('archive.tar.gz.part')
+    partial.write_binary(content[:1000])
+
+    hasher = hashlib.sha256()
+    spack.util.web.fetch_url_to_file(url, str(partial), hasher=hasher)
+
+    assert log['ranges'] == ['bytes=1000-']
+    assert partial.read_binary() == content
+    assert hasher.hexdigest() == hashlib.sha256(content).hexdigest()
+
+    # Without resume, the file is downloaded again from the start
+    spack.util.web.fetch_url_to_file(url, str(partial), resume=False)
+    assert log['ranges'][-1] is None
+    assert partial.read_binary() == content
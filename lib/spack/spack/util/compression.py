@@ -3,10 +3,30 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
-import re
+import contextlib
+import multiprocessing
+import multiprocessing.pool
 import os
+import re
+import shutil
+import stat
+import subprocess
+import tarfile
+import threading
+import time
+import zipfile
 from itertools import product
-from spack.util.executable import which
+
+import llnl.util.tty as tty
+from llnl.util.filesystem import mkdirp
+
+from spack.util.executable import which, ProcessError
+
+try:
+    import lzma  # novm # noqa: F401
+    _python_codecs = (None, 'gz', 'bz2', 'xz')
+except ImportError:
+    _python_codecs = (None, 'gz', 'bz2')
 
 # Supported archive extensions.
 PRE_EXTS   = ["tar", "TAR"]
@@ -23,21 +43,370 @@ def allowed_archive(path):
 
 
 def decompressor_for(path, extension=None):
-    """Get the appropriate decompressor for a path."""
+    """Get the appropriate decompressor for a path.
+
+    The decompressor is a callable that takes the path of an archive and
+    expands it in the current working directory. Tarballs and zip files are
+    expanded in process, other compressed files with external tools.
+    """
     if ((extension and re.match(r'\.?zip$', extension)) or
             path.endswith('.zip')):
-        unzip = which('unzip', required=True)
-        unzip.add_default_arg('-q')
-        return unzip
+        return _unzip
     if extension and re.match(r'gz', extension):
         gunzip = which('gunzip', required=True)
         return gunzip
     if extension and re.match(r'bz2', extension):
         bunzip2 = which('bunzip2', required=True)
         return bunzip2
+    return _untar
+
+
+#: Magic numbers of the compression formats used for tarballs
+_magic_numbers = [
+    (b'\x1f\x8b', 'gz'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x1f\x9d', 'Z'),
+]
+
+#: Regular files up to this size are handed to a pool of threads to be
+#: written, larger ones are written while they are read from the archive
+_threaded_write_max_size = 2 ** 20
+
+
+def _expansion_jobs():
+    return min(16, multiprocessing.cpu_count())
+
+
+def _compression_of(path):
+    with open(path, 'rb') as f:
+        head = f.read(6)
+    for magic, codec in _magic_numbers:
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def _xz_supports_threads(xz):
+    if not hasattr(_xz_supports_threads, 'result'):
+        help_text = xz('--long-help', output=str, error=str,
+                       fail_on_error=False)
+        _xz_supports_threads.result = '--threads' in help_text
+    return _xz_supports_threads.result
+
+
+def _decompression_command(codec):
+    """Command line of an external decompressor that writes to stdout.
+
+    External decompressors are used when they are multithreaded, or when
+    Python can't decode the format. Return None if Python should decode
+    the stream itself, or if no suitable tool is installed.
+    """
+    if codec == 'gz':
+        candidates = [('pigz', ['-dc'])]
+    elif codec == 'bz2':
+        candidates = [('lbzip2', ['-dc']), ('pbzip2', ['-dc'])]
+    elif codec == 'xz':
+        candidates = [('xz', ['-dc', '-T0'])]
+    elif codec == 'Z':
+        candidates = [('gzip', ['-dc']), ('uncompress', ['-c'])]
+    else:
+        return None
+
+    for name, args in candidates:
+        exe = which(name)
+        if exe is None:
+            continue
+        if name == 'xz' and not _xz_supports_threads(exe):
+            if codec in _python_codecs:
+                continue
+            args = ['-dc']
+        return exe.exe + args
+
+    if codec == 'xz' and codec not in _python_codecs:
+        xz = which('xz')
+        return xz.exe + ['-dc'] if xz else None
+    return None
+
+
+def _tar(archive):
     tar = which('tar', required=True)
     tar.add_default_arg('-oxf')
-    return tar
+    tar(archive)
+
+
+def _member_path(name):
+    """Relative path where an archive member is expanded, or None if it
+    would be outside of the destination directory."""
+    parts = [p for p in name.replace('\\', '/').split('/')
+             if p not in ('', '.')]
+    if not parts or '..' in parts:
+        return None
+    return os.path.join(*parts)
+
+
+def _untar(archive):
+    """Expand a tarball in the current working directory.
+
+    The tarball is read as a stream, decompressed either by Python or by a
+    multithreaded tool like ``pigz`` or ``xz -T0``, and its files are
+    written by a pool of threads. Formats that can be read neither way are
+    expanded with ``tar``.
+    """
+    codec = _compression_of(archive)
+    command = _decompression_command(codec)
+    if command is None and codec not in _python_codecs:
+        return _tar(archive)
+
+    dest = os.getcwd()
+    existing = set(os.listdir(dest))
+    proc = None
+    try:
+        if command:
+            proc = subprocess.Popen(
+                command + [archive], stdout=subprocess.PIPE)
+            tar = tarfile.open(fileobj=proc.stdout, mode='r|')
+        else:
+            tar = tarfile.open(archive, mode='r|' + (codec or ''))
+        with contextlib.closing(tar):
+            _extract_tar_stream(tar, dest)
+    except (tarfile.TarError, EOFError, IOError, OSError) as e:
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+        tty.debug('Expanding {0} in process failed: {1}'.format(
+            archive, str(e)))
+        # Don't let tar expand over what was partially written
+        _remove_new_entries(dest, existing)
+        return _tar(archive)
+    finally:
+        if proc is not None:
+            proc.stdout.close()
+            proc.wait()
+
+    if proc is not None and proc.returncode != 0:
+        raise ProcessError(
+            'Command exited with status {0}:'.format(proc.returncode),
+            ' '.join(command + [archive]))
+
+
+def _remove_new_entries(dest, existing):
+    """Remove the entries of dest that are not in existing."""
+    for name in os.listdir(dest):
+        if name in existing:
+            continue
+        path = os.path.join(dest, name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+
+def _current_umask():
+    """Return the umask of the process."""
+    # Prefer reading the umask to setting it, which briefly changes the
+    # permissions of files created by other threads
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except (IOError, OSError, ValueError):
+        pass
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+def _file_mode(mode, umask):
+    """Permissions of an expanded file, like ``tar`` and ``unzip`` set
+    them for users other than root: the umask applies, and the setuid and
+    setgid bits are dropped."""
+    return mode & 0o7777 & ~(stat.S_ISUID | stat.S_ISGID) & ~umask
+
+
+def _set_file_metadata(path, mode, mtime):
+    os.chmod(path, mode)
+    os.utime(path, (mtime, mtime))
+
+
+def _write_member_data(path, data, mode, mtime, slots):
+    try:
+        with open(path, 'wb') as f:
+            f.write(data)
+        _set_file_metadata(path, mode, mtime)
+    finally:
+        slots.release()
+
+
+def _extract_tar_stream(tar, dest):
+    """Extract a tarfile opened in stream mode into dest.
+
+    Members are read in order. Small regular files are written by a pool
+    of threads, links are created once all the files exist, and the
+    metadata of directories is set last, like ``tarfile.extractall``.
+    """
+    jobs = _expansion_jobs()
+    umask = _current_umask()
+    slots = threading.BoundedSemaphore(4 * jobs)
+    pool = multiprocessing.pool.ThreadPool(jobs)
+    pending, written = [], set()
+    directories, links = [], []
+    known_dirs = set([dest])
+
+    def _ensure_dir(path):
+        if path not in known_dirs:
+            mkdirp(path)
+            known_dirs.add(path)
+
+    def _wait_for_writes():
+        for result in pending:
+            result.get()
+        del pending[:]
+
+    try:
+        for member in tar:
+            relative_path = _member_path(member.name)
+            if relative_path is None:
+                tty.debug('Skipping archive member {0}'.format(member.name))
+                continue
+            path = os.path.join(dest, relative_path)
+
+            if member.isdir():
+                _ensure_dir(path)
+                directories.append((path, member))
+                continue
+
+            if member.issym() or member.islnk():
+                links.append((path, member))
+                continue
+
+            if not member.isfile():
+                tty.debug('Skipping special file {0}'.format(member.name))
+                continue
+
+            _ensure_dir(os.path.dirname(path))
+            if path in written:
+                # The same file appears twice: the last one wins
+                _wait_for_writes()
+            written.add(path)
+
+            source = tar.extractfile(member)
+            mode = _file_mode(member.mode, umask)
+            if member.size > _threaded_write_max_size:
+                with open(path, 'wb') as f:
+                    shutil.copyfileobj(source, f, _threaded_write_max_size)
+                _set_file_metadata(path, mode, member.mtime)
+            else:
+                data = source.read()
+                slots.acquire()
+                pending.append(pool.apply_async(
+                    _write_member_data,
+                    (path, data, mode, member.mtime, slots)))
+
+        _wait_for_writes()
+    finally:
+        pool.terminate()
+        pool.join()
+
+    for path, member in links:
+        _ensure_dir(os.path.dirname(path))
+        if os.path.lexists(path):
+            os.remove(path)
+        if member.issym():
+            os.symlink(member.linkname, path)
+            continue
+
+        target = _member_path(member.linkname)
+        if target is None:
+            tty.debug('Skipping hard link {0}'.format(member.name))
+            continue
+        target = os.path.join(dest, target)
+        try:
+            os.link(target, path)
+        except OSError:
+            shutil.copy2(target, path)
+
+    for path, member in sorted(directories, reverse=True):
+        _set_file_metadata(
+            path, _file_mode(member.mode, umask), member.mtime)
+
+
+def _unzip(archive):
+    """Expand a zip file in the current working directory.
+
+    Members are decompressed and written concurrently, each thread reading
+    the archive through its own handle. Permissions, symbolic links and
+    modification times are restored like ``unzip`` does.
+    """
+    try:
+        with contextlib.closing(zipfile.ZipFile(archive)) as zf:
+            infos = zf.infolist()
+    except zipfile.BadZipfile as e:
+        tty.debug('Expanding {0} in process failed: {1}'.format(
+            archive, str(e)))
+        unzip = which('unzip', required=True)
+        unzip.add_default_arg('-q')
+        return unzip(archive)
+
+    dest = os.getcwd()
+    umask = _current_umask()
+    local = threading.local()
+    handles, handles_lock = [], threading.Lock()
+    members, directories, links = [], [], []
+    for info in infos:
+        relative_path = _member_path(info.filename)
+        if relative_path is None:
+            tty.debug('Skipping archive member {0}'.format(info.filename))
+            continue
+        path = os.path.join(dest, relative_path)
+        mode = info.external_attr >> 16
+        if info.filename.endswith('/'):
+            mkdirp(path)
+            directories.append((path, info, mode))
+        elif stat.S_ISLNK(mode):
+            links.append((path, info))
+        else:
+            mkdirp(os.path.dirname(path))
+            members.append((path, info, mode))
+
+    def _mtime(info):
+        return time.mktime(info.date_time + (0, 0, -1))
+
+    def _handle():
+        if not hasattr(local, 'zipfile'):
+            local.zipfile = zipfile.ZipFile(archive)
+            with handles_lock:
+                handles.append(local.zipfile)
+        return local.zipfile
+
+    def _extract(item):
+        path, info, mode = item
+        with contextlib.closing(_handle().open(info)) as source:
+            with open(path, 'wb') as f:
+                shutil.copyfileobj(source, f, _threaded_write_max_size)
+        if mode:
+            os.chmod(path, _file_mode(mode, umask))
+        os.utime(path, (_mtime(info), _mtime(info)))
+
+    pool = multiprocessing.pool.ThreadPool(_expansion_jobs())
+    try:
+        pool.map(_extract, members)
+    finally:
+        pool.terminate()
+        pool.join()
+        for handle in handles:
+            handle.close()
+
+    with contextlib.closing(zipfile.ZipFile(archive)) as zf:
+        for path, info in links:
+            if os.path.lexists(path):
+                os.remove(path)
+            os.symlink(zf.read(info).decode('utf-8'), path)
+
+    for path, info, mode in sorted(directories, reverse=True):
+        if mode:
+            os.chmod(path, _file_mode(mode, umask))
+        os.utime(path, (_mtime(info), _mtime(info)))
 
 
 def strip_extension(path):
@@ -0,0 +1,253 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""Minimal reader and writer for the dynamic section of ELF files.
+
+This module knows just enough about the ELF format to read the RPATH
+(or RUNPATH) of an executable or a shared library and to rewrite it in
+place, as long as the new value is not longer than the old one. This
+avoids spawning a ``patchelf`` process for each binary during relocation,
+which is by far the common case when installing from a binary cache.
+Anything that would require growing the string table is left to
+``patchelf``.
+"""
+import struct
+
+import spack.error
+
+#: ELF magic number
+ELF_MAGIC = b'\x7fELF'
+
+#: Values of e_ident[EI_CLASS]
+ELFCLASS32, ELFCLASS64 = 1, 2
+
+#: Values of e_ident[EI_DATA]
+ELFDATA2LSB, ELFDATA2MSB = 1, 2
+
+#: Program header types we care about
+PT_LOAD, PT_DYNAMIC = 1, 2
+
+#: Dynamic section tags we care about
+DT_NULL = 0
+DT_STRTAB = 5
+DT_STRSZ = 10
+DT_RPATH = 15
+DT_RUNPATH = 29
+
+
+class ElfParsingError(spack.error.SpackError):
+    """Raised when a file is not an ELF file, or cannot be understood."""
+
+
+class ElfFile(object):
+    """Information on the dynamic section of an ELF file that is
+    relevant to read and modify its RPATHs.
+    """
+    def __init__(self):
+        #: True if this is a 64-bit ELF file
+        self.is_64_bit = False
+        #: Prefix for ``struct`` format strings (byte order)
+        self.byte_order = '<'
+        #: File offset of the dynamic section, or None for static files
+        self.dynamic_offset = None
+        #: File offset of the dynamic string table
+        self.strtab_offset = None
+        #: Size of the dynamic string table in bytes
+        self.strtab_size = None
+        #: List of (tag, file offset of the entry, offset in the string
+        #: table) for all the DT_RPATH and DT_RUNPATH entries
+        self.rpath_entries = []
+        #: Raw value of the RPATH (or RUNPATH) string
+        self.rpath = b''
+
+    @property
+    def has_rpath(self):
+        return bool(self.rpath_entries)
+
+    @property
+    def dyn_entry_format(self):
+        return self.byte_order + ('qQ' if self.is_64_bit else 'iI')
+
+
+def _read(f, offset, size):
+    f.seek(offset)
+    data = f.read(size)
+    if len(data) != size:
+        raise ElfParsingError('Unexpected end of file')
+    return data
+
+
+def _vaddr_to_offset(segments, vaddr):
+    """Map a virtual address onto a file offset using the PT_LOAD
+    segments of the file.
+    """
+    for p_offset, p_vaddr, p_filesz in segments:
+        if p_vaddr <= vaddr < p_vaddr + p_filesz:
+            return vaddr - p_vaddr + p_offset
+    raise ElfParsingError(
+        'Could not map address {0:#x} to a file offset'.format(vaddr)
+    )
+
+
+def parse_elf(f):
+    """Parse the ELF headers needed to locate the RPATH of a file.
+
+    Args:
+        f (file): file object opened in binary mode
+
+    Returns:
+        An ``ElfFile`` object
+
+    Raises:
+        ElfParsingError: if the file is not a valid ELF file
+    """
+    elf = ElfFile()
+
+    ident = f.read(16)
+    if len(ident) != 16 or ident[:4] != ELF_MAGIC:
+        raise ElfParsingError('Not an ELF file')
+
+    ei_class, ei_data = bytearray(ident[4:6])
+    if ei_class not in (ELFCLASS32, ELFCLASS64):
+        raise ElfParsingError('Unknown ELF class {0}'.format(ei_class))
+    if ei_data not in (ELFDATA2LSB, ELFDATA2MSB):
+        raise ElfParsingError('Unknown ELF data encoding {0}'.format(ei_data))
+
+    elf.is_64_bit = ei_class == ELFCLASS64
+    elf.byte_order = '<' if ei_data == ELFDATA2LSB else '>'
+
+    # Locate the program headers
+    if elf.is_64_bit:
+        phoff, = struct.unpack(elf.byte_order + 'Q', _read(f, 32, 8))
+        phentsize, phnum = struct.unpack(
+            elf.byte_order + 'HH', _read(f, 54, 4)
+        )
+        ph_fmt, ph_size = elf.byte_order + 'IIQQQQQQ', 56
+    else:
+        phoff, = struct.unpack(elf.byte_order + 'I', _read(f, 28, 4))
+        phentsize, phnum = struct.unpack(
+            elf.byte_order + 'HH', _read(f, 42, 4)
+        )
+        ph_fmt, ph_size = elf.byte_order + 'IIIIIIII', 32
+
+    if phnum and phentsize < ph_size:
+        raise ElfParsingError('Invalid program header size')
+
+    segments, dynamic = [], None
+    for i in range(phnum):
+        fields = struct.unpack(
+            ph_fmt, _read(f, phoff + i * phentsize, ph_size)
+        )
+        if elf.is_64_bit:
+            p_type, _, p_offset, p_vaddr, _, p_filesz = fields[:6]
+        else:
+            p_type, p_offset, p_vaddr, _, p_filesz = fields[:5]
+
+        if p_type == PT_LOAD:
+            segments.append((p_offset, p_vaddr, p_filesz))
+        elif p_type == PT_DYNAMIC:
+            dynamic = (p_offset, p_filesz)
+
+    # Statically linked files have no dynamic section, hence no RPATHs
+    if dynamic is None:
+        return elf
+
+    elf.dynamic_offset, dynamic_size = dynamic
+    entry_fmt = elf.dyn_entry_format
+    entry_size = struct.calcsize(entry_fmt)
+
+    strtab_vaddr = None
+    raw_rpath_entries = []
+    for i in range(dynamic_size // entry_size):
+        entry_offset = elf.dynamic_offset + i * entry_size
+        tag, value = struct.unpack(
+            entry_fmt, _read(f, entry_offset, entry_size)
+        )
+        if tag == DT_NULL:
+            break
+        elif tag == DT_STRTAB:
+            strtab_vaddr = value
+        elif tag == DT_STRSZ:
+            elf.strtab_size = value
+        elif tag in (DT_RPATH, DT_RUNPATH):
+            raw_rpath_entries.append((tag, entry_offset, value))
+
+    if not raw_rpath_entries:
+        return elf
+
+    if strtab_vaddr is None or elf.strtab_size is None:
+        raise ElfParsingError('Dynamic section has no string table')
+
+    elf.strtab_offset = _vaddr_to_offset(segments, strtab_vaddr)
+    elf.rpath_entries = raw_rpath_entries
+
+    # Read the null-terminated string of the first entry, like patchelf
+    _, _, str_offset = raw_rpath_entries[0]
+    if str_offset >= elf.strtab_size:
+        raise ElfParsingError('RPATH offset outside of the string table')
+    strtab_tail = _read(
+        f, elf.strtab_offset + str_offset, elf.strtab_size - str_offset
+    )
+    end = strtab_tail.find(b'\x00')
+    if end < 0:
+        raise ElfParsingError('RPATH string is not null-terminated')
+    elf.rpath = strtab_tail[:end]
+
+    return elf
+
+
+def get_rpaths(path):
+    """Return the RPATHs (or RUNPATHs) of an ELF file as a list of strings.
+
+    Args:
+        path (str): path to an executable or a shared library
+
+    Raises:
+        ElfParsingError: if the file cannot be parsed
+    """
+    with open(path, 'rb') as f:
+        elf = parse_elf(f)
+    rpath = elf.rpath.decode('utf-8')
+    return rpath.split(':') if rpath else []
+
+
+def set_rpaths_in_place(path, rpaths, force_rpath=True):
+    """Replace the RPATHs of an ELF file in place, if possible.
+
+    The new value overwrites the old string in the dynamic string table,
+    and is padded with null bytes. This works only if the file already
+    has a single RPATH or RUNPATH entry and the new value is not longer
+    than the old one.
+
+    Args:
+        path (str): path to an executable or a shared library
+        rpaths (list): paths to be set in the RPATH
+        force_rpath (bool): if True, turn a DT_RUNPATH entry into DT_RPATH
+            (like ``patchelf --force-rpath``)
+
+    Returns:
+        True if the file was modified, False if the new RPATH does not fit
+        and a tool like ``patchelf`` is needed.
+
+    Raises:
+        ElfParsingError: if the file cannot be parsed
+    """
+    new_rpath = ':'.join(rpaths).encode('utf-8')
+
+    with open(path, 'rb+') as f:
+        elf = parse_elf(f)
+        if len(elf.rpath_entries) != 1 or len(new_rpath) > len(elf.rpath):
+            return False
+
+        tag, entry_offset, str_offset = elf.rpath_entries[0]
+        if new_rpath != elf.rpath:
+            padding = b'\x00' * (len(elf.rpath) - len(new_rpath))
+            f.seek(elf.strtab_offset + str_offset)
+            f.write(new_rpath + padding)
+
+        if force_rpath and tag == DT_RUNPATH:
+            f.seek(entry_offset)
+            f.write(struct.pack(elf.dyn_entry_format, DT_RPATH, str_offset))
+
+    return True
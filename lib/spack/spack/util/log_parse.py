@@ -6,24 +6,30 @@
 from __future__ import print_function
 
 import sys
-from six import StringIO
+from contextlib import closing
+from six import StringIO, string_types
 
 from ctest_log_parser import CTestLogParser, BuildError, BuildWarning
 
 import llnl.util.tty as tty
 from llnl.util.tty.color import cescape, colorize
+from llnl.util.tty.log import open_log
 
 __all__ = ['parse_log_events', 'make_log_context']
 
 
-def parse_log_events(stream, context=6, jobs=None, profile=False):
+def parse_log_events(stream, context=6, jobs=None, profile=False,
+                     max_errors=None):
     """Extract interesting events from a log file as a list of LogEvent.
 
     Args:
-        stream (str or fileobject): build log name or file object
+        stream (str or fileobject): build log name or file object; logs
+            with names ending in ``.gz`` are decompressed transparently
         context (int): lines of context to extract around each log event
-        jobs (int): number of jobs to parse with; default ncpus
+        jobs (int): number of jobs to parse with when profiling; default
+            ncpus
         profile (bool): print out profile information for parsing
+        max_errors (int): stop parsing after this many errors
 
     Returns:
         (tuple): two lists containig ``BuildError`` and
@@ -33,12 +39,18 @@ def parse_log_events(stream, context=6, jobs=None, profile=False):
     lazily constructs a single ``CTestLogParser`` object.  This ensures
     that all the regex compilation is only done once.
     """
+    if profile and isinstance(stream, string_types):
+        with closing(open_log(stream)) as f:
+            return parse_log_events(f, context, jobs, profile)
+
     if parse_log_events.ctest_parser is None:
-        parse_log_events.ctest_parser = CTestLogParser(profile=profile)
+        parse_log_events.ctest_parser = CTestLogParser()
 
-    result = parse_log_events.ctest_parser.parse(stream, context, jobs)
+    parser = parse_log_events.ctest_parser
+    parser.profile = profile
+    result = parser.parse(stream, context, jobs, max_errors)
     if profile:
-        parse_log_events.ctest_parser.print_timings()
+        parser.print_timings()
     return result
 
 
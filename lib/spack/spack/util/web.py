@@ -7,18 +7,27 @@
 
 import codecs
 import errno
+import hashlib
+import json
 import multiprocessing.pool
 import os
 import os.path
 import re
 import shutil
+import socket
 import ssl
 import sys
+import threading
+import time
 import traceback
 
 import six
-from six.moves.urllib.error import URLError
+import six.moves.http_client as http_client
+import six.moves.queue as queue
+import six.moves.urllib.parse as urllib_parse
+from six.moves.urllib.error import URLError, HTTPError
 from six.moves.urllib.request import urlopen, Request
+from six.moves.urllib.request import getproxies, proxy_bypass
 
 if sys.version_info < (3, 0):
     # Python 2 had these in the HTMLParser package.
@@ -34,6 +43,7 @@ class HTMLParseError(Exception):
 from llnl.util.filesystem import mkdirp
 import llnl.util.tty as tty
 
+import spack
 import spack.cmd
 import spack.config
 import spack.error
@@ -41,7 +51,6 @@ class HTMLParseError(Exception):
 import spack.util.crypto
 import spack.util.s3 as s3_util
 import spack.util.url as url_util
-import llnl.util.lang
 
 from spack.util.compression import ALLOWED_ARCHIVE_TYPES
 
@@ -87,36 +96,45 @@ def uses_ssl(parsed_url):
     ))(sys.version_info)
 
 
-def read_from_url(url, accept_content_type=None):
-    url = url_util.parse(url)
-    context = None
+def read_from_url(url, accept_content_type=None, etag=None,
+                  last_modified=None):
+    """Open a URL for reading.
 
-    verify_ssl = spack.config.get('config:verify_ssl')
+    Args:
+        url (str): URL to be read
+        accept_content_type (str): if given, pages whose content type doesn't
+            start with this string are ignored
+        etag (str): if given, make a conditional request with an
+            ``If-None-Match`` header
+        last_modified (str): if given, make a conditional request with an
+            ``If-Modified-Since`` header
 
-    # Don't even bother with a context unless the URL scheme is one that uses
-    # SSL certs.
-    if uses_ssl(url):
-        if verify_ssl:
-            if __UNABLE_TO_VERIFY_SSL:
-                # User wants SSL verification, but it cannot be provided.
-                warn_no_ssl_cert_checking()
-            else:
-                # User wants SSL verification, and it *can* be provided.
-                context = ssl.create_default_context()  # novm
-        else:
-            # User has explicitly indicated that they do not want SSL
-            # verification.
-            context = ssl._create_unverified_context()
+    Returns:
+        A tuple with the URL of the response, its headers and a file-like
+        object to read it. The file-like object is None if the page was
+        rejected because of its content type, or if the server replied to a
+        conditional request with ``304 Not Modified``.
+    """
+    url = url_util.parse(url)
+    context = _ssl_context(url)
 
     req = Request(url_util.format(url))
     content_type = None
     is_web_url = url.scheme in ('http', 'https')
-    if accept_content_type and is_web_url:
+    if is_web_url:
+        if etag:
+            req.add_header('If-None-Match', etag)
+        if last_modified:
+            req.add_header('If-Modified-Since', last_modified)
+
+    if accept_content_type and is_web_url and not (etag or last_modified):
         # Make a HEAD request first to check the content type.  This lets
         # us ignore tarballs and gigantic files.
         # It would be nice to do this with the HTTP Accept header to avoid
         # one round-trip.  However, most servers seem to ignore the header
         # if you ask for a tarball with Accept: text/html.
+        # Conditional requests are for pages that were read before, so
+        # their content type is checked on the response instead.
         req.get_method = lambda: "HEAD"
         resp = _urlopen(req, timeout=_timeout, context=context)
 
@@ -127,12 +145,21 @@ def read_from_url(url, accept_content_type=None):
 
     try:
         response = _urlopen(req, timeout=_timeout, context=context)
+    except HTTPError as err:
+        if err.code == 304 and (etag or last_modified):
+            tty.debug('{0} was not modified'.format(url_util.format(url)))
+            return url_util.format(url), err.info(), None
+        raise SpackWebError('Download failed: {ERROR}'.format(
+            ERROR=str(err)))
     except URLError as err:
         raise SpackWebError('Download failed: {ERROR}'.format(
             ERROR=str(err)))
 
-    if accept_content_type and not is_web_url:
-        content_type = get_header(response.headers, 'Content-type')
+    if accept_content_type and content_type is None:
+        try:
+            content_type = get_header(response.headers, 'Content-type')
+        except KeyError:
+            content_type = None
 
     reject_content_type = (
         accept_content_type and (
@@ -150,6 +177,255 @@ def read_from_url(url, accept_content_type=None):
     return response.geturl(), response.headers, response
 
 
+def _ssl_context(parsed_url):
+    """Return the SSL context to be used to open a URL, or None."""
+    # Don't even bother with a context unless the URL scheme is one that uses
+    # SSL certs.
+    if not uses_ssl(parsed_url):
+        return None
+
+    if spack.config.get('config:verify_ssl'):
+        if __UNABLE_TO_VERIFY_SSL:
+            # User wants SSL verification, but it cannot be provided.
+            warn_no_ssl_cert_checking()
+            return None
+
+        # User wants SSL verification, and it *can* be provided.
+        return ssl.create_default_context()  # novm
+
+    # User has explicitly indicated that they do not want SSL verification.
+    return ssl._create_unverified_context()
+
+
+class ConnectionPool(object):
+    """Idle HTTP(S) connections, kept open so that later requests to the
+    same host don't need to connect (and negotiate SSL) again.
+
+    Connections are checked out with ``get`` and handed back with ``put``
+    once their response has been read entirely. The pool is thread safe.
+    """
+    def __init__(self, max_idle_per_host=4):
+        self.max_idle_per_host = max_idle_per_host
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def get(self, scheme, netloc, timeout=None):
+        """Return a tuple with a connection to the host and a boolean that
+        is True if the connection was reused."""
+        verify_ssl = bool(spack.config.get('config:verify_ssl'))
+        key = (scheme, netloc, verify_ssl)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+
+        if scheme == 'https':
+            context = _ssl_context(url_util.parse('https://' + netloc))
+            kwargs = {} if context is None else {'context': context}
+            conn = http_client.HTTPSConnection(
+                netloc, timeout=timeout, **kwargs)
+        else:
+            conn = http_client.HTTPConnection(netloc, timeout=timeout)
+        return conn, False
+
+    def put(self, scheme, netloc, conn):
+        """Give back an idle connection to the pool."""
+        verify_ssl = bool(spack.config.get('config:verify_ssl'))
+        key = (scheme, netloc, verify_ssl)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def clear(self):
+        """Close all the idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+
+#: Connections shared by all the downloads in this process
+_connection_pool = ConnectionPool()
+
+#: Size of the chunks written to disk while downloading
+_download_chunk_size = 2 ** 20
+
+#: Maximum number of redirects followed by fetch_url_to_file
+_max_redirects = 10
+
+
+def _uses_proxy(parsed_url):
+    proxies = getproxies()
+    return (parsed_url.scheme in proxies and
+            not proxy_bypass(parsed_url.hostname or ''))
+
+
+def _copy_stream(stream, f, hasher=None):
+    while True:
+        chunk = stream.read(_download_chunk_size)
+        if not chunk:
+            break
+        if f is not None:
+            f.write(chunk)
+        if hasher is not None:
+            hasher.update(chunk)
+
+
+def _hash_file(path, hasher):
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_download_chunk_size), b''):
+            hasher.update(chunk)
+
+
+def fetch_url_to_file(url, path, resume=True, hasher=None, headers=None,
+                      timeout=None):
+    """Download a URL to a local file, streaming its content to disk.
+
+    HTTP(S) connections are taken from a pool shared by the whole process,
+    so that several downloads from the same host reuse them. If a partial
+    download is found at ``path``, it is resumed with a ``Range`` request
+    when the server supports it. Other URL schemes, and hosts that must be
+    reached through a proxy, are downloaded with ``urllib`` from scratch.
+
+    Args:
+        url (str): URL to be downloaded
+        path (str): local file where the content is written. If None, the
+            content is discarded, which is only useful with ``hasher``.
+        resume (bool): whether to resume a partial download at ``path``
+        hasher: if given, a ``hashlib`` object that is updated with the
+            full content of the file while it is downloaded
+        headers (dict): additional headers for the request
+        timeout (int): timeout in seconds for the socket operations
+
+    Returns:
+        A tuple with the URL of the response, after redirects, and the
+        headers of the response
+
+    Raises:
+        SpackWebError: if the download failed
+    """
+    parsed = url_util.parse(url)
+    if parsed.scheme in ('http', 'https') and not _uses_proxy(parsed):
+        return _fetch_http_to_file(
+            url_util.format(parsed), path, resume, hasher, headers or {},
+            timeout)
+
+    response_url, response_headers, response = read_from_url(parsed)
+    if path is None:
+        _copy_stream(response, None, hasher)
+    else:
+        with open(path, 'wb') as f:
+            _copy_stream(response, f, hasher)
+    return response_url, response_headers
+
+
+def _fetch_http_to_file(url, path, resume, hasher, headers, timeout):
+    offset = 0
+    if resume and path is not None and os.path.exists(path):
+        offset = os.path.getsize(path)
+
+    request_headers = {'User-Agent': 'Spack/' + spack.spack_version}
+    request_headers.update(headers)
+
+    for _ in range(_max_redirects + 1):
+        if offset:
+            request_headers['Range'] = 'bytes={0}-'.format(offset)
+        else:
+            request_headers.pop('Range', None)
+
+        parsed = urllib_parse.urlsplit(url)
+        conn, response = _http_get(parsed, request_headers, timeout)
+        reusable = False
+        try:
+            if response.status in (301, 302, 303, 307, 308):
+                location = response.getheader('Location')
+                response.read()
+                reusable = True
+                if not location:
+                    raise SpackWebError(
+                        'Download failed: redirect without a location',
+                        'URL was: ' + url)
+                url = urllib_parse.urljoin(url, location)
+                continue
+
+            if response.status == 416 and offset:
+                # The partial download can't be resumed, start over
+                response.read()
+                reusable = True
+                offset = 0
+                continue
+
+            if response.status >= 400:
+                raise SpackWebError(
+                    'Download failed: HTTP Error {0}: {1}'.format(
+                        response.status, response.reason),
+                    'URL was: ' + url)
+
+            append = bool(offset) and response.status == 206
+            if append:
+                tty.debug('Resuming download of {0} at byte {1}'.format(
+                    url, offset))
+                if hasher is not None:
+                    _hash_file(path, hasher)
+
+            if path is None:
+                _copy_stream(response, None, hasher)
+            else:
+                with open(path, 'ab' if append else 'wb') as f:
+                    _copy_stream(response, f, hasher)
+            reusable = True
+            return url, response.msg
+
+        except (http_client.HTTPException, socket.error) as e:
+            raise SpackWebError(
+                'Download failed: {0}'.format(str(e)), 'URL was: ' + url)
+
+        finally:
+            if reusable and not response.will_close:
+                _connection_pool.put(parsed.scheme, parsed.netloc, conn)
+            else:
+                conn.close()
+
+    raise SpackWebError(
+        'Download failed: too many redirects', 'URL was: ' + url)
+
+
+def _http_get(parsed, headers, timeout):
+    """Send a GET request on a pooled connection, and return the connection
+    and the response."""
+    selector = parsed.path or '/'
+    if parsed.query:
+        selector += '?' + parsed.query
+
+    while True:
+        conn, reused = _connection_pool.get(
+            parsed.scheme, parsed.netloc, timeout=timeout)
+        try:
+            conn.request('GET', selector, headers=headers)
+            return conn, conn.getresponse()
+        except ssl.SSLError as e:
+            conn.close()
+            raise SpackWebError(
+                'Download failed: {0}'.format(str(e)),
+                'This is either an attack, or your SSL configuration is bad. '
+                'If you believe your SSL configuration is bad, you can try '
+                'running spack -k, which will not check SSL certificates. '
+                'Use this at your own risk.')
+        except (http_client.HTTPException, socket.error) as e:
+            conn.close()
+            # The server may have closed an idle connection: retry once
+            # with a new connection before giving up
+            if reused:
+                continue
+            raise SpackWebError(
+                'Download failed: {0}'.format(str(e)),
+                'URL was: ' + urllib_parse.urlunsplit(parsed))
+
+
 def warn_no_ssl_cert_checking():
     tty.warn("Spack will not check SSL certificates. You need to update "
              "your Python to enable certificate verification.")
@@ -322,78 +598,176 @@ def list_url(url, recursive=False):
             for key in _iter_s3_prefix(s3, url)))
 
 
-def spider(root_urls, depth=0, concurrency=32):
-    """Get web pages from root URLs.
-
-    If depth is specified (e.g., depth=2), then this will also follow
-    up to <depth> levels of links from each root.
-
-    Args:
-        root_urls (str or list of str): root urls used as a starting point
-            for spidering
-        depth (int): level of recursion into links
-        concurrency (int): number of simultaneous requests that can be sent
+class _PageCache(object):
+    """On-disk cache of the web pages read by a ``Spider``.
 
-    Returns:
-        A dict of pages visited (URL) mapped to their full text and the
-        set of visited links.
+    Pages are stored in the misc cache, together with their ETag and
+    last modification date, so that stale entries can be validated with a
+    conditional request instead of being downloaded again.
     """
-    # Cache of visited links, meant to be captured by the closure below
-    _visited = set()
 
-    def _spider(url, collect_nested):
-        """Fetches URL and any pages it links to.
+    def __init__(self, ttl=None):
+        if ttl is None:
+            ttl = spack.config.get('config:spider_cache_ttl', 0)
+        #: Entries younger than this many seconds are used as they are
+        self.ttl = ttl
+        # FileCache is not thread safe
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(url):
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join('spider', digest[:2], digest + '.json')
+
+    def get(self, url):
+        """Return the cached entry for a URL, or None."""
+        import spack.caches  # avoid circular import
+        key = self._key(url)
+        with self._lock:
+            try:
+                if not spack.caches.misc_cache.init_entry(key):
+                    return None
+                with spack.caches.misc_cache.read_transaction(key) as f:
+                    entry = json.load(f)
+            except (IOError, OSError, ValueError, spack.error.SpackError):
+                return None
+        return entry if entry.get('url') == url else None
+
+    def is_fresh(self, entry):
+        return time.time() - entry['time'] < self.ttl
+
+    def put(self, url, response_url, page, headers):
+        """Store a page, or refresh the timestamp of the entry for a page
+        that was not modified."""
+        import spack.caches  # avoid circular import
+        key = self._key(url)
+        entry = {
+            'url': url,
+            'response_url': response_url,
+            'page': page,
+            'etag': headers.get('ETag') if headers else None,
+            'last_modified': (
+                headers.get('Last-Modified') if headers else None),
+            'time': time.time()
+        }
+        with self._lock:
+            try:
+                spack.caches.misc_cache.init_entry(key)
+                with spack.caches.misc_cache.write_transaction(key) as (
+                        _, new):
+                    json.dump(entry, new)
+            except (IOError, OSError, spack.error.SpackError) as e:
+                tty.debug('Cannot cache {0}: {1}'.format(url, str(e)))
+        return entry
+
+
+class Spider(object):
+    """Crawls web pages looking for links, e.g. to package archives.
+
+    Pages are visited breadth-first by a pool of threads, with no barrier
+    between depth levels, and with at most ``host_concurrency`` requests
+    to the same host at any time. A page is read at most once per spider,
+    so a single spider can be shared by many searches, e.g. to find the
+    versions of a batch of packages. Pages read over HTTP(S) are also kept
+    in an on-disk cache (see ``config:spider_cache_ttl``).
+    """
 
-        Prints out a warning only if the root can't be fetched; it ignores
-        errors with pages that the root links to.
+    def __init__(self, concurrency=32, host_concurrency=None, cache=True):
+        """Create a new spider.
 
         Args:
-            url (str): url being fetched and searched for links
-            collect_nested (bool): whether we want to collect arguments
-                for nested spidering on the links found in this url
+            concurrency (int): number of simultaneous requests that can be
+                sent
+            host_concurrency (int): number of simultaneous requests that can
+                be sent to the same host, defaults to
+                ``config:spider_host_jobs``
+            cache (bool): whether to use the on-disk page cache
+        """
+        if host_concurrency is None:
+            host_concurrency = spack.config.get('config:spider_host_jobs', 4)
+        self.concurrency = concurrency
+        self.host_concurrency = host_concurrency
+        self.page_cache = _PageCache() if cache else None
+
+        self._lock = threading.Lock()
+        # Maps hosts to semaphores that limit the number of requests
+        self._host_slots = {}
+        # Maps URLs to the (response URL, page, links) read from them, or
+        # to None for URLs that could not be read
+        self._visited = {}
+
+    def _host_slot(self, url):
+        host = url_util.parse(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(
+                    self.host_concurrency)
+            return self._host_slots[host]
+
+    def _read_page(self, url):
+        """Return a (response URL, page) tuple, with a None page if the URL
+        could not be read or is not an HTML page."""
+        cache = self.page_cache
+        if url_util.parse(url).scheme not in ('http', 'https'):
+            cache = None
+
+        entry = cache.get(url) if cache else None
+        if entry and cache.is_fresh(entry):
+            return entry['response_url'], entry['page']
+
+        with self._host_slot(url):
+            if entry and (entry['etag'] or entry['last_modified']):
+                response_url, headers, response = read_from_url(
+                    url, 'text/html', etag=entry['etag'],
+                    last_modified=entry['last_modified'])
+            else:
+                response_url, headers, response = read_from_url(
+                    url, 'text/html')
+
+            if response_url and response:
+                page = codecs.getreader('utf-8')(response).read()
+
+        if not response:
+            if entry and headers is not None:
+                # 304 Not Modified
+                entry = cache.put(
+                    url, entry['response_url'], entry['page'], headers)
+                return entry['response_url'], entry['page']
+            return None, None
+
+        if not response_url:
+            return None, None
+
+        if cache:
+            cache.put(url, response_url, page, headers)
+        return response_url, page
+
+    def _visit(self, url):
+        """Reads a URL and parses the links in it.
+
+        Prints out a warning only for errors that the user can act on; it
+        ignores other errors.
 
         Returns:
-            A tuple of:
-            - pages: dict of pages visited (URL) mapped to their full text.
-            - links: set of links encountered while visiting the pages.
-            - spider_args: argument for subsequent call to spider
+            A tuple of the response URL, the text of the page and the list of
+            links in it, or None if the page could not be read.
         """
-        pages = {}  # dict from page URL -> text content.
-        links = set()  # set of all links seen on visited pages.
-        subcalls = []
+        with self._lock:
+            if url in self._visited:
+                return self._visited[url]
 
+        result = None
         try:
-            response_url, _, response = read_from_url(url, 'text/html')
-            if not response_url or not response:
-                return pages, links, subcalls
-
-            page = codecs.getreader('utf-8')(response).read()
-            pages[response_url] = page
-
-            # Parse out the links in the page
-            link_parser = LinkParser()
-            link_parser.feed(page)
-
-            while link_parser.links:
-                raw_link = link_parser.links.pop()
-                abs_link = url_util.join(
-                    response_url,
-                    raw_link.strip(),
-                    resolve_href=True)
-                links.add(abs_link)
-
-                # Skip stuff that looks like an archive
-                if any(raw_link.endswith(s) for s in ALLOWED_ARCHIVE_TYPES):
-                    continue
-
-                # Skip already-visited links
-                if abs_link in _visited:
-                    continue
-
-                # If we're not at max depth, follow links.
-                if collect_nested:
-                    subcalls.append((abs_link,))
-                    _visited.add(abs_link)
+            response_url, page = self._read_page(url)
+            if page is not None:
+                # Parse out the links in the page
+                link_parser = LinkParser()
+                link_parser.feed(page)
+                links = [
+                    url_util.join(
+                        response_url, raw_link.strip(), resolve_href=True)
+                    for raw_link in link_parser.links]
+                result = (response_url, page, links)
 
         except URLError as e:
             tty.debug(str(e))
@@ -423,43 +797,95 @@ def _spider(url, collect_nested):
         finally:
             tty.debug("SPIDER: [url={0}]".format(url))
 
-        return pages, links, subcalls
+        with self._lock:
+            self._visited[url] = result
+        return result
 
-    if isinstance(root_urls, six.string_types):
-        root_urls = [root_urls]
+    def spider(self, root_urls, depth=0):
+        """Get web pages from root URLs.
 
-    # Clear the local cache of visited pages before starting the search
-    _visited.clear()
+        If depth is specified (e.g., depth=2), then this will also follow
+        up to <depth> levels of links from each root.
 
-    current_depth = 0
-    pages, links, spider_args = {}, set(), []
+        Args:
+            root_urls (str or list of str): root urls used as a starting point
+                for spidering
+            depth (int): level of recursion into links
 
-    collect = current_depth < depth
-    for root in root_urls:
-        root = url_util.parse(root)
-        spider_args.append((root, collect))
+        Returns:
+            A dict of pages visited (URL) mapped to their full text and the
+            set of visited links.
+        """
+        if isinstance(root_urls, six.string_types):
+            root_urls = [root_urls]
 
-    tp = multiprocessing.pool.ThreadPool(processes=concurrency)
-    try:
-        while current_depth <= depth:
-            tty.debug("SPIDER: [depth={0}, max_depth={1}, urls={2}]".format(
-                current_depth, depth, len(spider_args))
-            )
-            results = tp.map(llnl.util.lang.star(_spider), spider_args)
-            spider_args = []
-            collect = current_depth < depth
-            for sub_pages, sub_links, sub_spider_args in results:
-                sub_spider_args = [x + (collect,) for x in sub_spider_args]
-                pages.update(sub_pages)
-                links.update(sub_links)
-                spider_args.extend(sub_spider_args)
-
-            current_depth += 1
-    finally:
-        tp.terminate()
-        tp.join()
-
-    return pages, links
+        pages, links = {}, set()
+        seen = set()
+        done = queue.Queue()
+        pending = [0]
+
+        tp = multiprocessing.pool.ThreadPool(processes=self.concurrency)
+
+        def _submit(url, url_depth):
+            if url in seen:
+                return
+            seen.add(url)
+            pending[0] += 1
+            tp.apply_async(
+                self._visit, (url,),
+                callback=lambda result: done.put((url_depth, result)))
+
+        try:
+            for root in root_urls:
+                _submit(url_util.format(root), 0)
+
+            while pending[0]:
+                try:
+                    url_depth, result = done.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                pending[0] -= 1
+                if result is None:
+                    continue
+
+                response_url, page, page_links = result
+                pages[response_url] = page
+                links.update(page_links)
+
+                # If we're not at max depth, follow links.
+                if url_depth >= depth:
+                    continue
+                for link in page_links:
+                    # Skip stuff that looks like an archive
+                    if any(link.endswith(s) for s in ALLOWED_ARCHIVE_TYPES):
+                        continue
+                    _submit(link, url_depth + 1)
+        finally:
+            tp.terminate()
+            tp.join()
+
+        tty.debug("SPIDER: [max_depth={0}, urls={1}]".format(
+            depth, len(seen)))
+        return pages, links
+
+
+def spider(root_urls, depth=0, concurrency=32):
+    """Get web pages from root URLs.
+
+    If depth is specified (e.g., depth=2), then this will also follow
+    up to <depth> levels of links from each root.
+
+    Args:
+        root_urls (str or list of str): root urls used as a starting point
+            for spidering
+        depth (int): level of recursion into links
+        concurrency (int): number of simultaneous requests that can be sent
+
+    Returns:
+        A dict of pages visited (URL) mapped to their full text and the
+        set of visited links.
+    """
+    return Spider(concurrency=concurrency).spider(root_urls, depth=depth)
 
 
 def _urlopen(req, *args, **kwargs):
@@ -484,7 +910,8 @@ def _urlopen(req, *args, **kwargs):
 
 
 def find_versions_of_archive(
-        archive_urls, list_url=None, list_depth=0, concurrency=32
+        archive_urls, list_url=None, list_depth=0, concurrency=32,
+        web_spider=None
 ):
     """Scrape web pages for new versions of a tarball.
 
@@ -499,6 +926,9 @@ def find_versions_of_archive(
         list_depth (int): max depth to follow links on list_url pages.
             Defaults to 0.
         concurrency (int): maximum number of concurrent requests
+        web_spider (Spider): spider used to read the pages, which can be
+            shared across calls to avoid reading the same pages again.
+            By default, a new spider is created.
     """
     if not isinstance(archive_urls, (list, tuple)):
         archive_urls = [archive_urls]
@@ -519,7 +949,9 @@ def find_versions_of_archive(
     list_urls |= additional_list_urls
 
     # Grab some web pages to scrape.
-    pages, links = spider(list_urls, depth=list_depth, concurrency=concurrency)
+    if web_spider is None:
+        web_spider = Spider(concurrency=concurrency)
+    pages, links = web_spider.spider(list_urls, depth=list_depth)
 
     # Scrape them for archive URLs
     regexes = []
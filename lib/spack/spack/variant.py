@@ -213,6 +213,12 @@ class AbstractVariant(object):
     values.
     """
 
+    # _patches_in_order_of_appearance is only set on 'patches' variants
+    __slots__ = ('name', '_value', '_original_value',
+                 '_patches_in_order_of_appearance')
+
+    __reduce_ex__ = lang.reduce_ex_with_slots
+
     def __init__(self, name, value):
         self.name = name
 
@@ -227,17 +233,21 @@ def __init__(self, name, value):
     @staticmethod
     def from_node_dict(name, value):
         """Reconstruct a variant from a node dict."""
+        # Names and values are shared among the specs read from a database
+        name = lang.shared(name)
         if isinstance(value, list):
             # read multi-value variants in and be faithful to the YAML
             mvar = MultiValuedVariant(name, ())
-            mvar._value = tuple(value)
+            mvar._value = lang.shared(tuple(lang.shared(v) for v in value))
             mvar._original_value = mvar._value
             return mvar
 
         elif str(value).upper() == 'TRUE' or str(value).upper() == 'FALSE':
             return BoolValuedVariant(name, value)
 
-        return SingleValuedVariant(name, value)
+        svar = SingleValuedVariant(name, value)
+        svar._value = svar._original_value = lang.shared(svar._value)
+        return svar
 
     def yaml_entry(self):
         """Returns a key, value tuple suitable to be an entry in a yaml dict.
@@ -296,7 +306,12 @@ def copy(self):
         >>> assert a == b
         >>> assert a is not b
         """
-        return type(self)(self.name, self._original_value)
+        # Values are replaced, never modified, so the copy shares them
+        clone = object.__new__(type(self))
+        clone.name = self.name
+        clone._value = self._value
+        clone._original_value = self._original_value
+        return clone
 
     @implicit_variant_conversion
     def satisfies(self, other):
@@ -372,6 +387,9 @@ def __str__(self):
 
 class MultiValuedVariant(AbstractVariant):
     """A variant that can hold multiple values at once."""
+
+    __slots__ = ()
+
     @implicit_variant_conversion
     def satisfies(self, other):
         """Returns true if ``other.name == self.name`` and ``other.value`` is
@@ -398,6 +416,8 @@ def append(self, value):
 class SingleValuedVariant(AbstractVariant):
     """A variant that can hold multiple values, but one at a time."""
 
+    __slots__ = ()
+
     def _value_setter(self, value):
         # Treat the value as a multi-valued variant
         super(SingleValuedVariant, self)._value_setter(value)
@@ -449,6 +469,8 @@ class BoolValuedVariant(SingleValuedVariant):
     BoolValuedVariant can also hold the value '*', for coerced
     comparisons between ``foo=*`` and ``+foo`` or ``~foo``."""
 
+    __slots__ = ()
+
     def _value_setter(self, value):
         # Check the string representation of the value and turn
         # it to a boolean
@@ -478,6 +500,8 @@ class VariantMap(lang.HashableMap):
     if the key is not already present.
     """
 
+    __slots__ = ('spec',)
+
     def __init__(self, spec):
         super(VariantMap, self).__init__()
         self.spec = spec
@@ -589,8 +613,8 @@ def copy(self):
             VariantMap: a copy of self
         """
         clone = VariantMap(self.spec)
-        for name, variant in self.items():
-            clone[name] = variant.copy()
+        for name, variant in self.dict.items():
+            clone.dict[name] = variant.copy()
         return clone
 
     def __str__(self):
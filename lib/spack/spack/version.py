@@ -30,6 +30,8 @@
 from functools import wraps
 from six import string_types
 
+from llnl.util.lang import reduce_ex_with_slots
+
 import spack.error
 from spack.util.spack_yaml import syaml_dict
 
@@ -42,6 +44,17 @@
 # Infinity-like versions. The order in the list implies the comparison rules
 infinity_versions = ['develop', 'main', 'master', 'head', 'trunk']
 
+#: Sort keys of infinity-like version segments, greater than all others
+_infinity_keys = dict(
+    (v, (3, -i)) for i, v in enumerate(infinity_versions))
+
+#: Versions, keyed by the strings they were made from. Versions are never
+#: modified, so each one is parsed once and then shared.
+_versions = {}
+
+#: Version ranges parsed by _string_to_version(), keyed by their string
+_version_ranges = {}
+
 
 def int_if_int(string):
     """Convert a string to int if possible.  Otherwise, return a string."""
@@ -93,12 +106,38 @@ def coercing_method(a, b, *args, **kwargs):
     return coercing_method
 
 
+def _segment_key(segment):
+    """Sort key of a version segment.
+
+    Numbers are always "newer" than letters. This is for consistency with
+    RPM.  See patch #60884 (and details) from bugzilla #50977 in the RPM
+    project at rpm.org.  Or look at rpmvercmp.c if you want to see how this
+    is implemented there.
+    """
+    if isinstance(segment, string_types):
+        return _infinity_keys.get(segment, (1, segment))
+    return (2, segment)
+
+
 class Version(object):
-    """Class to represent versions"""
+    """Class to represent versions.
 
-    def __init__(self, string):
-        string = str(string)
+    Versions are immutable, and parsed only once: constructing a Version
+    from a string that was already parsed returns the same instance.
+    """
+
+    __slots__ = ('string', 'version', 'separators', '_key')
 
+    def __new__(cls, string):
+        string = str(string)
+        version = _versions.get(string)
+        if version is None:
+            version = object.__new__(cls)
+            version._parse(string)
+            version = _versions.setdefault(string, version)
+        return version
+
+    def _parse(self, string):
         if not re.match(VALID_VERSION, string):
             raise ValueError("Bad characters in version string: %s" % string)
 
@@ -114,6 +153,13 @@ def __init__(self, string):
         # Store the separators from the original version string as well.
         self.separators = tuple(re.split(segment_regex, string)[1:])
 
+        # Versions are ordered by comparing their keys: if the common
+        # prefix is equal, the one with more segments is bigger.
+        self._key = tuple(_segment_key(seg) for seg in self.version)
+
+    def __reduce__(self):
+        return Version, (self.string,)
+
     @property
     def dotted(self):
         """The dotted representation of the version.
@@ -274,40 +320,7 @@ def __lt__(self, other):
         if other is None:
             return False
 
-        # Coerce if other is not a Version
-        # simple equality test first.
-        if self.version == other.version:
-            return False
-
-        # Standard comparison of two numeric versions
-        for a, b in zip(self.version, other.version):
-            if a == b:
-                continue
-            else:
-                if a in infinity_versions:
-                    if b in infinity_versions:
-                        return (infinity_versions.index(a) >
-                                infinity_versions.index(b))
-                    else:
-                        return False
-                if b in infinity_versions:
-                    return True
-
-                # Neither a nor b is infinity
-                # Numbers are always "newer" than letters.
-                # This is for consistency with RPM.  See patch
-                # #60884 (and details) from bugzilla #50977 in
-                # the RPM project at rpm.org.  Or look at
-                # rpmvercmp.c if you want to see how this is
-                # implemented there.
-                if type(a) != type(b):
-                    return type(b) == int
-                else:
-                    return a < b
-
-        # If the common prefix is equal, the one
-        # with more segments is bigger.
-        return len(self.version) < len(other.version)
+        return self._key < other._key
 
     @coerced
     def __eq__(self, other):
@@ -377,6 +390,10 @@ def intersection(self, other):
 
 class VersionRange(object):
 
+    __slots__ = ('start', 'end')
+
+    __reduce_ex__ = reduce_ex_with_slots
+
     def __init__(self, start, end):
         if isinstance(start, string_types):
             start = Version(start)
@@ -577,9 +594,31 @@ def __str__(self):
         return out
 
 
+def _ends_first(a, b):
+    """True if no version in ``a`` is higher than every version in ``b``.
+
+    ``a`` and ``b`` are Versions or VersionRanges.
+    """
+    a_end, b_end = a.highest(), b.highest()
+    if b_end is None:
+        return True
+    if a_end is None:
+        return False
+    # a version also ends at every version it is a prefix of
+    if a_end in b_end:
+        return True
+    if b_end in a_end:
+        return False
+    return a_end < b_end
+
+
 class VersionList(object):
     """Sorted, non-redundant list of Versions and VersionRanges."""
 
+    __slots__ = ('versions',)
+
+    __reduce_ex__ = reduce_ex_with_slots
+
     def __init__(self, vlist=None):
         self.versions = []
         if vlist is not None:
@@ -628,7 +667,10 @@ def concrete(self):
             return None
 
     def copy(self):
-        return VersionList(self)
+        # Versions and ranges are immutable, so they are shared
+        clone = VersionList()
+        clone.versions = list(self.versions)
+        return clone
 
     def lowest(self):
         """Get the lowest version in the list."""
@@ -661,12 +703,23 @@ def preferred(self):
             latest = self.highest()
         return latest
 
+    def _start_indices(self, other):
+        """Indices of the first elements of this list and of other that
+        can overlap an element of the other list.
+
+        Elements before these lie entirely below the other list, so
+        walks over both lists can start from here.
+        """
+        s = max(bisect_left(self, other[0]) - 1, 0)
+        o = max(bisect_left(other, self[0]) - 1, 0)
+        return s, o
+
     @coerced
     def overlaps(self, other):
         if not other or not self:
             return False
 
-        s = o = 0
+        s, o = self._start_indices(other)
         while s < len(self) and o < len(other):
             if self[s].overlaps(other[o]):
                 return True
@@ -714,7 +767,7 @@ def satisfies(self, other, strict=False):
         if strict:
             return self in other
 
-        s = o = 0
+        s, o = self._start_indices(other)
         while s < len(self) and o < len(other):
             if self[s].satisfies(other[o]):
                 return True
@@ -737,11 +790,20 @@ def union(self, other):
 
     @coerced
     def intersection(self, other):
-        # TODO: make this faster.  This is O(n^2).
+        # Both lists are sorted and their elements don't overlap, so they
+        # are merged in one pass: after intersecting two elements, the one
+        # that ends first cannot overlap anything further in the other list.
         result = VersionList()
-        for s in self:
-            for o in other:
-                result.add(s.intersection(o))
+        if not other or not self:
+            return result
+
+        s, o = self._start_indices(other)
+        while s < len(self) and o < len(other):
+            result.add(self[s].intersection(other[o]))
+            if _ends_first(self[s], other[o]):
+                s += 1
+            else:
+                o += 1
         return result
 
     @coerced
@@ -829,10 +891,15 @@ def _string_to_version(string):
         return VersionList(string.split(','))
 
     elif ':' in string:
-        s, e = string.split(':')
-        start = Version(s) if s else None
-        end = Version(e) if e else None
-        return VersionRange(start, end)
+        # Ranges are not modified either, so they are shared like versions
+        version_range = _version_ranges.get(string)
+        if version_range is None:
+            s, e = string.split(':')
+            start = Version(s) if s else None
+            end = Version(e) if e else None
+            version_range = _version_ranges.setdefault(
+                string, VersionRange(start, end))
+        return version_range
 
     else:
         return Version(string)
@@ -0,0 +1,94 @@
+# Copyright 2013-2021 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""Compare the spec parser with the re.Scanner lexer it replaced.
+
+Collects the spec strings of the directives of every package in a
+repository (by default builtin), checks that they give the same tokens
+and the same specs as with the old lexer, and times:
+
+- the old lexer with the parser;
+- the current parser, without the cache of parsed specs;
+- Spec(), with the cache of parsed specs.
+
+Run it with::
+
+    spack python share/spack/qa/spec-parse-benchmark.py [REPO_ROOT]
+
+The exit status is 1 if any string gives different results.
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+import spack.paths
+import spack.spec as sp
+import spack.test.spec_lexer as spec_lexer
+
+
+def _time(function, strings, repeat=3):
+    """Best time of function over all the strings, in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        for text in strings:
+            try:
+                function(text)
+            except Exception:
+                pass
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _spec(text):
+    return sp.Spec(text)
+
+
+def _spec_with_empty_cache(text):
+    sp._parsed_specs.clear()
+    return sp.Spec(text)
+
+
+def main(repo_root):
+    strings = spec_lexer.directive_strings(repo_root)
+    unique = sorted(set(strings))
+    print('{0} spec strings, {1} unique, in {2}'.format(
+        len(strings), len(unique), repo_root))
+
+    mismatches = 0
+    for text in unique:
+        same_tokens = spec_lexer.new_lex(text) == spec_lexer.old_lex(text)
+        expected = spec_lexer._parse_result(spec_lexer.old_parse, text)
+        same_specs = expected == spec_lexer._parse_result(
+            sp.SpecParser().parse, text)
+        if same_specs and isinstance(expected, list) and len(expected) == 1:
+            # Once parsed, and once copied from the cache
+            sp._parsed_specs.pop(text, None)
+            same_specs = all(
+                spec_lexer._parse_result(lambda t: [_spec(t)], text) ==
+                expected for _ in range(2))
+        if not (same_tokens and same_specs):
+            mismatches += 1
+            print('mismatch: {0!r}'.format(text))
+    print('{0} strings give different results'.format(mismatches))
+
+    old = _time(spec_lexer.old_parse, strings)
+    new = _time(lambda t: sp.SpecParser().parse(t), strings)
+    sp._parsed_specs.clear()
+    cached = _time(_spec, strings)
+    uncached = _time(_spec_with_empty_cache, strings)
+    print('old lexer and parser:  {0:8.3f}s'.format(old))
+    print('parser:                {0:8.3f}s  ({1:.2f}x)'.format(
+        new, old / new))
+    print('Spec(), no cache:      {0:8.3f}s'.format(uncached))
+    print('Spec(), with cache:    {0:8.3f}s  ({1:.2f}x)'.format(
+        cached, uncached / cached))
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1] if len(sys.argv) > 1 else
+                  spack.paths.packages_path))
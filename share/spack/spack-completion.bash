@@ -447,7 +447,7 @@ _spack_buildcache_copy() {
 }
 
 _spack_buildcache_update_index() {
-    SPACK_COMPREPLY="-h --help -d --mirror-url -k --keys"
+    SPACK_COMPREPLY="-h --help -d --mirror-url -k --keys -i --incremental"
 }
 
 _spack_cd() {
@@ -462,7 +462,7 @@ _spack_cd() {
 _spack_checksum() {
     if $list_options
     then
-        SPACK_COMPREPLY="-h --help --keep-stage -b --batch"
+        SPACK_COMPREPLY="-h --help --keep-stage -j --jobs -b --batch"
     else
         _all_packages
     fi
@@ -714,7 +714,7 @@ _spack_dependencies() {
 _spack_dependents() {
     if $list_options
     then
-        SPACK_COMPREPLY="-h --help -i --installed -t --transitive"
+        SPACK_COMPREPLY="-h --help -i --installed -t --transitive --deptype"
     else
         _all_packages
     fi
@@ -895,7 +895,7 @@ _spack_external_list() {
 _spack_fetch() {
     if $list_options
     then
-        SPACK_COMPREPLY="-h --help -n --no-checksum -m --missing -D --dependencies"
+        SPACK_COMPREPLY="-h --help -n --no-checksum -m --missing -D --dependencies -j --jobs"
     else
         _all_packages
     fi
@@ -1090,7 +1090,7 @@ _spack_location() {
 _spack_log_parse() {
     if $list_options
     then
-        SPACK_COMPREPLY="-h --help --show -c --context -p --profile -w --width -j --jobs"
+        SPACK_COMPREPLY="-h --help --show -c --context -p --profile -w --width -j --jobs -m --max-errors"
     else
         SPACK_COMPREPLY=""
     fi
@@ -1126,7 +1126,7 @@ _spack_mirror() {
 _spack_mirror_create() {
     if $list_options
     then
-        SPACK_COMPREPLY="-h --help -d --directory -a --all -f --file --exclude-file --exclude-specs --skip-unstable-versions -D --dependencies -n --versions-per-spec"
+        SPACK_COMPREPLY="-h --help -d --directory -a --all -f --file --exclude-file --exclude-specs --skip-unstable-versions -D --dependencies -n --versions-per-spec -j --jobs"
     else
         _all_packages
     fi
@@ -1675,7 +1675,7 @@ _spack_verify() {
 _spack_versions() {
     if $list_options
     then
-        SPACK_COMPREPLY="-h --help -s --safe --safe-only -r --remote -n --new -c --concurrency"
+        SPACK_COMPREPLY="-h --help -s --safe --safe-only -r --remote -n --new -c --concurrency -b --batch"
     else
         _all_packages
     fi